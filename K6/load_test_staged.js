@@ -30,7 +30,8 @@ export default function () {
   // 2️⃣ If orders exist, GET detail of first one
   let orders = [];
   try {
-    orders = resOrders.json();
+    // cursor-paginated: { next, previous, results }
+    orders = resOrders.json().results || [];
   } catch (e) {
     // if response isn't JSON, fail gracefully
   }
@@ -0,0 +1,168 @@
+"""
+Concurrent add-to-cart on one worker, sync vs. async views, against a
+slow local stub of the catalog.
+
+Every add is for a service nobody has looked up yet, so each request
+waits on the catalog (--latency) before writing the cart:
+
+  sync, N threads        CartView as a gunicorn worker runs it: one thread
+                         for the default sync worker (RUNNING.md), N for
+                         gthread; each is blocked for the whole lookup
+  async, N in flight     AsyncCartView on one event loop (ASYNC_VIEWS under
+                         uvicorn): lookups overlap, the loop keeps serving
+
+Both use the Redis cart backend and the same service cache, so the
+difference is how many catalog waits one worker can hold open at once.
+Views are called directly (no server or middleware), the same for both.
+The one-thread run is capped at 25 adds per thread to keep it short.
+
+The stub catalog runs in its own process; Redis is fakeredis, in-process,
+unless CI_TESTING is unset and REDIS_URL points at a server. Once the
+worker's CPU is saturated neither model gets faster, so the gap shows
+with a slow catalog rather than a fast one.
+
+    python -m benchmarks.bench_async_cart
+    python -m benchmarks.bench_async_cart --requests 1000 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import itertools
+import multiprocessing
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import ROOT, setup_django
+
+RUNS = 5
+
+
+def serve_catalog(latency, requests, ready):
+    # In its own process, so the stub doesn't compete with the worker for
+    # the GIL the way a remote catalog wouldn't
+    import sys
+
+    sys.path.insert(0, str(ROOT))
+    from conftest import StubServer
+
+    stub = StubServer()
+    stub.delay = latency
+    stub._httpd.socket.listen(1024)  # socketserver's default backlog is 5
+    for run in range(RUNS):
+        for n in range(requests):
+            sid = f"svc-{run}-{n}"
+            stub.routes[f"/api/services/{sid}"] = (200, {"name": sid, "price": "9.99"})
+    stub.start()
+    ready.put(stub.url)
+    threading.Event().wait()
+
+
+def summarize(label, samples, elapsed):
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(
+        f"{label:24} {len(samples) / elapsed:>9.0f} "
+        f"{statistics.median(samples):>10.1f} {p99:>10.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--users", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from adrf.test import AsyncAPIRequestFactory
+    from django.conf import settings
+    from django.core.cache import cache
+    from model_bakery import baker
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from orders.async_views import AsyncCartView
+    from orders.utils.catalog import reset_catalog_client
+    from orders.views import CartView
+    from utils.tiered_cache import clear_local_caches
+
+    ready = multiprocessing.Queue()
+    catalog = multiprocessing.Process(
+        target=serve_catalog,
+        args=(args.latency, args.requests, ready),
+        daemon=True,
+    )
+    catalog.start()
+    settings.EXPRESS_SERVICE_URL = f"{ready.get(timeout=30)}/api/services"
+    settings.CART_BACKEND = "orders.carts.RedisCartBackend"
+    users = baker.make("users.User", is_active=True, _quantity=args.users)
+    run_ids = itertools.count()
+
+    def prepare(count):
+        # Fresh services and empty carts for every run
+        cache.clear()
+        clear_local_caches()
+        reset_catalog_client()
+        run = next(run_ids)
+        service_ids = [f"svc-{run}-{n}" for n in range(count)]
+        return [(users[n % len(users)], sid) for n, sid in enumerate(service_ids)]
+
+    sync_view = CartView.as_view()
+    sync_factory = APIRequestFactory()
+
+    def run_sync(threads):
+        def add(job):
+            user, sid = job
+            request = sync_factory.post("/api/cart/", {"service_id": sid})
+            force_authenticate(request, user=user)
+            started = time.perf_counter()
+            response = sync_view(request)
+            assert response.status_code == 201, response.status_code
+            return (time.perf_counter() - started) * 1000
+
+        jobs = prepare(min(args.requests, threads * 25))
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            samples = list(pool.map(add, jobs))
+        return samples, time.perf_counter() - started
+
+    async_view = AsyncCartView.as_view()
+    async_factory = AsyncAPIRequestFactory()
+
+    def run_async(in_flight):
+        async def add(job, slots):
+            user, sid = job
+            async with slots:
+                request = async_factory.post("/api/cart/", {"service_id": sid})
+                force_authenticate(request, user=user)
+                started = time.perf_counter()
+                response = await async_view(request)
+                assert response.status_code == 201, response.status_code
+                return (time.perf_counter() - started) * 1000
+
+        async def run(jobs):
+            slots = asyncio.Semaphore(in_flight)
+            return await asyncio.gather(*(add(job, slots) for job in jobs))
+
+        jobs = prepare(args.requests)
+        started = time.perf_counter()
+        samples = asyncio.run(run(jobs))
+        return samples, time.perf_counter() - started
+
+    print(
+        f"\n{args.requests} adds, catalog latency {args.latency * 1000:.0f} ms, "
+        "one worker"
+    )
+    print(f"{'':24} {'adds/s':>9} {'p50 ms':>10} {'p99 ms':>10}")
+    for threads in (1, 8, 32):
+        label = f"sync, {threads} thread" + ("s" if threads > 1 else "")
+        summarize(label, *run_sync(threads))
+    for in_flight in (32, 100):
+        summarize(f"async, {in_flight} in flight", *run_async(in_flight))
+    catalog.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Cache value encoding: size in Redis and set/get latency per serializer and
+compressor, before (django-redis defaults: pickle, no compression) and
+after (utils.redis_cache: msgpack + threshold lz4/zlib).
+
+Payloads:
+  staff page    the data behind a 100-order staff /api/orders/ page
+  service       one catalog entry as cached by fetch_service
+  rendered page the same staff page as rendered JSON bytes, which is what
+                utils.rendered_cache stores (compression only)
+
+Redis memory is MEMORY USAGE when the server supports it (real Redis),
+otherwise the stored value length (fakeredis).
+
+    python -m benchmarks.bench_cache_values
+"""
+
+import argparse
+
+from benchmarks.common import setup_django, timed
+
+SERIALIZERS = {
+    "pickle": "django_redis.serializers.pickle.PickleSerializer",
+    "json": "django_redis.serializers.json.JSONSerializer",
+    "msgpack": "django_redis.serializers.msgpack.MSGPackSerializer",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+
+    import json
+
+    from django.conf import settings
+    from django_redis.cache import RedisCache
+    from model_bakery import baker
+    from redis.exceptions import ResponseError
+
+    from orders.models import Order
+    from orders.serializers import OrderSerializer
+    from utils.renderers import ORJSONRenderer
+    from utils.singleflight import make_entry
+
+    for order in baker.make("orders.Order", total_price="249.90", _quantity=100):
+        baker.make(
+            "orders.OrderItem",
+            order=order,
+            service_id=f"svc-{order.id % 7}",
+            service_name="Premium cleaning, 3 rooms",
+            price="24.99",
+            _quantity=10,
+        )
+    orders = Order.objects.prefetch_related("items").order_by("-ordered_at", "-id")
+    page = {
+        "next": "http://testserver/api/orders/?cursor=cD0yMDI1LTAx",
+        "previous": None,
+        "results": OrderSerializer(orders, many=True).data,
+    }
+    rendered = ORJSONRenderer().render(page)
+    payloads = {
+        "staff page": json.loads(rendered),
+        "service": make_entry(
+            {
+                "id": "svc-1",
+                "name": "Premium cleaning, 3 rooms",
+                "price": "24.99",
+                "description": "Deep clean of up to three rooms.",
+            },
+            3600,
+        ),
+    }
+
+    base = settings.CACHES["default"]
+    connection_kwargs = base["OPTIONS"].get("CONNECTION_POOL_KWARGS", {})
+    configs = [
+        ("pickle, none (before)", "django_redis.client.DefaultClient", "pickle", None),
+        ("json, none", "utils.redis_cache.CompactClient", "json", None),
+        ("msgpack, none", "utils.redis_cache.CompactClient", "msgpack", None),
+        ("msgpack + zlib", "utils.redis_cache.CompactClient", "msgpack", "zlib"),
+        (
+            "msgpack + lz4 (default)",
+            "utils.redis_cache.CompactClient",
+            "msgpack",
+            "lz4",
+        ),
+    ]
+
+    print(
+        f"\n{'':26} {'payload':14} {'bytes':>9} {'memory':>9} {'set p50':>9} {'get p50':>9}"
+    )
+    for label, client_class, serializer, algorithm in configs:
+        options = {
+            "CLIENT_CLASS": client_class,
+            "SERIALIZER": SERIALIZERS[serializer],
+            "CONNECTION_POOL_KWARGS": connection_kwargs,
+        }
+        if algorithm:
+            options["COMPRESSOR"] = "utils.redis_cache.ThresholdCompressor"
+            options["COMPRESS_ALGORITHM"] = algorithm
+        cache = RedisCache(base["LOCATION"], {"OPTIONS": options, "KEY_PREFIX": label})
+        redis = cache.client.get_client()
+
+        rows = list(payloads.items())
+        if algorithm:
+            rows.append(("rendered page", None))
+        for name, value in rows:
+            key = f"bench_{name}"
+            raw_key = cache.make_key(key)
+            if value is None:
+                # utils.rendered_cache: raw bytes through the compressor only
+                def set_():
+                    redis.set(raw_key, cache.client.compress(rendered))
+
+                def get():
+                    cache.client.decompress(redis.get(raw_key))
+
+            else:
+
+                def set_(key=key, value=value):
+                    cache.set(key, value, timeout=300)
+
+                def get(key=key):
+                    cache.get(key)
+
+            set_stats = timed(set_, args.repeat)
+            get_stats = timed(get, args.repeat)
+            stored = redis.strlen(raw_key)
+            try:
+                memory = redis.memory_usage(raw_key)
+            except ResponseError:
+                memory = stored
+            print(
+                f"{label:26} {name:14} {stored:>9} {memory:>9} "
+                f"{set_stats['p50']:>9.3f} {get_stats['p50']:>9.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
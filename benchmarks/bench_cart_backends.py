@@ -0,0 +1,70 @@
+"""
+Add-to-cart throughput: DatabaseCartBackend vs. RedisCartBackend.
+
+Each add is a POST /api/cart/ for a service that is already in the
+service cache, so the numbers are the cart write path alone (duplicate
+check, insert, cache upkeep). Point DATABASE_URL / REDIS_URL at real
+servers and unset CI_TESTING for production-like figures; the defaults
+are in-memory SQLite and fakeredis.
+
+    python -m benchmarks.bench_cart_backends [--adds 500]
+"""
+
+import argparse
+import itertools
+
+from benchmarks.common import report, setup_django, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--adds", type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.core.cache import cache
+    from django.test import override_settings
+    from model_bakery import baker
+    from rest_framework.test import APIClient
+
+    from utils.cache_keys import service_key
+    from utils.singleflight import make_entry
+
+    total = args.adds + 10  # timed() warms up 5 times per run
+    cache.set_many(
+        {
+            service_key(f"svc-{n}"): make_entry(
+                {"name": f"S{n}", "price": "9.99"}, 3600
+            )
+            for n in range(total * 2)
+        },
+        timeout=3600,
+    )
+    counter = itertools.count()
+
+    rows = []
+    for label, backend in [
+        ("database", "orders.carts.DatabaseCartBackend"),
+        ("redis", "orders.carts.RedisCartBackend"),
+    ]:
+        client = APIClient()
+        client.force_authenticate(user=baker.make("users.User", is_active=True))
+
+        def add():
+            response = client.post("/api/cart/", {"service_id": f"svc-{next(counter)}"})
+            assert response.status_code == 201, response.status_code
+
+        with override_settings(CART_BACKEND=backend):
+            client.get("/api/cart/")  # cart cached / created up front
+            stats = timed(add, repeat=args.adds)
+        rows.append((label, stats))
+
+    report(f"POST /api/cart/ ({args.adds} adds into one cart)", rows)
+    print()
+    for label, stats in rows:
+        print(f"{label:32} {1000 / stats['mean']:>10.0f} adds/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Order confirmation throughput against a local Mailgun stub, in emails
+accepted by Mailgun per second from "N confirmations queued" to done.
+"lost" counts emails whose request failed and will never be retried.
+
+  thread per email (before)   render_to_string x2 and a fresh connection
+                              per email, one thread each (the old
+                              trigger_order_confirmation_email)
+  outbox, 1 per call          dispatch_email_outbox with batching off:
+                              compiled templates, pooled session
+  outbox, batched             the default: Mailgun batch messages with
+                              recipient-variables, RECIPIENTS_PER_CALL each
+
+Also reports the rendering cost per email on its own. --latency adds a
+per-request delay to the stub to stand in for the round trip to Mailgun.
+
+    python -m benchmarks.bench_email_outbox
+    python -m benchmarks.bench_email_outbox --emails 2000 --latency 0.05
+"""
+
+import argparse
+import threading
+import time
+
+from benchmarks.common import report, setup_django, timed
+
+ORDER_DATA = {
+    "items": [
+        {"name": "Premium cleaning, 3 rooms", "quantity": 1, "price": "24.99"},
+        {"name": "Window add-on", "quantity": 1, "price": "9.50"},
+    ],
+    "total": "34.49",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--emails", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--recipients-per-call", type=int, default=100)
+    args = parser.parse_args()
+
+    setup_django()
+
+    import requests
+    from django.conf import settings
+    from django.template.loader import render_to_string
+
+    from conftest import StubServer
+    from orders.models import EmailOutbox
+    from orders.utils.email import (
+        build_order_confirmation,
+        build_order_confirmation_batch,
+        trigger_order_confirmation_email,
+    )
+    from orders.utils.outbox import build_outbox_dispatcher
+
+    stub = StubServer()
+    stub.delay = args.latency
+    stub.start()
+    settings.ANYMAIL = {**settings.ANYMAIL, "MAILGUN_API_URL": f"{stub.url}/v3"}
+    messages_url = f"{stub.url}/v3/{settings.ANYMAIL['MAILGUN_SENDER_DOMAIN']}/messages"
+    stub.routes[messages_url.removeprefix(stub.url)] = (200, {"message": "Queued"})
+    emails = [f"user{n}@example.com" for n in range(args.emails)]
+
+    def legacy_render(email):
+        # The same templates, looked up through render_to_string each time
+        items = {"items": ORDER_DATA["items"]}
+        context = {"email": email, "total": ORDER_DATA["total"]}
+        text = render_to_string(
+            "emails/order_confirmation.txt",
+            {**context, "items": render_to_string("emails/order_items.txt", items)},
+        )
+        html = render_to_string(
+            "emails/order_confirmation.html",
+            {**context, "items": render_to_string("emails/order_items.html", items)},
+        )
+        return text, html
+
+    def thread_per_email():
+        lost = []
+
+        def send(email):
+            text, html = legacy_render(email)
+            try:
+                requests.post(
+                    messages_url,
+                    auth=("api", "key"),
+                    data={"to": [email], "text": text, "html": html},
+                    timeout=10,
+                ).raise_for_status()
+            except requests.RequestException:
+                lost.append(email)  # the old code dropped these silently
+
+        threads = [threading.Thread(target=send, args=(e,)) for e in emails]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return len(emails), len(lost)
+
+    def outbox(recipients_per_call):
+        def run():
+            for email in emails:
+                trigger_order_confirmation_email(email, ORDER_DATA)
+            dispatcher = build_outbox_dispatcher(
+                WORKERS=args.workers,
+                RECIPIENTS_PER_CALL=recipients_per_call,
+                BACKOFF_FACTOR=0,
+            )
+            try:
+                dispatcher.drain()
+            finally:
+                dispatcher.close()
+            counts = dispatcher.counts
+            return counts["api_calls"], len(emails) - counts["sent"]
+
+        return run
+
+    print(
+        f"\n{args.emails} confirmations, stub latency {args.latency * 1000:.0f} ms, "
+        f"{args.workers} workers"
+    )
+    print(f"{'':28} {'seconds':>9} {'emails/s':>10} {'API calls':>10} {'lost':>6}")
+    runs = [
+        ("thread per email (before)", thread_per_email),
+        ("outbox, 1 per call", outbox(1)),
+        (
+            f"outbox, batched ({args.recipients_per_call})",
+            outbox(args.recipients_per_call),
+        ),
+    ]
+    for label, run in runs:
+        EmailOutbox.objects.all().delete()
+        stub.requests.clear()
+        started = time.perf_counter()
+        calls, lost = run()
+        elapsed = time.perf_counter() - started
+        rate = (args.emails - lost) / elapsed
+        print(f"{label:28} {elapsed:>9.2f} {rate:>10.0f} {calls:>10} {lost:>6}")
+    stub.stop()
+
+    batch = [(email, ORDER_DATA) for email in emails[: args.recipients_per_call]]
+    report(
+        "Rendering one confirmation (txt + html)",
+        [
+            (
+                "render_to_string (before)",
+                timed(lambda: legacy_render(emails[0]), 500),
+            ),
+            (
+                "compiled templates",
+                timed(lambda: build_order_confirmation(emails[0], ORDER_DATA), 500),
+            ),
+            (
+                f"batch of {len(batch)}, per email",
+                {
+                    name: value / len(batch)
+                    for name, value in timed(
+                        lambda: build_order_confirmation_batch(batch), 50
+                    ).items()
+                },
+            ),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
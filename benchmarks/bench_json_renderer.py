@@ -0,0 +1,74 @@
+"""
+Rendering order payloads: DRF's JSONRenderer vs. utils.renderers.ORJSONRenderer,
+and the matching parsers on a bulk add-to-cart body.
+
+The payloads are real OrderSerializer output (a cursor page of orders
+with Decimal prices and timestamps) so the numbers include the
+Decimal-as-string and ISO datetime paths.
+
+    python -m benchmarks.bench_json_renderer
+"""
+
+import argparse
+import io
+
+from benchmarks.common import report, setup_django, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from model_bakery import baker
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from orders.models import Order
+    from orders.serializers import OrderSerializer
+    from utils.parsers import ORJSONParser
+    from utils.renderers import ORJSONRenderer
+
+    user = baker.make("users.User")
+    for order in baker.make(
+        "orders.Order", user=user, total_price="249.90", _quantity=100
+    ):
+        baker.make("orders.OrderItem", order=order, price="24.99", _quantity=10)
+    orders = Order.objects.prefetch_related("items").order_by("-ordered_at", "-id")
+
+    for page_size in (20, 100):
+        data = {
+            "next": "http://testserver/api/orders/?cursor=cD0yMDI1",
+            "previous": None,
+            "results": OrderSerializer(orders[:page_size], many=True).data,
+        }
+        stock, fast = JSONRenderer(), ORJSONRenderer()
+        assert stock.render(data) == fast.render(data)
+        report(
+            f"Render {page_size} orders x 10 items ({len(stock.render(data))} bytes)",
+            [
+                ("JSONRenderer", timed(lambda: stock.render(data), args.repeat)),
+                ("ORJSONRenderer", timed(lambda: fast.render(data), args.repeat)),
+            ],
+        )
+
+    body = JSONRenderer().render({"service_ids": [f"svc-{n}" for n in range(50)]})
+    report(
+        "Parse a 50-item bulk add body",
+        [
+            (
+                "JSONParser",
+                timed(lambda: JSONParser().parse(io.BytesIO(body)), args.repeat),
+            ),
+            (
+                "ORJSONParser",
+                timed(lambda: ORJSONParser().parse(io.BytesIO(body)), args.repeat),
+            ),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
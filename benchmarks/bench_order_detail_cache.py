@@ -0,0 +1,84 @@
+"""
+Order detail latency: owner-checked cache hit vs. cache miss.
+
+A hit is a raw Redis GET of the rendered body plus an owner/HMAC check
+in memory, with no SQL. The second table compares that read against the
+previous entry format: a pickled serializer payload rendered on each hit.
+
+    python -m benchmarks.bench_order_detail_cache
+"""
+
+import argparse
+import json
+
+from benchmarks.common import report, setup_django, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from model_bakery import baker
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.test import APIClient
+
+    from utils.cache_keys import order_detail_key
+    from utils.rendered_cache import get_rendered
+
+    owner = baker.make("users.User", is_active=True)
+    staff = baker.make("users.User", is_active=True, is_staff=True)
+    order = baker.make("orders.Order", user=owner, status="confirmed")
+    baker.make("orders.OrderItem", order=order, price="10.00", _quantity=args.items)
+    url = f"/api/orders/{order.id}/"
+    key = order_detail_key(order.id)
+
+    owner_client, staff_client = APIClient(), APIClient()
+    owner_client.force_authenticate(user=owner)
+    staff_client.force_authenticate(user=staff)
+
+    def miss():
+        cache.delete(key)
+        owner_client.get(url)
+
+    owner_client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        owner_client.get(url)
+
+    report(
+        f"GET {url} ({args.items} items)",
+        [
+            ("hit, owner", timed(lambda: owner_client.get(url), args.repeat)),
+            ("hit, staff", timed(lambda: staff_client.get(url), args.repeat)),
+            ("miss (DB + serialize)", timed(miss, args.repeat // 5)),
+        ],
+    )
+    data = get_rendered(key)[1]
+    cache.set("bench_pickled", json.loads(data))
+    report(
+        "Cache read alone",
+        [
+            (
+                "rendered bytes + signature",
+                timed(lambda: get_rendered(key), args.repeat),
+            ),
+            (
+                "pickled dict + JSONRenderer",
+                timed(
+                    lambda: JSONRenderer().render(cache.get("bench_pickled")),
+                    args.repeat,
+                ),
+            ),
+        ],
+    )
+    print(f"\nSQL queries on a hit: {len(queries.captured_queries)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Order list latency vs. depth into a 100k-order history.
+
+Compares the cursor-paginated /api/orders/ (cache disabled, so every
+request hits the DB) against OFFSET pagination at the same depth and
+against serializing the whole history, which is what the endpoint did
+before it was paginated.
+
+    python -m benchmarks.bench_order_pagination [--orders 100000]
+"""
+
+import argparse
+from datetime import timedelta
+
+from benchmarks.common import report, setup_django, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.core.cache import cache
+    from django.utils import timezone
+    from model_bakery import baker
+    from rest_framework.pagination import Cursor
+    from rest_framework.test import APIClient
+
+    from orders.models import Order
+    from orders.pagination import OrderCursorPagination
+    from orders.serializers import OrderSerializer
+
+    user = baker.make("users.User", is_active=True)
+    orders = Order.objects.bulk_create(
+        Order(user=user, status="confirmed") for _ in range(args.orders)
+    )
+    base = timezone.now()
+    for i, order in enumerate(orders):
+        order.ordered_at = base - timedelta(seconds=i)
+    Order.objects.bulk_update(orders, ["ordered_at"], batch_size=2000)
+
+    client = APIClient()
+    client.force_authenticate(user=user)
+    paginator = OrderCursorPagination()
+    paginator.base_url = "http://testserver/api/orders/"
+    queryset = Order.objects.filter(user=user).order_by("-ordered_at", "-id")
+
+    depths = [0, 1_000, 10_000, args.orders // 2, args.orders - 20]
+    cursor_rows, offset_rows = [], []
+    for depth in depths:
+        url = "/api/orders/"
+        if depth:
+            position = str(orders[depth - 1].ordered_at)
+            url = paginator.encode_cursor(
+                Cursor(offset=0, reverse=False, position=position)
+            )
+
+        def cursor_page(url=url):
+            cache.clear()
+            response = client.get(url)
+            assert response.status_code == 200, response.status_code
+
+        def offset_page(depth=depth):
+            OrderSerializer(queryset[depth : depth + 20], many=True).data
+
+        cursor_rows.append(
+            (f"cursor, depth {depth:>7}", timed(cursor_page, args.repeat))
+        )
+        offset_rows.append(
+            (f"offset, depth {depth:>7}", timed(offset_page, args.repeat))
+        )
+
+    report(f"Cursor pagination over {args.orders} orders (full request)", cursor_rows)
+    report("OFFSET pagination at the same depths (ORM + serializer only)", offset_rows)
+
+    whole = timed(lambda: OrderSerializer(queryset, many=True).data, repeat=1, warmup=0)
+    report("Unpaginated history (previous behaviour)", [("all orders", whole)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Login bursts vs. order traffic: Argon2 in the request thread vs. the
+users.hashers pool.
+
+`--logins` threads check a password (Django's default Argon2 costs) in a
+loop, as a burst of LoginThrottleView / jwt/create requests would, while
+the main thread times GET /api/orders/. Rows: no burst, the burst
+hashing inline (PASSWORD_HASHING["WORKERS"] = 0), and the burst going
+through a pool of `--workers` niced processes. Logins/s are divided by
+the machine's CPU count.
+
+    python -m benchmarks.bench_password_hashing [--logins 8] [--workers 1]
+"""
+
+import argparse
+import os
+import threading
+import time
+
+from benchmarks.common import report, setup_django, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.conf import settings
+    from django.contrib.auth.hashers import check_password, make_password
+    from model_bakery import baker
+    from rest_framework.test import APIClient
+
+    from users.hashers import reset_hashing_pool
+
+    user = baker.make("users.User", is_active=True)
+    baker.make("orders.Order", user=user, _quantity=10)
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    def orders():
+        assert client.get("/api/orders/").status_code == 200
+
+    rows, rates = [], []
+    for label, workers, burst in [
+        ("no burst", 0, False),
+        ("burst, inline", 0, True),
+        (f"burst, pool of {args.workers}", args.workers, True),
+    ]:
+        settings.PASSWORD_HASHING = {**settings.PASSWORD_HASHING, "WORKERS": workers}
+        encoded = make_password("s3cret-pass")
+        stop = threading.Event()
+        logins = []
+
+        def login():
+            count = 0
+            while not stop.is_set():
+                assert check_password("s3cret-pass", encoded)
+                count += 1
+            logins.append(count)
+
+        threads = [
+            threading.Thread(target=login) for _ in range(args.logins if burst else 0)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        rows.append((label, timed(orders, repeat=args.requests)))
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        if burst:
+            rates.append((label, sum(logins) / elapsed / os.cpu_count()))
+        reset_hashing_pool()
+
+    report(f"GET /api/orders/ during {args.logins} concurrent logins", rows)
+    print()
+    for label, rate in rates:
+        print(f"{label:32} {rate:>10.1f} logins/s per core")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Per-request throttle cost: DRF's UserRateThrottle vs. utils.throttling.
+
+DRF keeps a list of every request timestamp in the window, so its cost
+and entry size grow with how busy the user already is. Each row times
+allow_request() for a user who has made `--history` requests today at
+the "user" rate, and reports the size of the stored entry.
+
+    python -m benchmarks.bench_throttle [--history 0 1000 5000 9000]
+"""
+
+import argparse
+
+from benchmarks.common import report, setup_django, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", type=int, nargs="+", default=[0, 1000, 5000, 9000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.core.cache import cache
+    from django_redis import get_redis_connection
+    from model_bakery import baker
+    from rest_framework import throttling
+    from rest_framework.test import APIRequestFactory
+    from rest_framework.views import APIView
+
+    from utils import throttling as token_bucket
+
+    rate = {"user": "1000000/day"}  # nobody gets throttled while timing
+    view = APIView()
+    rows, sizes = [], []
+    for history in args.history:
+        for label, cls in [
+            ("drf", throttling.UserRateThrottle),
+            ("gcra", token_bucket.UserRateThrottle),
+        ]:
+            throttle = cls()
+            throttle.THROTTLE_RATES = rate
+            throttle.num_requests, throttle.duration = throttle.parse_rate(rate["user"])
+            request = APIRequestFactory().get("/")
+            request.user = baker.make("users.User")
+            for _ in range(history):
+                throttle.allow_request(request, view)
+
+            rows.append(
+                (
+                    f"{label}, {history} earlier",
+                    timed(lambda: throttle.allow_request(request, view), args.repeat),
+                )
+            )
+            size = get_redis_connection("default").strlen(cache.make_key(throttle.key))
+            sizes.append((f"{label}, {history} earlier", size))
+
+    report("UserRateThrottle.allow_request()", rows)
+    print()
+    for label, size in sizes:
+        print(f"{label:32} {size:>10} bytes stored")
+
+
+if __name__ == "__main__":
+    main()
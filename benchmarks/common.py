@@ -0,0 +1,60 @@
+"""
+Shared setup for the benchmark scripts in this directory.
+
+Benchmarks run against the test settings (CI_TESTING=True): in-memory
+SQLite and fakeredis unless DATABASE_URL / REDIS_URL point elsewhere
+and CI_TESTING is unset. Run them from the repo root, e.g.
+
+    python -m benchmarks.bench_order_pagination
+"""
+
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault("CI_TESTING", "True")
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+    import django
+
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, serialize=False)
+
+
+def timed(fn, repeat=50, warmup=5):
+    """Run `fn` `repeat` times and return latency percentiles in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        "mean": statistics.fmean(samples),
+    }
+
+
+def report(title, rows):
+    """Print rows of (label, stats-dict) as an aligned table."""
+    print(f"\n{title}")
+    print(f"{'':32} {'p50 ms':>10} {'p99 ms':>10} {'mean ms':>10}")
+    for label, stats in rows:
+        print(
+            f"{label:32} {stats['p50']:>10.3f} {stats['p99']:>10.3f} {stats['mean']:>10.3f}"
+        )
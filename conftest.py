@@ -1,8 +1,26 @@
 # Sets up fixtures shared across all test modules
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
 import pytest
+from django.core.cache import cache
 from model_bakery import baker
 from rest_framework.test import APIClient
 
+from utils.tiered_cache import clear_local_caches
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # fakeredis and the in-process L1 caches keep state for the whole
+    # session; start every test empty
+    cache.clear()
+    clear_local_caches()
+    yield
+
 
 @pytest.fixture
 def user(db):
@@ -29,3 +47,77 @@ def auth_client(user, client):
 def admin_client(admin_user, client):
     client.force_authenticate(user=admin_user)
     return client
+
+
+class StubServer:
+    """
+    Local HTTP server standing in for external services (Express catalog,
+    Mailgun). Routes map a path to a (status, body) tuple, a list of tuples
+    served in order, or a callable taking the recorded request.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.delay = 0
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                request = {
+                    "method": self.command,
+                    "path": urlsplit(self.path).path,
+                    "query": urlsplit(self.path).query,
+                    "headers": dict(self.headers),
+                    "body": self.rfile.read(length) if length else b"",
+                }
+                stub.requests.append(request)
+                if stub.delay:
+                    time.sleep(stub.delay)
+
+                status, body, headers = stub.resolve(request)
+                payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = _respond
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def resolve(self, request):
+        route = self.routes.get(request["path"], (404, {"detail": "Not found"}))
+        if callable(route):
+            route = route(request)
+        elif isinstance(route, list):
+            route = route.pop(0) if len(route) > 1 else route[0]
+        status, body, *rest = route
+        return status, body, rest[0] if rest else {}
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    server.start()
+    yield server
+    server.stop()
@@ -153,7 +153,28 @@ SITE_ID = 1
 # -------------------------------------------------------------------
 # Database & Caching
 # -------------------------------------------------------------------
+# How cache values are stored (utils/redis_cache.py): serializer, plus
+# compression above a size threshold. Each serializer gets its own key
+# prefix, so switching never reads back values written by another one.
+CACHE_SERIALIZERS = {
+    "pickle": "django_redis.serializers.pickle.PickleSerializer",
+    "json": "django_redis.serializers.json.JSONSerializer",
+    "msgpack": "django_redis.serializers.msgpack.MSGPackSerializer",
+}
+CACHE_SERIALIZER = config("CACHE_SERIALIZER", default="msgpack")
+CACHE_VALUE_OPTIONS = {
+    "CLIENT_CLASS": "utils.redis_cache.CompactClient",
+    "SERIALIZER": CACHE_SERIALIZERS[CACHE_SERIALIZER],
+    "COMPRESSOR": "utils.redis_cache.ThresholdCompressor",
+    "COMPRESS_ALGORITHM": config("CACHE_COMPRESS_ALGORITHM", default="lz4"),
+    "COMPRESS_MIN_LENGTH": config("CACHE_COMPRESS_MIN_LENGTH", default=1024, cast=int),
+}
+CACHE_KEY_PREFIX = "" if CACHE_SERIALIZER == "pickle" else CACHE_SERIALIZER
+
 if IS_TESTING:
+    from fakeredis import FakeConnection
+    from fakeredis.aioredis import FakeConnection as FakeAsyncConnection
+
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
@@ -164,11 +185,17 @@ if IS_TESTING:
     CACHES = {
         "default": {
             "BACKEND": "django_redis.cache.RedisCache",
-            # Changed LOCATION to a valid redis:// URL, but still use FakeStrictRedis
+            # Changed LOCATION to a valid redis:// URL; connections are served by fakeredis
             "LOCATION": "redis://localhost:6379/1",
+            "KEY_PREFIX": CACHE_KEY_PREFIX,
             "OPTIONS": {
-                "CLIENT_CLASS": "django_redis.client.DefaultClient",
-                "CONNECTION_CLASS": "fakeredis.FakeStrictRedis",  # Ensure fakeredis is used
+                **CACHE_VALUE_OPTIONS,
+                # Ensure fakeredis is used (locks, counters and TTLs behave like Redis)
+                "CONNECTION_POOL_KWARGS": {"connection_class": FakeConnection},
+                # utils.async_redis: the same fake server, for the async views
+                "ASYNC_CONNECTION_POOL_KWARGS": {
+                    "connection_class": FakeAsyncConnection
+                },
                 "IGNORE_EXCEPTIONS": True,
             },
         }
@@ -187,8 +214,9 @@ else:
         "default": {
             "BACKEND": "django_redis.cache.RedisCache",
             "LOCATION": config("REDIS_URL", default="redis://localhost:6379/1"),
+            "KEY_PREFIX": CACHE_KEY_PREFIX,
             "OPTIONS": {
-                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+                **CACHE_VALUE_OPTIONS,
                 "IGNORE_EXCEPTIONS": True,
                 "PASSWORD": config("REDIS_PASSWORD", default=""),  # fallback: no auth
             },
@@ -209,7 +237,7 @@ AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.NumericPasswordValidator"},
 ]
 PASSWORD_HASHERS = [
-    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "users.hashers.PooledArgon2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
     "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
@@ -226,6 +254,9 @@ CORS_ORIGIN_ALLOW_ALL = False
 CORS_ALLOW_CREDENTIALS = True
 CORS_EXPOSE_HEADERS = [
     "Content-Type",
+    "ETag",
+    "Idempotent-Replayed",
+    "Retry-After",
     "authorization",
     "X-CSRFToken",
     "Access-Control-Allow-Origin: *",
@@ -236,6 +267,8 @@ CORS_ALLOW_HEADERS = default_headers + (
     "authorization",
     "content-type",
     "dnt",
+    "idempotency-key",
+    "if-none-match",
     "origin",
     "user-agent",
     "x-csrftoken",
@@ -257,23 +290,29 @@ else:
 # -------------------------------------------------------------------
 # Django REST Framework & JWT
 # -------------------------------------------------------------------
-DEFAULT_RENDERER_CLASSES = ("rest_framework.renderers.JSONRenderer",)
+# orjson-backed, byte-compatible drop-ins for DRF's JSONRenderer/JSONParser
+DEFAULT_RENDERER_CLASSES = ("utils.renderers.ORJSONRenderer",)
 if DEBUG:
     DEFAULT_RENDERER_CLASSES += ("rest_framework.renderers.BrowsableAPIRenderer",)
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
         "rest_framework.authentication.TokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.AllowAny"],
     "DEFAULT_RENDERER_CLASSES": DEFAULT_RENDERER_CLASSES,
+    "DEFAULT_PARSER_CLASSES": [
+        "utils.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "utils.throttling.AnonRateThrottle",
+        "utils.throttling.UserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "1000/min",
@@ -412,6 +451,90 @@ else:
     SERVER_EMAIL = SERVER_EMAIL  # Use dummy from top IS_TESTING block
     EXPRESS_SERVICE_URL = EXPRESS_SERVICE_URL  # Use dummy from top IS_TESTING block
 
+# Outbound client for the Express service catalog (timeouts in seconds)
+CATALOG_CLIENT = {
+    "CONNECT_TIMEOUT": config("CATALOG_CONNECT_TIMEOUT", default=2.0, cast=float),
+    "READ_TIMEOUT": config("CATALOG_READ_TIMEOUT", default=5.0, cast=float),
+    "MAX_RETRIES": config("CATALOG_MAX_RETRIES", default=2, cast=int),
+    "BACKOFF_FACTOR": 0.2,
+    "POOL_MAXSIZE": config("CATALOG_POOL_MAXSIZE", default=10, cast=int),
+    # per event loop, for AsyncCatalogClient (orders.async_views)
+    "ASYNC_MAX_CONNECTIONS": config(
+        "CATALOG_ASYNC_MAX_CONNECTIONS", default=100, cast=int
+    ),
+    "BREAKER_FAILURE_THRESHOLD": 5,
+    "BREAKER_RESET_TIMEOUT": 30,
+}
+
+# In-process (L1) cache in front of Redis for catalog service entries
+SERVICE_LOCAL_CACHE = {
+    "MAX_ENTRIES": config("SERVICE_LOCAL_CACHE_MAX_ENTRIES", default=2048, cast=int),
+    "MAX_BYTES": config("SERVICE_LOCAL_CACHE_MAX_BYTES", default=4 * 1024 * 1024, cast=int),
+    "TTL": config("SERVICE_LOCAL_CACHE_TTL", default=30, cast=int),
+}
+
+# users.authentication.CachedJWTAuthentication: how long a user's auth
+# state (active/staff flags, email) is reused without a query, in Redis
+# and in each process. Saving or deleting the user drops it everywhere.
+USER_AUTH_CACHE = {
+    "TTL": config("USER_AUTH_CACHE_TTL", default=300, cast=int),
+    "LOCAL_TTL": config("USER_AUTH_LOCAL_TTL", default=30, cast=int),
+    "MAX_ENTRIES": config("USER_AUTH_LOCAL_MAX_ENTRIES", default=10000, cast=int),
+}
+
+# users.hashers.PooledArgon2PasswordHasher. Password hashing and checks
+# run in a pool of WORKERS processes per web worker (0: in the request
+# thread), niced by NICE so a login burst yields the CPU to other
+# requests. Stored hashes with other Argon2 parameters are rehashed on
+# the user's next login. The defaults are Django's.
+PASSWORD_HASHING = {
+    "WORKERS": config(
+        "PASSWORD_HASHING_WORKERS", default=0 if IS_TESTING else 1, cast=int
+    ),
+    "NICE": config("PASSWORD_HASHING_NICE", default=10, cast=int),
+    "ARGON2_TIME_COST": config("ARGON2_TIME_COST", default=2, cast=int),
+    "ARGON2_MEMORY_COST": config("ARGON2_MEMORY_COST", default=102400, cast=int),
+    "ARGON2_PARALLELISM": config("ARGON2_PARALLELISM", default=8, cast=int),
+}
+
+# Where carts live: "orders.carts.DatabaseCartBackend" (Cart/CartItem rows)
+# or "orders.carts.RedisCartBackend" (a Redis hash per user, expiring
+# CART_TTL seconds after the last change; persisted only at checkout)
+CART_BACKEND = config("CART_BACKEND", default="orders.carts.DatabaseCartBackend")
+CART_TTL = config("CART_TTL", default=7 * 24 * 3600, cast=int)
+
+# Email outbox sender (manage.py dispatch_email_outbox). BATCH_SIZE caps
+# the messages in flight; order confirmations go out as Mailgun batch
+# messages of up to RECIPIENTS_PER_CALL (max 1000) recipients each.
+# Failed sends back off exponentially from BACKOFF_FACTOR up to
+# BACKOFF_MAX seconds and give up after MAX_ATTEMPTS. A claimed message
+# is re-sent by another dispatcher if not done in LEASE.
+EMAIL_OUTBOX = {
+    "WORKERS": config("EMAIL_OUTBOX_WORKERS", default=4, cast=int),
+    "BATCH_SIZE": config("EMAIL_OUTBOX_BATCH_SIZE", default=400, cast=int),
+    "RECIPIENTS_PER_CALL": config(
+        "EMAIL_OUTBOX_RECIPIENTS_PER_CALL", default=100, cast=int
+    ),
+    "MAX_ATTEMPTS": config("EMAIL_OUTBOX_MAX_ATTEMPTS", default=8, cast=int),
+    "BACKOFF_FACTOR": 30,
+    "BACKOFF_MAX": 3600,
+    "LEASE": 300,
+    "CONNECT_TIMEOUT": 2.0,
+    "READ_TIMEOUT": 10.0,
+}
+
+# Serve the cart views and the order list/detail through their async
+# versions (orders.async_views). Only worth it under an ASGI server:
+#   gunicorn core.asgi:application -k uvicorn_worker.UvicornWorker
+ASYNC_VIEWS = config("ASYNC_VIEWS", default=False, cast=bool)
+
+# Idempotency-Key (utils.idempotency): how long a response is replayed,
+# how long a running request holds its key, and how long a duplicate
+# waits for it before getting 409
+IDEMPOTENCY_TTL = config("IDEMPOTENCY_TTL", default=24 * 3600, cast=int)
+IDEMPOTENCY_LOCK_TIMEOUT = config("IDEMPOTENCY_LOCK_TIMEOUT", default=30, cast=int)
+IDEMPOTENCY_WAIT_TIMEOUT = config("IDEMPOTENCY_WAIT_TIMEOUT", default=5, cast=float)
+
 
 # -------------------------------------------------------------------
 # Security
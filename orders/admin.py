@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Order, Cart, CartItem, OrderItem
+from .models import Order, Cart, CartItem, OrderItem, EmailOutbox
 
 
 @admin.register(Order)
@@ -29,3 +29,11 @@ class CartItemAdmin(admin.ModelAdmin):
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ("id", "order", "service_name", "price")
     search_fields = ("order__user__username", "service_name")
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "to_email", "status", "attempts", "next_attempt_at")
+    list_filter = ("status", "kind")
+    search_fields = ("to_email", "order__id")
+    readonly_fields = ("created_at", "sent_at")
@@ -0,0 +1,155 @@
+"""
+asyncio versions of the cart views and the order reads, served when
+ASYNC_VIEWS is on and the app runs under an ASGI server (see RUNNING.md).
+
+A request that waits on the catalog, Redis or the database yields the
+event loop instead of holding a worker thread: cache reads go through
+utils.async_redis, catalog lookups through AsyncCatalogClient, and
+queries through Django's async ORM. Code that needs a transaction, a
+Redis WATCH or the idempotency lock (checkout, pay, status updates, cache
+rebuilds) still runs synchronously in a thread via sync_to_async, exactly
+as the WSGI views do.
+"""
+
+from adrf.views import APIView
+from adrf.viewsets import ViewSet
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .carts import CART_CACHE_TTL, get_cart_backend
+from .models import Order
+from .views import OrderViewSet, afetch_service
+from utils.cache_keys import (
+    cart_key,
+    cart_version_key,
+    order_detail_key,
+    orders_generation_key,
+    orders_list_key,
+)
+from utils.cache_versions import aget_generation
+from utils.rendered_cache import (
+    aget_rendered,
+    aset_rendered,
+    cacheable,
+    get_or_render,
+    render,
+    respond,
+)
+
+
+class AsyncCartView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        backend = get_cart_backend()
+        if not cacheable(request):
+            return Response(await backend.aget(request.user))
+
+        user_id = request.user.id
+        entry = await aget_rendered(cart_key(user_id))
+        if entry is None:
+            # The rebuild is WATCHed against concurrent writes; keep it sync
+            entry = await sync_to_async(get_or_render)(
+                cart_key(user_id),
+                cart_version_key(user_id),
+                lambda: backend.get(request.user),
+                CART_CACHE_TTL,
+            )
+        return respond(entry, request)
+
+    async def post(self, request):
+        backend = get_cart_backend()
+        service_id = request.data.get("service_id")
+
+        if not service_id:
+            return Response(
+                {"detail": "Missing service_id"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if await backend.acontains(request.user, [service_id]):
+            return Response(
+                {"detail": "Service already in cart."}, status=status.HTTP_409_CONFLICT
+            )
+
+        service = await afetch_service(service_id, client_id=request.user.id)
+        added = await backend.aadd(request.user, {service_id: service})
+        if not added:
+            return Response(
+                {"detail": "Service already in cart."}, status=status.HTTP_409_CONFLICT
+            )
+        return Response(added[0], status=status.HTTP_201_CREATED)
+
+    async def delete(self, request):
+        if await get_cart_backend().aclear(request.user):
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response({"detail": "Cart not found."}, status=status.HTTP_404_NOT_FOUND)
+
+
+class AsyncCartItemDeleteView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    async def delete(self, request, service_id):
+        removed = await get_cart_backend().aremove(request.user, service_id)
+        if removed is None:
+            return Response(
+                {"detail": "Cart not found."}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        if not removed:
+            return Response(
+                {"detail": "Item not in cart."}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class AsyncOrderViewSet(ViewSet, OrderViewSet):
+    """
+    OrderViewSet with async list/retrieve. The remaining actions are
+    OrderViewSet's own, run in a thread by adrf's dispatch.
+    """
+
+    async def list(self, request, *args, **kwargs):
+        if not cacheable(request):
+            return await sync_to_async(super().list)(request, *args, **kwargs)
+
+        scope = None if request.user.is_staff else request.user.id
+        key = orders_list_key(
+            scope,
+            await aget_generation(orders_generation_key(scope)),
+            request.query_params.get(self.paginator.cursor_query_param),
+            self.paginator.get_page_size(request),
+        )
+        entry = await aget_rendered(key) or await sync_to_async(self.render_page)(key)
+        return respond(entry, request)
+
+    async def retrieve(self, request, *args, **kwargs):
+        if not cacheable(request):
+            return await sync_to_async(super().retrieve)(request, *args, **kwargs)
+
+        key = order_detail_key(kwargs.get("pk"))
+        entry = await aget_rendered(key)
+        if entry and (
+            request.user.is_staff or entry[0].get("owner") == request.user.id
+        ):
+            return respond(entry, request)
+
+        order = await self.aget_object()
+        entry = render(key, self.get_serializer(order).data, owner=order.user_id)
+        await aset_rendered(key, entry, timeout=300)
+        return respond(entry, request)
+
+    async def aget_object(self):
+        """get_object() on the async ORM."""
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            # items are prefetched by get_queryset, so serializing is query-free
+            order = await queryset.aget(pk=self.kwargs["pk"])
+        except (Order.DoesNotExist, ValueError, TypeError, DjangoValidationError):
+            raise Http404("No Order matches the given query.")
+        self.check_object_permissions(self.request, order)
+        return order
@@ -0,0 +1,390 @@
+"""
+Cart storage backends, selected by settings.CART_BACKEND.
+
+Both backends hand the views the same CartSerializer-shaped payloads, so
+CartView, CartBulkView, CartItemDeleteView and checkout don't care where
+the cart lives:
+
+- DatabaseCartBackend: Cart/CartItem rows.
+- RedisCartBackend: one Redis hash per user, refreshed to CART_TTL on
+  every write. Nothing reaches Postgres until checkout turns the items
+  into OrderItem rows.
+
+Either way the rendered cart that CartView.get serves is patched in place
+on every write (write-through) rather than dropped.
+"""
+
+import json
+from contextlib import asynccontextmanager, contextmanager
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum, Window
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from utils.async_redis import get_async_redis
+from utils.cache_keys import cart_items_key, cart_key, cart_version_key
+from utils.rendered_cache import patch_rendered
+
+from .models import Cart, CartItem
+from .serializers import CartItemSerializer, CartSerializer
+
+CART_CACHE_TTL = 300
+
+
+class CartUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Cart storage is temporarily unavailable."
+    default_code = "cart_unavailable"
+
+
+def get_cart_backend():
+    return import_string(settings.CART_BACKEND)()
+
+
+class BaseCartBackend:
+    """
+    get(user)                 -> CartSerializer-shaped dict
+    contains(user, ids)       -> the subset of ids already in the cart
+    add(user, services)       -> serialized items actually added, from a
+                                 {service_id: service} mapping; duplicates
+                                 (including racing ones) are skipped
+    remove(user, service_id)  -> True, False if the item isn't in the
+                                 cart, None if there is no cart
+    clear(user)               -> False if there is no cart
+    checkout(user)            -> context manager yielding (items, total) with
+                                 items as [{service_id, service_name, price}];
+                                 must be entered inside the checkout
+                                 transaction, and drops exactly those items
+                                 when the block completes
+
+    aget/acontains/aadd/aremove/aclear are the same for async views
+    (orders.async_views). By default they run the sync method in Django's
+    thread-sensitive executor, which keeps ORM and transaction semantics;
+    backends override the ones they can do natively.
+    """
+
+    def get(self, user):
+        raise NotImplementedError
+
+    def contains(self, user, service_ids):
+        raise NotImplementedError
+
+    def add(self, user, services):
+        raise NotImplementedError
+
+    def remove(self, user, service_id):
+        raise NotImplementedError
+
+    def clear(self, user):
+        raise NotImplementedError
+
+    def checkout(self, user):
+        raise NotImplementedError
+
+    async def aget(self, user):
+        return await sync_to_async(self.get)(user)
+
+    async def acontains(self, user, service_ids):
+        return await sync_to_async(self.contains)(user, service_ids)
+
+    async def aadd(self, user, services):
+        return await sync_to_async(self.add)(user, services)
+
+    async def aremove(self, user, service_id):
+        return await sync_to_async(self.remove)(user, service_id)
+
+    async def aclear(self, user):
+        return await sync_to_async(self.clear)(user)
+
+    def _update_cache(self, user_id, added=(), removed=()):
+        # Write-through: patch the rendered cart that CartView.get serves
+        # instead of dropping it, so the next GET is still a hit
+        def patch(cart):
+            present = {item["service_id"] for item in cart["items"]}
+            cart["items"] = [
+                item
+                for item in cart["items"]
+                if removed is not None and item["service_id"] not in removed
+            ] + [item for item in added if item["service_id"] not in present]
+            return cart
+
+        patch_rendered(
+            cart_key(user_id), cart_version_key(user_id), patch, CART_CACHE_TTL
+        )
+
+
+class DatabaseCartBackend(BaseCartBackend):
+    def get(self, user):
+        cart, _ = Cart.objects.get_or_create(user=user)
+        return CartSerializer(cart).data
+
+    def contains(self, user, service_ids):
+        return set(
+            CartItem.objects.filter(
+                cart__user=user, service_id__in=service_ids
+            ).values_list("service_id", flat=True)
+        )
+
+    async def acontains(self, user, service_ids):
+        return {
+            sid
+            async for sid in CartItem.objects.filter(
+                cart__user=user, service_id__in=service_ids
+            ).values_list("service_id", flat=True)
+        }
+
+    def add(self, user, services):
+        with transaction.atomic():
+            # The cart row lock serialises adds to this cart, so what is
+            # already in it can't change between the read and the insert
+            cart, _ = Cart.objects.select_for_update().get_or_create(user=user)
+            present = set(
+                cart.items.filter(service_id__in=list(services)).values_list(
+                    "service_id", flat=True
+                )
+            )
+            new = [sid for sid in services if sid not in present]
+            # unique (cart, service_id) still backs this up on databases
+            # without row locks
+            CartItem.objects.bulk_create(
+                [
+                    CartItem(
+                        cart=cart,
+                        service_id=sid,
+                        service_name=services[sid].get("name"),
+                        price=services[sid].get("price"),
+                    )
+                    for sid in new
+                ],
+                ignore_conflicts=True,
+            )
+            added = CartItemSerializer(
+                cart.items.filter(service_id__in=new), many=True
+            ).data
+        self._update_cache(user.id, added=added)
+        return added
+
+    def remove(self, user, service_id):
+        cart = Cart.objects.filter(user=user).first()
+        if not cart:
+            return None
+        deleted, _ = cart.items.filter(service_id=service_id).delete()
+        if not deleted:
+            return False
+        self._update_cache(user.id, removed=[service_id])
+        return True
+
+    def clear(self, user):
+        cart = Cart.objects.filter(user=user).first()
+        if not cart:
+            return False
+        cart.items.all().delete()
+        self._update_cache(user.id, removed=None)
+        return True
+
+    @contextmanager
+    def checkout(self, user):
+        # The cart row lock serializes checkouts of the same cart: a second
+        # one waits here, then finds the items already gone
+        cart = Cart.objects.select_for_update().filter(user=user).first()
+        if cart is None:
+            yield [], Decimal("0")
+            return
+
+        # One query for the items and their total (Postgres refuses
+        # FOR UPDATE next to a window function, hence the separate lock)
+        items = list(
+            cart.items.annotate(total=Window(Sum("price")))
+            .order_by("id")
+            .values("id", "service_id", "service_name", "price", "total")
+        )
+        yield items, items[0]["total"] if items else Decimal("0")
+
+        if items:
+            # By id: items added while we were checking out stay in the cart
+            CartItem.objects.filter(id__in=[item["id"] for item in items]).delete()
+            removed = [item["service_id"] for item in items]
+            transaction.on_commit(lambda: self._update_cache(user.id, removed=removed))
+
+
+class RedisCartBackend(BaseCartBackend):
+    """
+    Layout of cart_items_user_<id>:
+
+        created_at   ISO timestamp of the first add
+        next_id      counter handing out item ids
+        s:<sid>      JSON CartItemSerializer payload of one item
+    """
+
+    ITEM_PREFIX = "s:"
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl or settings.CART_TTL
+
+    @contextmanager
+    def _redis(self):
+        try:
+            yield get_redis_connection("default")
+        except RedisError as exc:
+            raise CartUnavailable() from exc
+
+    @asynccontextmanager
+    async def _aredis(self):
+        try:
+            yield get_async_redis()
+        except RedisError as exc:
+            raise CartUnavailable() from exc
+
+    def _key(self, user):
+        return cache.make_key(cart_items_key(user.id))
+
+    def _field(self, service_id):
+        return f"{self.ITEM_PREFIX}{service_id}"
+
+    def _items(self, raw):
+        items = [
+            json.loads(value)
+            for field, value in raw.items()
+            if field.startswith(self.ITEM_PREFIX.encode())
+        ]
+        return sorted(items, key=lambda item: item["id"])
+
+    def get(self, user):
+        with self._redis() as redis:
+            raw = redis.hgetall(self._key(user))
+        return self._cart(user, raw)
+
+    async def aget(self, user):
+        async with self._aredis() as redis:
+            raw = await redis.hgetall(self._key(user))
+        return self._cart(user, raw)
+
+    def _cart(self, user, raw):
+        created_at = raw.get(b"created_at")
+        return {
+            "id": None,
+            "user": user.id,
+            "created_at": created_at.decode() if created_at else None,
+            "items": self._items(raw),
+        }
+
+    def contains(self, user, service_ids):
+        service_ids = list(service_ids)
+        if not service_ids:
+            return set()
+        with self._redis() as redis:
+            present = redis.hmget(
+                self._key(user), [self._field(sid) for sid in service_ids]
+            )
+        return {sid for sid, value in zip(service_ids, present) if value is not None}
+
+    async def acontains(self, user, service_ids):
+        service_ids = list(service_ids)
+        if not service_ids:
+            return set()
+        async with self._aredis() as redis:
+            present = await redis.hmget(
+                self._key(user), [self._field(sid) for sid in service_ids]
+            )
+        return {sid for sid, value in zip(service_ids, present) if value is not None}
+
+    # Writes touch only Redis (the cart hash and the rendered cart), so they
+    # can run off the thread-sensitive executor the ORM needs
+    async def aadd(self, user, services):
+        return await sync_to_async(self.add, thread_sensitive=False)(user, services)
+
+    async def aremove(self, user, service_id):
+        return await sync_to_async(self.remove, thread_sensitive=False)(
+            user, service_id
+        )
+
+    async def aclear(self, user):
+        return await sync_to_async(self.clear, thread_sensitive=False)(user)
+
+    def add(self, user, services):
+        if not services:
+            return []
+        key = self._key(user)
+        now = timezone.now()
+        with self._redis() as redis:
+            last_id = redis.hincrby(key, "next_id", len(services))
+            items = [
+                CartItemSerializer(
+                    CartItem(
+                        id=last_id - len(services) + n + 1,
+                        service_id=sid,
+                        service_name=service.get("name"),
+                        price=Decimal(str(service.get("price"))),
+                        added_at=now,
+                    )
+                ).data
+                for n, (sid, service) in enumerate(services.items())
+            ]
+            pipe = redis.pipeline()
+            pipe.hsetnx(key, "created_at", items[0]["added_at"])
+            for item in items:
+                # HSETNX: a racing duplicate add is a no-op
+                pipe.hsetnx(key, self._field(item["service_id"]), json.dumps(item))
+            pipe.expire(key, self.ttl)
+            created = pipe.execute()[1:-1]
+        added = [item for item, new in zip(items, created) if new]
+        self._update_cache(user.id, added=added)
+        return added
+
+    def remove(self, user, service_id):
+        key = self._key(user)
+        with self._redis() as redis:
+            pipe = redis.pipeline()
+            pipe.exists(key)
+            pipe.hdel(key, self._field(service_id))
+            exists, deleted = pipe.execute()
+        if not exists:
+            return None
+        if deleted:
+            self._update_cache(user.id, removed=[service_id])
+        return bool(deleted)
+
+    def clear(self, user):
+        with self._redis() as redis:
+            deleted = redis.delete(self._key(user))
+        self._update_cache(user.id, removed=None)
+        return bool(deleted)
+
+    @contextmanager
+    def checkout(self, user):
+        # Concurrent checkouts of one cart are kept apart by the view's
+        # per-user lock; there is no cart row to lock here
+        with self._redis() as redis:
+            raw = redis.hgetall(self._key(user))
+        items = [
+            {
+                "service_id": item["service_id"],
+                "service_name": item["service_name"],
+                "price": Decimal(item["price"]),
+            }
+            for item in self._items(raw)
+        ]
+        yield items, sum((item["price"] for item in items), Decimal("0"))
+
+        # Only once the order rows are committed; items added meanwhile stay
+        removed = [item["service_id"] for item in items]
+
+        def drop():
+            with self._redis() as redis:
+                redis.hdel(self._key(user), *[self._field(sid) for sid in removed])
+            self._update_cache(user.id, removed=removed)
+
+        if removed:
+            # The order is committed by now: if Redis fails here, log it
+            # and still answer with the order, or a retry of the request
+            # (no stored Idempotency-Key response) would place it again
+            transaction.on_commit(drop, robust=True)
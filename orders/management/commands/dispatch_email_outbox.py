@@ -0,0 +1,60 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.utils.outbox import build_outbox_dispatcher
+
+
+class Command(BaseCommand):
+    help = (
+        "Send queued emails (EmailOutbox) through Mailgun with a bounded pool "
+        "of sender threads, retrying failures with backoff. Drains what is due "
+        "and exits; --interval keeps it polling."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, help="Sender threads.")
+        parser.add_argument(
+            "--batch-size", type=int, help="Messages claimed (and in flight) at once."
+        )
+        parser.add_argument(
+            "--recipients-per-call",
+            type=int,
+            help="Recipients per Mailgun batch message (1 disables batching).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Seconds between polls. 0 (default) drains once and exits.",
+        )
+
+    def handle(self, *args, **options):
+        overrides = {}
+        if options["workers"]:
+            overrides["WORKERS"] = options["workers"]
+        if options["batch_size"]:
+            overrides["BATCH_SIZE"] = options["batch_size"]
+        if options["recipients_per_call"]:
+            overrides["RECIPIENTS_PER_CALL"] = options["recipients_per_call"]
+
+        dispatcher = build_outbox_dispatcher(**overrides)
+        try:
+            while True:
+                claimed = dispatcher.drain()
+                if claimed:
+                    self.stdout.write(json.dumps(dispatcher.stats()))
+                if not options["interval"]:
+                    break
+                time.sleep(options["interval"])
+        finally:
+            dispatcher.close()
+
+        counts = dispatcher.counts
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Sent {counts['sent']} in {counts['api_calls']} API calls, "
+                f"retrying {counts['retried']}, failed {counts['failed']}."
+            )
+        )
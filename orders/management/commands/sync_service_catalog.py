@@ -0,0 +1,135 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.utils.catalog import CatalogUnavailable, get_catalog_client
+from orders.views import SERVICE_CACHE_TTL, SERVICE_STALE_TTL, service_cache
+from utils.cache_keys import (
+    catalog_ids_key,
+    catalog_sync_key,
+    service_key,
+    service_missing_key,
+)
+from utils.singleflight import make_entry
+
+
+class Command(BaseCommand):
+    help = (
+        "Page through the Express service catalog and write every service into "
+        "the cache. Refreshes incrementally (ETag / updated_since) after the "
+        "first run, with a full reload once the last one is SERVICE_CACHE_TTL "
+        "old; --interval keeps it running periodically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Ignore the stored ETag / last sync time and reload everything.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Seconds between runs. 0 (default) runs once and exits.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                synced = self.sync(options["page_size"], options["full"])
+            except CatalogUnavailable:
+                self.stderr.write(self.style.ERROR("Service catalog unavailable."))
+                if not options["interval"]:
+                    raise
+            else:
+                if synced is None:
+                    self.stdout.write("Catalog not modified since last sync.")
+                else:
+                    self.stdout.write(
+                        self.style.SUCCESS(f"Synced {synced} services into the cache.")
+                    )
+
+            if not options["interval"]:
+                return
+            # Later runs are incremental even if the first one was --full
+            options["full"] = False
+            time.sleep(options["interval"])
+
+    def sync(self, page_size, full=False):
+        """Returns the number of services written, or None if nothing changed."""
+        client = get_catalog_client()
+        state = cache.get(catalog_sync_key()) or {}
+        now = timezone.now()
+        # Incremental runs only rewrite what changed, so unchanged entries
+        # would age out of the cache; reload everything before they go stale.
+        # The full reload also drops services deleted upstream.
+        full_synced_at = state.get("full_synced_at")
+        if (
+            full
+            or full_synced_at is None
+            or now - datetime.fromisoformat(full_synced_at)
+            >= timedelta(seconds=SERVICE_CACHE_TTL)
+        ):
+            full = True
+            full_synced_at = now.isoformat()
+            state = {}
+
+        synced = 0
+        seen = set()
+        page = 1
+        etag = None
+        while True:
+            result = client.list_services(
+                page=page,
+                page_size=page_size,
+                updated_since=state.get("synced_at"),
+                etag=state.get("etag") if page == 1 else None,
+            )
+            if result.not_modified:
+                return None
+            if page == 1:
+                etag = result.etag
+
+            services = {
+                service.get("id") or service.get("_id"): service
+                for service in result.services
+            }
+            services.pop(None, None)
+            if services:
+                # set_many goes out as a single pipeline per page
+                cache.set_many(
+                    {
+                        service_key(sid): make_entry(service, SERVICE_CACHE_TTL)
+                        for sid, service in services.items()
+                    },
+                    timeout=SERVICE_CACHE_TTL + SERVICE_STALE_TTL,
+                )
+                cache.delete_many([service_missing_key(sid) for sid in services])
+                service_cache.broadcast(*(service_key(sid) for sid in services))
+                synced += len(services)
+                seen.update(services)
+
+            if not result.has_next:
+                break
+            page += 1
+
+        if full:
+            removed = set(cache.get(catalog_ids_key()) or ()) - seen
+            service_cache.invalidate(*(service_key(sid) for sid in removed))
+            cache.set(catalog_ids_key(), sorted(seen), None)
+
+        cache.set(
+            catalog_sync_key(),
+            {
+                "etag": etag,
+                "synced_at": now.isoformat(),
+                "full_synced_at": full_synced_at,
+            },
+            None,
+        )
+        return synced
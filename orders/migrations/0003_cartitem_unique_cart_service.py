@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:32
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def delete_duplicate_cart_items(apps, schema_editor):
+    # CartView.post used to check exists() and then create(), so concurrent
+    # adds could store the same service twice; keep the oldest row of each
+    CartItem = apps.get_model("orders", "CartItem")
+    items = CartItem.objects.using(schema_editor.connection.alias)
+    duplicates = (
+        items.values("cart_id", "service_id")
+        .annotate(first=Min("id"), count=Count("id"))
+        .filter(count__gt=1)
+    )
+    for group in duplicates:
+        items.filter(cart_id=group["cart_id"], service_id=group["service_id"]).exclude(
+            id=group["first"]
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_cart_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="cartitem",
+            constraint=models.UniqueConstraint(
+                fields=("cart", "service_id"), name="unique_cart_service"
+            ),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 
 
 class Cart(models.Model):
@@ -19,6 +21,14 @@ class CartItem(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     added_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # lets bulk adds skip duplicates with a single INSERT ... ON CONFLICT
+            models.UniqueConstraint(
+                fields=["cart", "service_id"], name="unique_cart_service"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.service_name} (${self.price})"
 
@@ -81,3 +91,43 @@ class Payment(models.Model):
 
     def __str__(self):
         return f"{self.method.upper()} payment for Order #{self.order.id}"
+
+
+class EmailOutbox(models.Model):
+    """
+    An email waiting to be sent. Written in the same transaction as the
+    change that triggers it, so it exists if and only if that change
+    committed; `manage.py dispatch_email_outbox` delivers it.
+    """
+
+    STATUSES = [
+        ("pending", "Pending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    kind = models.CharField(max_length=50)  # key into orders.utils.email.EMAIL_BUILDERS
+    to_email = models.EmailField()
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="emails",
+    )
+    status = models.CharField(max_length=20, choices=STATUSES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # the dispatcher polls for due pending messages
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} to {self.to_email} ({self.status})"
@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class OrderCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (-ordered_at, -id). Each page is a range scan on
+    the ordered_at index from the cursor position, so the cost of a page
+    doesn't grow with how deep into the order history it is.
+    """
+
+    ordering = ("-ordered_at", "-id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
@@ -8,6 +8,14 @@ class CartItemSerializer(serializers.ModelSerializer):
         fields = ["id", "service_id", "service_name", "price", "added_at"]
 
 
+class CartBulkAddSerializer(serializers.Serializer):
+    service_ids = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        allow_empty=False,
+        max_length=50,
+    )
+
+
 class CartSerializer(serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
 
@@ -0,0 +1,146 @@
+import asyncio
+import time
+
+import pytest
+from adrf.test import AsyncAPIRequestFactory
+from asgiref.sync import async_to_sync
+from model_bakery import baker
+from rest_framework.test import force_authenticate
+
+from orders.async_views import AsyncCartItemDeleteView, AsyncCartView, AsyncOrderViewSet
+from orders.utils.catalog import reset_catalog_client
+
+factory = AsyncAPIRequestFactory()
+cart_view = AsyncCartView.as_view()
+cart_item_view = AsyncCartItemDeleteView.as_view()
+order_list = AsyncOrderViewSet.as_view({"get": "list"})
+order_detail = AsyncOrderViewSet.as_view({"get": "retrieve"})
+
+
+@pytest.fixture
+def stub_catalog(stub_server, settings):
+    settings.EXPRESS_SERVICE_URL = f"{stub_server.url}/api/services"
+    reset_catalog_client()
+    for n in range(5):
+        stub_server.routes[f"/api/services/svc-{n}"] = (
+            200,
+            {"name": f"Plan {n}", "price": f"{n}.50"},
+        )
+    yield stub_server
+    reset_catalog_client()
+
+
+def call(view, user, method, path, data=None, **kwargs):
+    """Run one request through an async view, on its own event loop."""
+
+    async def run():
+        return await perform(view, user, method, path, data, **kwargs)
+
+    return async_to_sync(run)()
+
+
+async def perform(view, user, method, path, data=None, **kwargs):
+    request = getattr(factory, method)(path, data, format="json")
+    force_authenticate(request, user=user)
+    return await view(request, **kwargs)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "backend", ["orders.carts.DatabaseCartBackend", "orders.carts.RedisCartBackend"]
+)
+def test_cart_round_trip(user, stub_catalog, settings, backend):
+    settings.CART_BACKEND = backend
+
+    added = call(cart_view, user, "post", "/api/cart/", {"service_id": "svc-1"})
+    duplicate = call(cart_view, user, "post", "/api/cart/", {"service_id": "svc-1"})
+    call(cart_view, user, "post", "/api/cart/", {"service_id": "svc-2"})
+    cart = call(cart_view, user, "get", "/api/cart/")
+    again = call(cart_view, user, "get", "/api/cart/")
+
+    assert added.status_code == 201
+    assert (added.data["service_name"], added.data["price"]) == ("Plan 1", "1.50")
+    assert duplicate.status_code == 409
+    assert len(stub_catalog.requests) == 2  # svc-1 came from the cache the 2nd time
+    assert {item["service_id"] for item in cart.data["items"]} == {"svc-1", "svc-2"}
+    assert again.content == cart.content
+
+    removed = call(
+        cart_item_view, user, "delete", "/api/cart/svc-1/", service_id="svc-1"
+    )
+    gone = call(cart_item_view, user, "delete", "/api/cart/svc-1/", service_id="svc-1")
+    assert (removed.status_code, gone.status_code) == (204, 404)
+    cart = call(cart_view, user, "get", "/api/cart/")
+    assert [item["service_id"] for item in cart.data["items"]] == ["svc-2"]
+
+    assert call(cart_view, user, "delete", "/api/cart/").status_code == 204
+
+
+@pytest.mark.django_db
+def test_unknown_service_is_rejected_and_remembered(user, stub_catalog):
+    first = call(cart_view, user, "post", "/api/cart/", {"service_id": "nope"})
+    second = call(cart_view, user, "post", "/api/cart/", {"service_id": "nope"})
+
+    assert (first.status_code, second.status_code) == (400, 400)
+    assert len(stub_catalog.requests) == 1
+
+
+@pytest.mark.django_db
+def test_missing_service_id(user):
+    response = call(cart_view, user, "post", "/api/cart/", {})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_catalog_waits_overlap(user, stub_catalog, settings):
+    settings.CART_BACKEND = "orders.carts.RedisCartBackend"
+    stub_catalog.delay = 0.2
+
+    async def add_all():
+        return await asyncio.gather(
+            *(
+                perform(
+                    cart_view, user, "post", "/api/cart/", {"service_id": f"svc-{n}"}
+                )
+                for n in range(5)
+            )
+        )
+
+    started = time.perf_counter()
+    responses = async_to_sync(add_all)()
+    elapsed = time.perf_counter() - started
+
+    assert [response.status_code for response in responses] == [201] * 5
+    # One event loop, five 200 ms catalog calls in flight at once
+    assert elapsed < 0.6
+
+
+@pytest.mark.django_db
+def test_order_reads_share_the_sync_views_cache(user, auth_client):
+    order = baker.make("orders.Order", user=user, status="confirmed")
+    baker.make("orders.OrderItem", order=order, service_name="Premium", price="10.00")
+    path = f"/api/orders/{order.id}/"
+
+    rendered = auth_client.get(path)
+    detail = call(order_detail, user, "get", path, pk=str(order.id))
+    listing = call(order_list, user, "get", "/api/orders/")
+
+    assert detail.status_code == 200
+    assert detail.content == rendered.content
+    assert detail["ETag"] == rendered["ETag"]
+    assert [row["id"] for row in listing.data["results"]] == [order.id]
+    assert auth_client.get("/api/orders/").content == listing.content
+
+
+@pytest.mark.django_db
+def test_order_detail_is_scoped_to_its_owner(user, admin_user):
+    order = baker.make("orders.Order", user=admin_user)
+    path = f"/api/orders/{order.id}/"
+
+    assert (
+        call(order_detail, admin_user, "get", path, pk=str(order.id)).status_code == 200
+    )
+    # A cache hit for someone else's order falls through to the query, and 404s
+    assert call(order_detail, user, "get", path, pk=str(order.id)).status_code == 404
+    assert call(order_detail, user, "get", "/api/orders/0/", pk="0").status_code == 404
+    assert call(order_detail, user, "get", "/api/orders/x/", pk="x").status_code == 404
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from model_bakery import baker
+
+from utils.cache_keys import lock_key, orders_generation_key, orders_list_key
+from utils.cache_versions import get_generation
+from utils.redis_cache import ThresholdCompressor
+
+LARGE = {"items": [{"service_name": "Premium plan", "price": "10.00"}] * 200}
+
+
+def raw(key):
+    return get_redis_connection("default").get(cache.make_key(key))
+
+
+def test_large_values_are_compressed():
+    cache.set("large", LARGE)
+    cache.set("small", {"price": "10.00"})
+
+    assert raw("large")[:2] == b"\x00l"
+    assert len(raw("large")) < 200
+    assert raw("small")[:1] != b"\x00"
+    assert cache.get("large") == LARGE
+    assert cache.get("small") == {"price": "10.00"}
+
+
+def test_opted_out_families_are_never_compressed():
+    cache.set(lock_key("large"), LARGE)
+
+    assert raw(lock_key("large"))[:1] != b"\x00"
+    assert cache.get(lock_key("large")) == LARGE
+
+
+def test_entries_survive_an_algorithm_change():
+    value = b"x" * 4096
+    written = ThresholdCompressor({"COMPRESS_ALGORITHM": "zlib"}).compress(value)
+    reader = ThresholdCompressor({"COMPRESS_ALGORITHM": "lz4"})
+
+    assert written[:2] == b"\x00z"
+    assert reader.decompress(written) == value
+
+
+def test_incompressible_values_are_stored_as_is():
+    value = os.urandom(4096)
+    assert ThresholdCompressor({}).compress(value) == value
+
+
+@pytest.mark.django_db
+def test_rendered_pages_are_compressed(admin_client):
+    for order in baker.make("orders.Order", _quantity=20):
+        baker.make(
+            "orders.OrderItem",
+            order=order,
+            service_id="svc-premium",
+            service_name="Premium plan",
+            price="10.00",
+            _quantity=5,
+        )
+
+    miss = admin_client.get("/api/orders/")
+    hit = admin_client.get("/api/orders/")
+
+    generation = get_generation(orders_generation_key())
+    stored = raw(orders_list_key(None, generation, None, 20))
+    assert stored[:2] == b"\x00l"
+    assert len(stored) < len(hit.content) / 2
+    assert hit.content == miss.content
@@ -1,4 +1,10 @@
 import pytest
+from django.core.cache import cache
+from model_bakery import baker
+
+from orders.carts import DatabaseCartBackend
+from utils.cache_keys import service_key
+from utils.singleflight import make_entry
 
 @pytest.mark.django_db
 def test_add_service_to_cart(auth_client, mocker):
@@ -22,3 +28,46 @@ def test_get_cart_contents(auth_client):
 # def test_clear_cart(auth_client):
 #     response = auth_client.delete("/api/cart/")
 #     assert response.status_code in (204, 200)
+
+
+@pytest.mark.django_db
+def test_bulk_add_reports_per_item_outcomes(auth_client, user, mocker):
+    cache.set(service_key("cached"), make_entry({"name": "Cached", "price": "5.00"}, 60))
+    baker.make("orders.CartItem", cart__user=user, service_id="dupe", price="1.00")
+    catalog = mocker.Mock()
+    catalog.get_service.side_effect = lambda sid: (
+        {"name": "Fetched", "price": "7.50"} if sid == "fresh" else None
+    )
+    mocker.patch("orders.views.get_catalog_client", return_value=catalog)
+
+    response = auth_client.post(
+        "/api/cart/bulk/",
+        {"service_ids": ["cached", "fresh", "dupe", "missing", "fresh"]},
+        format="json",
+    )
+
+    assert response.status_code == 201
+    assert [r["status"] for r in response.data["results"]] == [
+        "added",
+        "added",
+        "duplicate",
+        "not_found",
+        "duplicate",
+    ]
+    assert {item["service_id"] for item in response.data["items"]} == {"cached", "fresh"}
+    # the cached service never reached the catalog
+    assert sorted(c.args[0] for c in catalog.get_service.call_args_list) == ["fresh", "missing"]
+    assert user.cart.items.count() == 3
+
+
+@pytest.mark.django_db
+def test_backend_add_returns_only_new_items(user):
+    backend = DatabaseCartBackend()
+    plan = {"name": "Plan", "price": "5.00"}
+
+    assert [i["service_id"] for i in backend.add(user, {"one": plan})] == ["one"]
+    # A duplicate (e.g. a racing request's) is skipped, not reported as added
+    assert backend.add(user, {"one": plan}) == []
+    added = backend.add(user, {"one": plan, "two": plan})
+    assert [i["service_id"] for i in added] == ["two"]
+    assert user.cart.items.count() == 2
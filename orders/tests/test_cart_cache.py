@@ -0,0 +1,104 @@
+import json
+import threading
+
+import pytest
+from django.core.cache import cache
+
+from utils.cache_keys import cart_key
+from utils.rendered_cache import get_rendered
+from utils.write_through import get_or_build, update_in_place
+
+
+@pytest.fixture
+def catalog(mocker):
+    return mocker.patch(
+        "orders.views.fetch_service",
+        side_effect=lambda sid, client_id=None: {"name": sid.upper(), "price": 5},
+    )
+
+
+def cached_service_ids(user):
+    _, body = get_rendered(cart_key(user.id))
+    return [item["service_id"] for item in json.loads(body)["items"]]
+
+
+@pytest.mark.django_db
+def test_mutations_update_the_cached_cart_in_place(
+    auth_client, user, catalog, django_assert_num_queries
+):
+    auth_client.get("/api/cart/")
+
+    auth_client.post("/api/cart/", {"service_id": "a"})
+    auth_client.post("/api/cart/bulk/", {"service_ids": ["b", "c"]}, format="json")
+    assert cached_service_ids(user) == ["a", "b", "c"]
+
+    auth_client.delete("/api/cart/b/")
+    assert cached_service_ids(user) == ["a", "c"]
+
+    with django_assert_num_queries(0):
+        response = auth_client.get("/api/cart/")
+    assert [item["service_id"] for item in response.data["items"]] == ["a", "c"]
+    assert response.data["items"][0]["service_name"] == "A"
+
+    auth_client.delete("/api/cart/")
+    assert cached_service_ids(user) == []
+
+
+@pytest.mark.django_db
+def test_cached_cart_matches_a_fresh_rebuild(auth_client, user, catalog):
+    auth_client.get("/api/cart/")
+    auth_client.post("/api/cart/", {"service_id": "a"})
+    auth_client.post("/api/cart/bulk/", {"service_ids": ["b"]}, format="json")
+    written_through = auth_client.get("/api/cart/").data
+
+    cache.delete(cart_key(user.id))
+    assert auth_client.get("/api/cart/").data == written_through
+
+
+@pytest.mark.django_db
+def test_checkout_empties_the_cached_cart(
+    auth_client, user, catalog, django_capture_on_commit_callbacks
+):
+    auth_client.post("/api/cart/", {"service_id": "a"})
+    auth_client.get("/api/cart/")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        auth_client.post("/api/orders/checkout/")
+
+    assert cached_service_ids(user) == []
+
+
+def test_rebuild_is_not_cached_if_a_write_lands_meanwhile():
+    def build():
+        # a mutation commits while the cart is being read from the DB
+        update_in_place("cart", "cart_version", lambda cart: None, 60)
+        return {"items": []}
+
+    assert get_or_build("cart", "cart_version", build, 60) == {"items": []}
+    assert cache.get("cart") is None
+
+    # uncontended, the rebuild is stored
+    get_or_build("cart", "cart_version", lambda: {"items": []}, 60)
+    assert cache.get("cart") == {"items": []}
+
+
+def test_concurrent_mutations_are_not_lost():
+    cache.set("cart", {"items": []})
+    barrier = threading.Barrier(8)
+
+    def add(n):
+        barrier.wait()
+
+        def append(cart):
+            cart["items"].append(n)
+            return cart
+
+        update_in_place("cart", "cart_version", append, 60, retries=50)
+
+    threads = [threading.Thread(target=add, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(cache.get("cart")["items"]) == list(range(8))
@@ -0,0 +1,146 @@
+import asyncio
+import time
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from orders.utils.catalog import (
+    AsyncCatalogClient,
+    CatalogClient,
+    CatalogUnavailable,
+    CircuitBreaker,
+    get_async_catalog_client,
+    reset_catalog_client,
+)
+
+
+def make_client(stub_server, **kwargs):
+    kwargs.setdefault("backoff_factor", 0)
+    return CatalogClient(f"{stub_server.url}/api/services", **kwargs)
+
+
+def test_get_service_reuses_pooled_connection(stub_server):
+    stub_server.routes["/api/services/svc-1"] = (200, {"name": "Plan", "price": 10})
+    client = make_client(stub_server)
+
+    assert client.get_service("svc-1") == {"name": "Plan", "price": 10}
+    assert client.get_service("svc-1") == {"name": "Plan", "price": 10}
+
+    stats = client.stats()
+    assert stats["pool"]["connections_opened"] == 1
+    assert stats["pool"]["requests_sent"] == 2
+    assert stats["breaker"]["state"] == CircuitBreaker.CLOSED
+
+
+def test_unknown_service_returns_none(stub_server):
+    client = make_client(stub_server)
+    assert client.get_service("missing") is None
+    assert client.stats()["breaker"]["consecutive_failures"] == 0
+
+
+@pytest.mark.parametrize("status", [401, 403, 429])
+def test_other_client_errors_are_not_a_missing_service(stub_server, status):
+    stub_server.routes["/api/services/svc-1"] = (status, {})
+    client = make_client(stub_server)
+
+    with pytest.raises(CatalogUnavailable):
+        client.get_service("svc-1")
+    assert client.stats()["breaker"]["consecutive_failures"] == 1
+    assert len(stub_server.requests) == 1  # not retried
+
+
+def test_retries_server_errors_then_succeeds(stub_server):
+    stub_server.routes["/api/services/svc-1"] = [
+        (503, {}),
+        (502, {}),
+        (200, {"name": "Plan", "price": 10}),
+    ]
+    client = make_client(stub_server, max_retries=2)
+
+    assert client.get_service("svc-1")["name"] == "Plan"
+    assert len(stub_server.requests) == 3
+    assert client.stats()["retries"] == 2
+
+
+def test_read_timeout_is_bounded(stub_server):
+    stub_server.delay = 0.5
+    client = make_client(stub_server, read_timeout=0.1, max_retries=1)
+
+    started = time.monotonic()
+    with pytest.raises(CatalogUnavailable):
+        client.get_service("svc-1")
+    assert time.monotonic() - started < 0.5
+
+
+def test_breaker_fails_fast_after_threshold(stub_server):
+    stub_server.routes["/api/services/svc-1"] = (500, {})
+    clock = [0.0]
+    breaker = CircuitBreaker(
+        failure_threshold=2, reset_timeout=30, clock=lambda: clock[0]
+    )
+    client = make_client(stub_server, max_retries=0, breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(CatalogUnavailable):
+            client.get_service("svc-1")
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CatalogUnavailable):
+        client.get_service("svc-1")
+    assert len(stub_server.requests) == 2  # rejected without a network call
+    assert client.stats()["breaker"]["rejected"] == 1
+
+    # After the cool-down one trial call goes through and closes the breaker
+    clock[0] = 31
+    stub_server.routes["/api/services/svc-1"] = (200, {"name": "Plan", "price": 10})
+    assert client.get_service("svc-1")["name"] == "Plan"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_stuck_trial_is_replaced_after_the_cool_down():
+    clock = [0.0]
+    breaker = CircuitBreaker(
+        failure_threshold=1, reset_timeout=30, clock=lambda: clock[0]
+    )
+    breaker.record_failure()
+
+    clock[0] = 31
+    assert breaker.allow()  # the trial, which never reports back
+    assert not breaker.allow()
+
+    clock[0] = 61
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_cancelled_calls_are_recorded_as_failures(stub_server, mocker):
+    breaker = CircuitBreaker(failure_threshold=1)
+    client = make_client(stub_server, breaker=breaker)
+    mocker.patch.object(client.session, "get", side_effect=asyncio.CancelledError)
+
+    with pytest.raises(asyncio.CancelledError):
+        client.get_service("svc-1")
+    assert breaker.state == CircuitBreaker.OPEN
+
+    async_client = AsyncCatalogClient(
+        f"{stub_server.url}/api/services", breaker=CircuitBreaker(failure_threshold=1)
+    )
+    mocker.patch.object(async_client.client, "get", side_effect=asyncio.CancelledError)
+    with pytest.raises(asyncio.CancelledError):
+        async_to_sync(async_client.get_service)("svc-1")
+    assert async_client.breaker.state == CircuitBreaker.OPEN
+
+
+def test_reset_closes_async_clients(mocker):
+    loop = asyncio.new_event_loop()
+
+    async def client():
+        return get_async_catalog_client()
+
+    try:
+        async_client = loop.run_until_complete(client())
+        aclose = mocker.patch.object(async_client, "aclose", mocker.AsyncMock())
+        reset_catalog_client()
+        aclose.assert_awaited_once()
+    finally:
+        loop.close()
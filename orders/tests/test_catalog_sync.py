@@ -0,0 +1,78 @@
+from datetime import timedelta
+from urllib.parse import parse_qs
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+
+from orders.utils.catalog import reset_catalog_client
+from orders.views import SERVICE_CACHE_TTL, fetch_service
+from utils.cache_keys import service_key
+
+SERVICES = [
+    {"id": f"svc-{i}", "name": f"Plan {i}", "price": f"{i}.00"} for i in range(5)
+]
+
+
+@pytest.fixture
+def stub_catalog(stub_server, settings):
+    settings.EXPRESS_SERVICE_URL = f"{stub_server.url}/api/services"
+    reset_catalog_client()
+
+    def listing(request):
+        query = parse_qs(request["query"])
+        if request["headers"].get("If-None-Match") == '"v1"':
+            return 304, b""
+        page, limit = int(query["page"][0]), int(query["limit"][0])
+        chunk = SERVICES[(page - 1) * limit : page * limit]
+        return (
+            200,
+            {"data": chunk, "next": page * limit < len(SERVICES)},
+            {"ETag": '"v1"'},
+        )
+
+    stub_server.routes["/api/services"] = listing
+    yield stub_server
+    reset_catalog_client()
+
+
+def test_sync_prewarms_every_service(stub_catalog, mocker):
+    call_command("sync_service_catalog", "--page-size=2")
+
+    assert len(stub_catalog.requests) == 3  # 5 services in pages of 2
+    catalog_lookup = mocker.patch("orders.utils.catalog.CatalogClient.get_service")
+    assert fetch_service("svc-4")["name"] == "Plan 4"
+    catalog_lookup.assert_not_called()
+
+
+def test_incremental_sync_uses_etag_and_updated_since(stub_catalog, capsys):
+    call_command("sync_service_catalog", "--page-size=10")
+    call_command("sync_service_catalog", "--page-size=10")
+
+    second = stub_catalog.requests[-1]
+    assert second["headers"]["If-None-Match"] == '"v1"'
+    assert "updated_since" in parse_qs(second["query"])
+    assert "not modified" in capsys.readouterr().out
+
+
+def test_entries_outlive_the_cache_ttl(stub_catalog, mocker):
+    call_command("sync_service_catalog", "--page-size=10")
+    # Just before the entries would expire, with nothing changed upstream
+    # except one service that was deleted
+    for service in SERVICES:
+        cache.expire(service_key(service["id"]), 5)
+    mocker.patch(f"{__name__}.SERVICES", SERVICES[:4])
+    mocker.patch(
+        "django.utils.timezone.now",
+        return_value=timezone.now() + timedelta(seconds=SERVICE_CACHE_TTL + 1),
+    )
+
+    call_command("sync_service_catalog", "--page-size=10")
+
+    assert "If-None-Match" not in stub_catalog.requests[-1]["headers"]
+    assert all(
+        cache.ttl(service_key(service["id"])) > SERVICE_CACHE_TTL
+        for service in SERVICES[:4]
+    )
+    assert cache.get(service_key("svc-4")) is None
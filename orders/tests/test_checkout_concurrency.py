@@ -0,0 +1,78 @@
+import threading
+from contextlib import contextmanager
+
+import pytest
+from django.db import connection
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+from orders.models import CartItem, Order, OrderItem
+from utils.cache_keys import checkout_key
+from utils.locks import cache_lock
+
+
+@pytest.fixture
+def cart(user):
+    cart = baker.make("orders.Cart", user=user)
+    for n, price in enumerate(["10.00", "20.50", "5.25"]):
+        baker.make("orders.CartItem", cart=cart, service_id=f"svc-{n}", price=price)
+    return cart
+
+
+def checkout_in_parallel(user, workers=8):
+    barrier = threading.Barrier(workers)
+    statuses = []
+
+    def checkout():
+        client = APIClient()
+        client.force_authenticate(user=user)
+        barrier.wait()
+        try:
+            statuses.append(client.post("/api/orders/checkout/").status_code)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=checkout) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses
+
+
+def assert_one_order(user, statuses):
+    assert statuses.count(201) == 1
+    assert set(statuses) <= {201, 400, 409}
+    order = Order.objects.get(user=user)
+    assert order.items.count() == 3
+    assert str(order.total_price) == "35.75"
+    assert not CartItem.objects.filter(cart__user=user).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_checkouts_create_one_order(user, cart):
+    assert_one_order(user, checkout_in_parallel(user))
+
+
+@pytest.mark.skipif(
+    not connection.features.has_select_for_update,
+    reason="needs a database with row locks (PostgreSQL)",
+)
+@pytest.mark.django_db(transaction=True)
+def test_cart_row_lock_alone_prevents_double_checkout(user, cart, mocker):
+    @contextmanager
+    def no_lock(key, timeout=10):
+        yield True  # as if Redis were down
+
+    mocker.patch("orders.views.cache_lock", no_lock)
+    assert_one_order(user, checkout_in_parallel(user))
+
+
+@pytest.mark.django_db
+def test_checkout_is_rejected_while_another_is_in_flight(auth_client, user, cart):
+    with cache_lock(checkout_key(user.id)):
+        response = auth_client.post("/api/orders/checkout/")
+
+    assert response.status_code == 409
+    assert not OrderItem.objects.exists()
+    assert auth_client.post("/api/orders/checkout/").status_code == 201
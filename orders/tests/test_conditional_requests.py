@@ -0,0 +1,76 @@
+import pytest
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def order(user):
+    order = baker.make("orders.Order", user=user, status="confirmed")
+    baker.make("orders.OrderItem", order=order, price="10.00", _quantity=2)
+    return order
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url", ["/api/cart/", "/api/orders/", "/api/orders/{order.id}/"]
+)
+def test_matching_etag_gets_304_without_db(
+    auth_client, order, url, django_assert_num_queries
+):
+    url = url.format(order=order)
+    first = auth_client.get(url)
+    etag = first["ETag"]
+    assert etag.startswith('"') and etag.endswith('"')
+
+    with django_assert_num_queries(0):
+        response = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response["ETag"] == etag
+
+
+@pytest.mark.django_db
+def test_weak_and_listed_etags_match(auth_client, order):
+    etag = auth_client.get("/api/orders/")["ETag"]
+
+    for header in [f"W/{etag}", f'"stale", {etag}', "*"]:
+        response = auth_client.get("/api/orders/", HTTP_IF_NONE_MATCH=header)
+        assert response.status_code == 304, header
+
+
+@pytest.mark.django_db
+def test_cart_change_produces_a_new_etag(auth_client, mocker):
+    mocker.patch("orders.views.fetch_service", return_value={"name": "X", "price": 5})
+    etag = auth_client.get("/api/cart/")["ETag"]
+
+    auth_client.post("/api/cart/", {"service_id": "svc-1"})
+    response = auth_client.get("/api/cart/", HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert len(response.data["items"]) == 1
+
+
+@pytest.mark.django_db
+def test_order_change_produces_a_new_etag(auth_client, order):
+    url = f"/api/orders/{order.id}/"
+    list_etag = auth_client.get("/api/orders/")["ETag"]
+    detail_etag = auth_client.get(url)["ETag"]
+
+    auth_client.patch(f"{url}update_status/", {"status": "cancelled"})
+
+    assert auth_client.get(url, HTTP_IF_NONE_MATCH=detail_etag).status_code == 200
+    assert (
+        auth_client.get("/api/orders/", HTTP_IF_NONE_MATCH=list_etag).status_code == 200
+    )
+
+
+@pytest.mark.django_db
+def test_etag_does_not_bypass_ownership(auth_client, order):
+    etag = auth_client.get(f"/api/orders/{order.id}/")["ETag"]
+
+    intruder = APIClient()
+    intruder.force_authenticate(user=baker.make("users.User"))
+    response = intruder.get(f"/api/orders/{order.id}/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 404
@@ -0,0 +1,282 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from urllib.parse import parse_qs
+
+import pytest
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.utils import timezone
+from model_bakery import baker
+
+from orders.models import EmailOutbox, Payment
+from orders.utils.email import (
+    build_order_confirmation,
+    build_order_confirmation_batch,
+    trigger_order_confirmation_email,
+)
+from orders.utils.outbox import build_outbox_dispatcher
+
+MESSAGES_PATH = "/v3/dummy.mailgun.org/messages"
+ORDER_DATA = {"items": [{"name": "Premium", "quantity": 1, "price": "10.00"}]}
+
+
+@pytest.fixture
+def mailgun(stub_server, settings):
+    settings.ANYMAIL = {**settings.ANYMAIL, "MAILGUN_API_URL": f"{stub_server.url}/v3"}
+    stub_server.routes[MESSAGES_PATH] = (200, {"id": "<1@mg>", "message": "Queued"})
+    return stub_server
+
+
+def queue(count=1):
+    for n in range(count):
+        trigger_order_confirmation_email(f"user{n}@example.com", ORDER_DATA)
+
+
+def dispatcher(**overrides):
+    overrides.setdefault("BACKOFF_FACTOR", 0)
+    return build_outbox_dispatcher(**overrides)
+
+
+@pytest.mark.django_db
+def test_payment_queues_the_email_instead_of_sending(auth_client, user, mailgun):
+    order = baker.make("orders.Order", user=user, status="confirmed")
+    baker.make("orders.OrderItem", order=order, service_name="Premium", price="10.00")
+
+    response = auth_client.post(f"/api/orders/{order.id}/pay/", {"method": "card"})
+
+    assert response.status_code == 200
+    message = EmailOutbox.objects.get()
+    assert (message.order, message.to_email, message.status) == (
+        order,
+        user.email,
+        "pending",
+    )
+    assert message.payload["items"][0]["price"] == "10.00"
+    assert mailgun.requests == []
+
+
+@pytest.mark.django_db
+def test_payment_and_email_commit_together(auth_client, user, mocker):
+    order = baker.make("orders.Order", user=user, status="confirmed")
+    mocker.patch(
+        "orders.views.trigger_order_confirmation_email",
+        side_effect=DatabaseError("outbox unavailable"),
+    )
+
+    with pytest.raises(DatabaseError):
+        auth_client.post(f"/api/orders/{order.id}/pay/", {"method": "card"})
+
+    order.refresh_from_db()
+    assert order.status == "confirmed"
+    assert not Payment.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_dispatcher_drains_over_pooled_connections(mailgun):
+    queue(10)
+    sender = dispatcher(WORKERS=2, BATCH_SIZE=4, RECIPIENTS_PER_CALL=1)
+
+    assert sender.drain() == 10
+    stats = sender.stats()
+    sender.close()
+
+    assert EmailOutbox.objects.filter(status="sent").count() == 10
+    assert len(mailgun.requests) == 10
+    assert stats["batches"] == 3
+    assert stats["backlog"] == 0
+    assert stats["pool"]["requests_sent"] == 10
+    assert stats["pool"]["connections_opened"] <= 2
+
+    fields = parse_qs(mailgun.requests[0]["body"].decode())
+    assert fields["subject"] == ["Payment Confirmation - Your Subscription is Paid"]
+    assert "Premium" in fields["text"][0]
+    assert mailgun.requests[0]["headers"]["Authorization"].startswith("Basic ")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_transient_failures_are_retried_with_backoff(mailgun):
+    mailgun.routes[MESSAGES_PATH] = [(503, {}), (429, {}), (200, {"id": "<1@mg>"})]
+    queue()
+    sender = dispatcher(BACKOFF_FACTOR=60)
+
+    sender.drain()
+    message = EmailOutbox.objects.get()
+    assert (message.status, message.attempts) == ("pending", 1)
+    assert "503" in message.last_error
+    assert sender.stats()["scheduled_retries"] == 1
+
+    for _ in range(2):
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        sender.drain()
+    sender.close()
+
+    message.refresh_from_db()
+    assert (message.status, message.attempts, message.last_error) == ("sent", 3, "")
+    assert sender.counts == {
+        "batches": 3,
+        "api_calls": 3,
+        "sent": 1,
+        "retried": 2,
+        "failed": 0,
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_rejected_messages_are_not_retried(mailgun):
+    mailgun.routes[MESSAGES_PATH] = (400, {"message": "'to' parameter is invalid"})
+    queue()
+    sender = dispatcher()
+
+    sender.drain()
+    sender.close()
+
+    message = EmailOutbox.objects.get()
+    assert (message.status, message.attempts) == ("failed", 1)
+    assert len(mailgun.requests) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_gives_up_after_max_attempts(mailgun):
+    mailgun.routes[MESSAGES_PATH] = (500, {})
+    queue()
+    sender = dispatcher(MAX_ATTEMPTS=3)
+
+    for _ in range(3):
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        sender.drain()
+    sender.close()
+
+    message = EmailOutbox.objects.get()
+    assert (message.status, message.attempts) == ("failed", 3)
+    assert len(mailgun.requests) == 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_messages_claimed_by_another_dispatcher_are_skipped(mailgun):
+    queue(3)
+    EmailOutbox.objects.filter(pk=EmailOutbox.objects.first().pk).update(
+        next_attempt_at=timezone.now() + timedelta(minutes=5)
+    )
+    sender = dispatcher()
+
+    assert sender.drain() == 2
+    sender.close()
+    (request,) = mailgun.requests
+    assert parse_qs(request["body"].decode())["to"] == [
+        "user1@example.com",
+        "user2@example.com",
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_command_drains_and_reports(mailgun):
+    queue(3)
+    out = StringIO()
+
+    call_command("dispatch_email_outbox", "--workers", "2", stdout=out)
+
+    assert '"backlog": 0' in out.getvalue()
+    assert "Sent 3 in 1 API calls, retrying 0, failed 0." in out.getvalue()
+    assert EmailOutbox.objects.filter(status="sent").count() == 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_confirmations_go_out_as_batch_messages(mailgun):
+    queue(5)
+    trigger_order_confirmation_email("USER0@example.com", ORDER_DATA)
+    sender = dispatcher(RECIPIENTS_PER_CALL=100)
+
+    assert sender.drain() == 6
+    sender.close()
+
+    # Five distinct addresses share a call; the repeated one needs its own
+    assert sender.counts["api_calls"] == 2
+    assert EmailOutbox.objects.filter(status="sent").count() == 6
+    calls = sorted(
+        (parse_qs(request["body"].decode()) for request in mailgun.requests),
+        key=lambda fields: len(fields["to"]),
+    )
+    assert [len(fields["to"]) for fields in calls] == [1, 5]
+    assert "recipient-variables" not in calls[0]
+    variables = json.loads(calls[1]["recipient-variables"][0])
+    assert sorted(variables) == sorted(calls[1]["to"])
+    assert "%recipient.items_text%" in calls[1]["text"][0]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_batches_are_capped_at_recipients_per_call(mailgun):
+    queue(5)
+    sender = dispatcher(RECIPIENTS_PER_CALL=2)
+
+    sender.drain()
+    sender.close()
+
+    assert sender.counts["api_calls"] == 3
+    assert len(mailgun.requests) == 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failed_batch_is_retried_as_a_whole(mailgun):
+    mailgun.routes[MESSAGES_PATH] = (503, {})
+    queue(3)
+    sender = dispatcher(BACKOFF_FACTOR=60)
+
+    sender.drain()
+    sender.close()
+
+    assert len(mailgun.requests) == 1
+    assert (
+        list(EmailOutbox.objects.values_list("status", "attempts"))
+        == [("pending", 1)] * 3
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_one_rejected_address_does_not_fail_the_batch(mailgun):
+    def messages(request):
+        if "bad@example.com" in parse_qs(request["body"].decode())["to"]:
+            return 400, {"message": "'to' parameter is not a valid address"}
+        return 200, {"id": "<1@mg>", "message": "Queued"}
+
+    mailgun.routes[MESSAGES_PATH] = messages
+    queue(4)
+    trigger_order_confirmation_email("bad@example.com", ORDER_DATA)
+    sender = dispatcher(RECIPIENTS_PER_CALL=100)
+
+    sender.drain()
+    sender.close()
+
+    assert EmailOutbox.objects.filter(status="sent").count() == 4
+    rejected = EmailOutbox.objects.get(to_email="bad@example.com")
+    assert (rejected.status, rejected.attempts) == ("failed", 1)
+    # 5, then 2 + 3, 1 + 2 and 1 + 1 as the bad address is narrowed down
+    assert sender.counts["api_calls"] == len(mailgun.requests) == 7
+
+
+def substitute(body, variables):
+    # What Mailgun does with %recipient.name% for each recipient
+    for name, value in variables.items():
+        body = body.replace(f"%recipient.{name}%", value)
+    return body
+
+
+def test_batch_message_renders_like_individual_ones():
+    order_data = {
+        "items": [{"name": "Tom & Jerry <deluxe>", "quantity": 1, "price": "9.50"}],
+        "total": "9.50",
+    }
+    recipients = [("o'neil@example.com", order_data), ("b@example.com", ORDER_DATA)]
+
+    batch = build_order_confirmation_batch(recipients)
+    variables = json.loads(batch["recipient-variables"])
+
+    for email, data in recipients:
+        single = build_order_confirmation(email, data)
+        for part in ("text", "html"):
+            assert substitute(batch[part], variables[email]) == single[part]
+
+    single = build_order_confirmation(*recipients[0])
+    assert "- Tom & Jerry <deluxe> (x1): ₱9.50" in single["text"]
+    assert "Tom &amp; Jerry &lt;deluxe&gt;" in single["html"]
+    assert "Hi o'neil@example.com," in single["text"]
@@ -0,0 +1,126 @@
+import threading
+
+import pytest
+from model_bakery import baker
+from rest_framework.test import APIRequestFactory
+
+from orders.models import Order, Payment
+from utils.cache_keys import idempotency_key
+from utils.idempotency import _fingerprint
+from utils.locks import cache_lock
+from utils.rendered_cache import render, set_rendered
+
+
+@pytest.fixture
+def cart(user):
+    cart = baker.make("orders.Cart", user=user)
+    baker.make("orders.CartItem", cart=cart, service_id="svc-1", price="10.00")
+    return cart
+
+
+@pytest.fixture
+def order(user):
+    return baker.make(
+        "orders.Order", user=user, status="confirmed", total_price="10.00"
+    )
+
+
+@pytest.mark.django_db
+def test_checkout_retry_replays_the_first_response(auth_client, user, cart):
+    first = auth_client.post("/api/orders/checkout/", HTTP_IDEMPOTENCY_KEY="k-1")
+    retry = auth_client.post("/api/orders/checkout/", HTTP_IDEMPOTENCY_KEY="k-1")
+
+    assert first.status_code == retry.status_code == 201
+    assert retry["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first
+    assert retry.data == first.data
+    assert Order.objects.filter(user=user).count() == 1
+
+
+@pytest.mark.django_db
+def test_pay_retry_does_not_pay_twice(auth_client, order, mocker):
+    send = mocker.patch("orders.views.trigger_order_confirmation_email")
+    url = f"/api/orders/{order.id}/pay/"
+
+    for _ in range(3):
+        response = auth_client.post(url, {"method": "maya"}, HTTP_IDEMPOTENCY_KEY="p-1")
+        assert response.status_code == 200
+        assert response.data["status"] == "paid"
+
+    assert Payment.objects.filter(order=order).count() == 1
+    send.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_key_reused_for_another_request_is_rejected(auth_client, order, mocker):
+    mocker.patch("orders.views.trigger_order_confirmation_email")
+    url = f"/api/orders/{order.id}/pay/"
+    auth_client.post(url, {"method": "maya"}, HTTP_IDEMPOTENCY_KEY="p-1")
+
+    response = auth_client.post(url, {"method": "card"}, HTTP_IDEMPOTENCY_KEY="p-1")
+
+    assert response.status_code == 422
+    assert Payment.objects.get(order=order).method == "maya"
+
+
+@pytest.mark.django_db
+def test_keys_are_scoped_to_the_user(auth_client, cart):
+    auth_client.post("/api/orders/checkout/", HTTP_IDEMPOTENCY_KEY="shared")
+
+    other = baker.make("users.User")
+    baker.make("orders.CartItem", cart__user=other, price="5.00")
+    auth_client.force_authenticate(user=other)
+    response = auth_client.post("/api/orders/checkout/", HTTP_IDEMPOTENCY_KEY="shared")
+
+    assert response.status_code == 201
+    assert "Idempotent-Replayed" not in response
+    assert Order.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_errors_are_not_stored(auth_client, user):
+    empty = auth_client.post("/api/orders/checkout/", HTTP_IDEMPOTENCY_KEY="k-1")
+    assert empty.status_code == 400
+
+    baker.make("orders.CartItem", cart__user=user, price="5.00")
+    response = auth_client.post("/api/orders/checkout/", HTTP_IDEMPOTENCY_KEY="k-1")
+    assert response.status_code == 201
+
+
+@pytest.mark.django_db
+def test_overlong_key_is_rejected(auth_client, cart):
+    response = auth_client.post("/api/orders/checkout/", HTTP_IDEMPOTENCY_KEY="k" * 256)
+
+    assert response.status_code == 400
+    assert not Order.objects.exists()
+
+
+@pytest.mark.django_db
+def test_in_flight_duplicate_gets_409(auth_client, user, cart, settings):
+    settings.IDEMPOTENCY_WAIT_TIMEOUT = 0.1
+
+    with cache_lock(idempotency_key(user.id, "k-1")):
+        response = auth_client.post("/api/orders/checkout/", HTTP_IDEMPOTENCY_KEY="k-1")
+
+    assert response.status_code == 409
+    assert response["Retry-After"] == "1"
+    assert not Order.objects.exists()
+
+
+@pytest.mark.django_db
+def test_in_flight_duplicate_waits_for_the_first_response(auth_client, user, cart):
+    key = idempotency_key(user.id, "k-1")
+    request = APIRequestFactory().post("/api/orders/checkout/")
+    header, body = render(key, {"id": 42})
+    header.update(status=201, fingerprint=_fingerprint(request))
+
+    with cache_lock(key):
+        # The first request finishes while the duplicate is polling
+        finish = threading.Timer(0.2, set_rendered, (key, (header, body), 60))
+        finish.start()
+        response = auth_client.post("/api/orders/checkout/", HTTP_IDEMPOTENCY_KEY="k-1")
+        finish.join()
+
+    assert response.status_code == 201
+    assert response["Idempotent-Replayed"] == "true"
+    assert response.data == {"id": 42}
@@ -0,0 +1,75 @@
+import io
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from django.utils.translation import gettext_lazy
+from model_bakery import baker
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from orders.models import Order
+from orders.serializers import OrderSerializer
+from utils.parsers import ORJSONParser
+from utils.renderers import ORJSONRenderer
+
+
+def assert_same_bytes(data, media_type=None):
+    expected = JSONRenderer().render(data, media_type)
+    assert ORJSONRenderer().render(data, media_type) == expected
+
+
+@pytest.mark.django_db
+def test_order_payloads_render_identically():
+    for order in baker.make("orders.Order", total_price="1234.50", _quantity=3):
+        baker.make("orders.OrderItem", order=order, price="19.99", _quantity=4)
+    data = OrderSerializer(Order.objects.all(), many=True).data
+    assert_same_bytes(data)
+    assert_same_bytes(data, "application/json; indent=4")
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+        datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=8))),
+        datetime(2025, 1, 2, 3, 4, 5),
+        date(2025, 1, 2),
+        time(3, 4, 5, 6),
+        timedelta(minutes=90),
+        Decimal("10.10"),
+        uuid.UUID(int=7),
+        gettext_lazy("Cart is empty."),
+        ErrorDetail("Invalid.", code="invalid"),
+        "line\u2028separator\u2029",
+        "ünïcødé ✓",
+        {1: ("a", "b"), "nested": [None, True, 1.5]},
+        2**70,
+        None,
+    ],
+)
+def test_values_render_identically(value):
+    assert_same_bytes({"value": value})
+
+
+def test_parser_matches_stock_parser():
+    body = b'{"service_ids": ["a", "\xc3\xbc"], "n": 1.5, "ok": true}'
+    assert ORJSONParser().parse(io.BytesIO(body)) == JSONParser().parse(
+        io.BytesIO(body)
+    )
+
+
+@pytest.mark.parametrize("body", [b"{", b'{"n": NaN}'])
+def test_parser_rejects_invalid_json(body):
+    with pytest.raises(ParseError):
+        ORJSONParser().parse(io.BytesIO(body))
+
+
+def test_parser_falls_back_for_other_charsets():
+    body = '{"name": "caf\xe9"}'.encode("latin-1")
+    parsed = ORJSONParser().parse(
+        io.BytesIO(body), parser_context={"encoding": "latin-1"}
+    )
+    assert parsed == {"name": "caf\xe9"}
@@ -0,0 +1,57 @@
+import pytest
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+from utils.cache_keys import order_detail_key
+from utils.rendered_cache import get_rendered, set_rendered
+
+
+@pytest.fixture
+def order(user):
+    order = baker.make("orders.Order", user=user, status="confirmed")
+    baker.make("orders.OrderItem", order=order, price="10.00", _quantity=2)
+    return order
+
+
+@pytest.mark.django_db
+def test_owner_hit_is_zero_query(auth_client, order, django_assert_num_queries):
+    auth_client.get(f"/api/orders/{order.id}/")  # warm
+
+    with django_assert_num_queries(0):
+        response = auth_client.get(f"/api/orders/{order.id}/")
+    assert response.status_code == 200
+    assert response.data["id"] == order.id
+
+
+@pytest.mark.django_db
+def test_staff_hit_is_zero_query(
+    auth_client, admin_client, order, django_assert_num_queries
+):
+    auth_client.get(f"/api/orders/{order.id}/")  # warmed by the owner
+
+    with django_assert_num_queries(0):
+        response = admin_client.get(f"/api/orders/{order.id}/")
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_cached_order_is_not_served_to_other_users(auth_client, order):
+    auth_client.get(f"/api/orders/{order.id}/")  # warm
+
+    intruder = APIClient()
+    intruder.force_authenticate(user=baker.make("users.User"))
+    assert intruder.get(f"/api/orders/{order.id}/").status_code == 404
+
+
+@pytest.mark.django_db
+def test_tampered_entry_is_ignored(auth_client, order):
+    auth_client.get(f"/api/orders/{order.id}/")  # warm
+    intruder_user = baker.make("users.User")
+    key = order_detail_key(order.id)
+    header, body = get_rendered(key)
+    header["owner"] = intruder_user.id  # signature no longer matches
+    set_rendered(key, (header, body), timeout=300)
+
+    intruder = APIClient()
+    intruder.force_authenticate(user=intruder_user)
+    assert intruder.get(f"/api/orders/{order.id}/").status_code == 404
@@ -0,0 +1,80 @@
+import pytest
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+from orders.models import Order
+
+
+@pytest.mark.django_db
+def test_order_list_is_cursor_paginated(auth_client, user):
+    baker.make("orders.Order", user=user, _quantity=25)
+    baker.make("orders.Order", _quantity=3)  # someone else's
+
+    first = auth_client.get("/api/orders/", {"page_size": 10})
+    assert first.status_code == 200
+    assert len(first.data["results"]) == 10
+    assert first.data["previous"] is None
+
+    seen = [order["id"] for order in first.data["results"]]
+    next_url = first.data["next"]
+    while next_url:
+        page = auth_client.get(next_url)
+        seen += [order["id"] for order in page.data["results"]]
+        next_url = page.data["next"]
+
+    expected = list(
+        Order.objects.filter(user=user)
+        .order_by("-ordered_at", "-id")
+        .values_list("id", flat=True)
+    )
+    assert seen == expected
+
+
+@pytest.mark.django_db
+def test_order_list_page_size_is_bounded(auth_client, user):
+    baker.make("orders.Order", user=user, _quantity=120)
+
+    response = auth_client.get("/api/orders/", {"page_size": 1000})
+    assert len(response.data["results"]) == 100
+
+
+@pytest.mark.django_db
+def test_checkout_invalidates_cached_pages(auth_client, user, mocker):
+    mocker.patch("orders.views.fetch_service", return_value={"name": "X", "price": 5})
+    assert auth_client.get("/api/orders/").data["results"] == []
+
+    auth_client.post("/api/cart/", {"service_id": "svc-1"})
+    auth_client.post("/api/orders/checkout/")
+
+    assert len(auth_client.get("/api/orders/").data["results"]) == 1
+
+
+@pytest.mark.django_db
+def test_staff_status_change_invalidates_owner_and_staff_lists(user, admin_user):
+    order = baker.make("orders.Order", user=user, status="paid")
+    owner, staff = APIClient(), APIClient()
+    owner.force_authenticate(user=user)
+    staff.force_authenticate(user=admin_user)
+
+    # warm both caches
+    assert owner.get("/api/orders/").data["results"][0]["status"] == "paid"
+    assert staff.get("/api/orders/").data["results"][0]["status"] == "paid"
+
+    response = staff.patch(
+        f"/api/orders/{order.id}/update_status/", {"status": "completed"}
+    )
+    assert response.status_code == 200
+
+    assert owner.get("/api/orders/").data["results"][0]["status"] == "completed"
+    assert staff.get("/api/orders/").data["results"][0]["status"] == "completed"
+
+
+@pytest.mark.django_db
+def test_owner_write_invalidates_staff_list(auth_client, admin_client, mocker):
+    mocker.patch("orders.views.fetch_service", return_value={"name": "X", "price": 5})
+    assert admin_client.get("/api/orders/").data["results"] == []
+
+    auth_client.post("/api/cart/", {"service_id": "svc-1"})
+    auth_client.post("/api/orders/checkout/")
+
+    assert len(admin_client.get("/api/orders/").data["results"]) == 1
@@ -0,0 +1,69 @@
+import pytest
+from model_bakery import baker
+
+# Per-endpoint query budgets. Serializing orders must not issue one items
+# query per order; if one of these starts failing, look for a missing
+# prefetch_related/select_related before raising the number.
+
+
+@pytest.fixture
+def orders(user):
+    orders = baker.make("orders.Order", user=user, status="confirmed", _quantity=20)
+    for order in orders:
+        baker.make("orders.OrderItem", order=order, price="10.00", _quantity=3)
+    return orders
+
+
+@pytest.mark.django_db
+def test_order_list_budget(auth_client, orders, django_assert_max_num_queries):
+    with django_assert_max_num_queries(2):
+        response = auth_client.get("/api/orders/")
+    assert len(response.data["results"]) == 20
+
+
+@pytest.mark.django_db
+def test_staff_order_list_budget(admin_client, orders, django_assert_max_num_queries):
+    baker.make("orders.OrderItem", order__status="paid", _quantity=5)
+    with django_assert_max_num_queries(2):
+        response = admin_client.get("/api/orders/")
+    assert len(response.data["results"]) == 20
+
+
+@pytest.mark.django_db
+def test_order_detail_budget(auth_client, orders, django_assert_max_num_queries):
+    with django_assert_max_num_queries(2):
+        response = auth_client.get(f"/api/orders/{orders[0].id}/")
+    assert len(response.data["items"]) == 3
+
+
+@pytest.mark.django_db
+def test_update_status_budget(auth_client, orders, django_assert_max_num_queries):
+    with django_assert_max_num_queries(3):
+        response = auth_client.patch(
+            f"/api/orders/{orders[0].id}/update_status/", {"status": "cancelled"}
+        )
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_pay_budget(auth_client, orders, mocker, django_assert_max_num_queries):
+    mocker.patch("orders.views.trigger_order_confirmation_email")
+    # order, items for the email, insert payment, update order
+    # (+ savepoint/release)
+    with django_assert_max_num_queries(6):
+        response = auth_client.post(
+            f"/api/orders/{orders[0].id}/pay/", {"method": "card"}
+        )
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_checkout_budget(auth_client, user, django_assert_max_num_queries):
+    cart = baker.make("orders.Cart", user=user)
+    baker.make("orders.CartItem", cart=cart, price="10.00", _quantity=5)
+    # lock cart, items + total, insert order, insert items, delete cart
+    # items, items for the response (+ savepoint/release)
+    with django_assert_max_num_queries(8):
+        response = auth_client.post("/api/orders/checkout/")
+    assert response.status_code == 201
+    assert response.data["total_price"] == "50.00"
@@ -0,0 +1,94 @@
+import pytest
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from redis.exceptions import ConnectionError
+
+from orders.models import CartItem, Order, OrderItem
+from utils.cache_keys import cart_items_key
+
+
+@pytest.fixture(autouse=True)
+def redis_carts(settings):
+    settings.CART_BACKEND = "orders.carts.RedisCartBackend"
+    settings.CART_TTL = 600
+
+
+@pytest.fixture
+def catalog(mocker):
+    return mocker.patch(
+        "orders.views.fetch_service",
+        side_effect=lambda sid, client_id=None: {"name": sid.upper(), "price": "5.50"},
+    )
+
+
+@pytest.mark.django_db
+def test_cart_endpoints_never_touch_the_db(
+    auth_client, user, catalog, django_assert_num_queries
+):
+    with django_assert_num_queries(0):
+        added = auth_client.post("/api/cart/", {"service_id": "a"})
+        duplicate = auth_client.post("/api/cart/", {"service_id": "a"})
+        bulk = auth_client.post(
+            "/api/cart/bulk/", {"service_ids": ["b", "a", "c"]}, format="json"
+        )
+        removed = auth_client.delete("/api/cart/b/")
+        missing = auth_client.delete("/api/cart/b/")
+        cart = auth_client.get("/api/cart/")
+
+    assert added.status_code == 201
+    assert set(added.data) == {"id", "service_id", "service_name", "price", "added_at"}
+    assert added.data["price"] == "5.50"
+    assert duplicate.status_code == 409
+    assert [r["status"] for r in bulk.data["results"]] == [
+        "added",
+        "duplicate",
+        "added",
+    ]
+    assert removed.status_code == 204
+    assert missing.status_code == 404
+    assert cart.data["user"] == user.id
+    assert [item["service_id"] for item in cart.data["items"]] == ["a", "c"]
+    assert not CartItem.objects.exists()
+
+    ttl = get_redis_connection("default").ttl(cache.make_key(cart_items_key(user.id)))
+    assert 0 < ttl <= 600
+
+
+@pytest.mark.django_db
+def test_clear_cart(auth_client, catalog):
+    assert auth_client.delete("/api/cart/").status_code == 404
+
+    auth_client.post("/api/cart/", {"service_id": "a"})
+    assert auth_client.delete("/api/cart/").status_code == 204
+    assert auth_client.get("/api/cart/").data["items"] == []
+
+
+@pytest.mark.django_db
+def test_checkout_persists_items_and_empties_the_cart(
+    auth_client, catalog, django_capture_on_commit_callbacks
+):
+    assert auth_client.post("/api/orders/checkout/").status_code == 400
+
+    auth_client.post("/api/cart/bulk/", {"service_ids": ["a", "b"]}, format="json")
+    with django_capture_on_commit_callbacks(execute=True):
+        response = auth_client.post("/api/orders/checkout/")
+
+    assert response.status_code == 201
+    assert response.data["total_price"] == "11.00"
+    assert sorted(
+        OrderItem.objects.filter(order_id=response.data["id"]).values_list(
+            "service_id", flat=True
+        )
+    ) == ["a", "b"]
+    assert auth_client.get("/api/cart/").data["items"] == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_checkout_answers_when_redis_fails_after_commit(auth_client, catalog, mocker):
+    auth_client.post("/api/cart/bulk/", {"service_ids": ["a", "b"]}, format="json")
+    mocker.patch("redis.Redis.hdel", side_effect=ConnectionError("down"))
+
+    response = auth_client.post("/api/orders/checkout/")
+
+    assert response.status_code == 201
+    assert Order.objects.filter(pk=response.data["id"]).exists()
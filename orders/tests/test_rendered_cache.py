@@ -0,0 +1,55 @@
+import json
+
+import pytest
+from model_bakery import baker
+from rest_framework.renderers import JSONRenderer
+
+from orders.serializers import OrderSerializer
+from utils.renderers import ORJSONRenderer
+
+
+@pytest.fixture
+def order(user):
+    order = baker.make("orders.Order", user=user, status="confirmed")
+    baker.make("orders.OrderItem", order=order, price="10.00", _quantity=2)
+    return order
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url", ["/api/cart/", "/api/orders/", "/api/orders/{order.id}/"]
+)
+def test_hits_are_served_without_rendering(
+    auth_client, order, url, mocker, django_assert_num_queries
+):
+    url = url.format(order=order)
+    miss = auth_client.get(url)
+    render = mocker.spy(ORJSONRenderer, "render")
+
+    with django_assert_num_queries(0):
+        hit = auth_client.get(url)
+
+    assert render.call_count == 0
+    assert hit.status_code == 200
+    assert hit["Content-Type"] == "application/json"
+    assert hit.content == miss.content
+
+
+@pytest.mark.django_db
+def test_cached_bytes_match_drf_rendering(auth_client, order):
+    auth_client.get(f"/api/orders/{order.id}/")
+    hit = auth_client.get(f"/api/orders/{order.id}/")
+
+    assert hit.content == JSONRenderer().render(OrderSerializer(order).data)
+
+
+@pytest.mark.django_db
+def test_non_default_rendering_bypasses_the_cache(auth_client, order):
+    auth_client.get(f"/api/orders/{order.id}/")
+
+    response = auth_client.get(
+        f"/api/orders/{order.id}/", HTTP_ACCEPT="application/json; indent=4"
+    )
+
+    assert response.content.startswith(b'{\n    "id"')
+    assert json.loads(response.content)["id"] == order.id
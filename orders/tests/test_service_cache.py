@@ -0,0 +1,184 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from rest_framework.exceptions import ValidationError
+
+from orders.utils.catalog import CatalogUnavailable
+from orders.views import afetch_service, fetch_service, service_cache
+from utils.cache_keys import lock_key, service_key, service_missing_hits_key
+from utils.counters import get_counter
+from utils.singleflight import make_entry
+from utils.tiered_cache import MISS, LocalCache, TieredCache
+
+
+class SlowCatalog:
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.service = {"name": "Premium Plan", "price": "999.99"}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get_service(self, service_id):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return self.service
+
+
+def test_concurrent_misses_make_one_upstream_call(mocker):
+    catalog = SlowCatalog()
+    mocker.patch("orders.views.get_catalog_client", return_value=catalog)
+
+    workers = 20
+    barrier = threading.Barrier(workers)
+
+    def load():
+        barrier.wait()
+        return fetch_service("svc-hot")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda _: load(), range(workers)))
+
+    assert catalog.calls == 1
+    assert all(result["name"] == "Premium Plan" for result in results)
+
+
+def test_concurrent_misses_for_an_unknown_id_make_one_upstream_call(mocker):
+    catalog = SlowCatalog()
+    catalog.service = None
+    mocker.patch("orders.views.get_catalog_client", return_value=catalog)
+
+    workers = 10
+    barrier = threading.Barrier(workers)
+
+    def load():
+        barrier.wait()
+        with pytest.raises(ValidationError):
+            fetch_service("svc-gone")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda _: load(), range(workers)))
+
+    assert catalog.calls == 1
+
+
+def test_stale_entry_served_while_refresh_in_flight(mocker):
+    catalog = SlowCatalog(delay=0)
+    mocker.patch("orders.views.get_catalog_client", return_value=catalog)
+    stale = make_entry({"name": "Old Plan", "price": "1.00"}, timeout=-1)
+    cache.set(service_key("svc-1"), stale, timeout=60)
+
+    # Another worker holds the refresh lock: serve stale, don't call upstream
+    cache.add(lock_key(service_key("svc-1")), "other-worker", timeout=10)
+    assert fetch_service("svc-1")["name"] == "Old Plan"
+    assert catalog.calls == 0
+
+    # Lock released: this caller refreshes the entry
+    cache.delete(lock_key(service_key("svc-1")))
+    assert fetch_service("svc-1")["name"] == "Premium Plan"
+    assert catalog.calls == 1
+
+
+def test_unknown_service_is_negatively_cached(mocker):
+    catalog = mocker.Mock()
+    catalog.get_service.return_value = None
+    mocker.patch("orders.views.get_catalog_client", return_value=catalog)
+
+    for _ in range(3):
+        with pytest.raises(ValidationError):
+            fetch_service("nope", client_id=7)
+
+    assert catalog.get_service.call_count == 1
+    assert get_counter(service_missing_hits_key(7)) == 2
+    assert get_counter(service_missing_hits_key("all")) == 2
+
+
+def test_missing_hits_without_a_client_count_as_anon(mocker):
+    catalog = mocker.Mock()
+    catalog.get_service.return_value = None
+    mocker.patch("orders.views.get_catalog_client", return_value=catalog)
+
+    for _ in range(2):
+        with pytest.raises(ValidationError):
+            fetch_service("nope")
+
+    assert service_missing_hits_key(None) == "service_missing_hits_anon"
+    assert get_counter("service_missing_hits_anon") == 1
+
+
+def test_catalog_outage_is_not_negatively_cached(mocker):
+    catalog = mocker.Mock()
+    catalog.get_service.side_effect = [
+        CatalogUnavailable(),
+        {"name": "Plan", "price": "1.00"},
+    ]
+    mocker.patch("orders.views.get_catalog_client", return_value=catalog)
+
+    with pytest.raises(CatalogUnavailable):
+        fetch_service("svc-1")
+    assert fetch_service("svc-1")["name"] == "Plan"
+
+
+def test_stale_entry_served_when_the_refresh_fails(mocker):
+    catalog = mocker.Mock()
+    catalog.get_service.side_effect = CatalogUnavailable()
+    mocker.patch("orders.views.get_catalog_client", return_value=catalog)
+    async_catalog = mocker.Mock()
+    async_catalog.get_service = mocker.AsyncMock(side_effect=CatalogUnavailable())
+    mocker.patch("orders.views.get_async_catalog_client", return_value=async_catalog)
+    stale = make_entry({"name": "Old Plan", "price": "1.00"}, timeout=-1)
+    cache.set(service_key("svc-1"), stale, timeout=60)
+
+    # This caller wins the refresh, the catalog is down: stale, not a 503
+    assert fetch_service("svc-1")["name"] == "Old Plan"
+    assert async_to_sync(afetch_service)("svc-1")["name"] == "Old Plan"
+    assert catalog.get_service.call_count == 1
+    assert async_catalog.get_service.await_count == 1
+    assert cache.get(service_key("svc-1")) == stale
+
+
+def test_local_tier_serves_repeat_reads_without_redis(mocker):
+    catalog = SlowCatalog(delay=0)
+    mocker.patch("orders.views.get_catalog_client", return_value=catalog)
+    before = service_cache.stats()
+
+    fetch_service("svc-1")
+    cache.delete(service_key("svc-1"))  # L1 still holds it
+    assert fetch_service("svc-1")["name"] == "Premium Plan"
+
+    after = service_cache.stats()
+    assert catalog.calls == 1
+    assert after["l1"]["hits"] - before["l1"]["hits"] == 1
+    assert after["l2"]["misses"] - before["l2"]["misses"] == 1
+
+
+def test_invalidation_is_broadcast_to_other_workers():
+    worker_a = TieredCache("test-broadcast")
+    worker_b = TieredCache("test-broadcast")
+    for worker in (worker_a, worker_b):
+        worker.get_local("k")  # starts the pub/sub listener
+        worker.set_local("k", {"price": "1.00"})
+
+    worker_a.invalidate("k")
+
+    deadline = time.monotonic() + 2
+    while worker_b.local.get("k") is not MISS and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert worker_b.local.get("k") is MISS
+    assert worker_b.invalidations_received >= 1
+
+
+def test_local_cache_respects_memory_cap():
+    local = LocalCache(max_entries=100, max_bytes=400, ttl=30)
+    for i in range(10):
+        local.set(f"k{i}", "x" * 100)
+
+    stats = local.stats()
+    assert stats["bytes"] <= 400
+    assert stats["evictions"] > 0
+    assert local.get("k0") is MISS  # least recently used went first
+    assert local.get("k9") == "x" * 100
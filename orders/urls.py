@@ -1,7 +1,15 @@
 from django.urls import path
 from django.conf import settings
 from rest_framework.routers import DefaultRouter, SimpleRouter
-from .views import CartView, CartItemDeleteView, OrderViewSet
+from .views import CartView, CartBulkView, CartItemDeleteView, OrderViewSet
+
+if settings.ASYNC_VIEWS:
+    # Served by an ASGI worker (see RUNNING.md)
+    from .async_views import (
+        AsyncCartItemDeleteView as CartItemDeleteView,
+        AsyncCartView as CartView,
+        AsyncOrderViewSet as OrderViewSet,
+    )
 
 if settings.DEBUG:
     router = DefaultRouter()
@@ -11,6 +19,7 @@ router.register("orders", OrderViewSet, basename="orders")
 
 urlpatterns = [
     path("cart/", CartView.as_view(), name="cart"),
+    path("cart/bulk/", CartBulkView.as_view(), name="cart-bulk"),
     path(
         "cart/<str:service_id>/", CartItemDeleteView.as_view(), name="cart-item-delete"
     ),
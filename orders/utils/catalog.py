@@ -0,0 +1,401 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from collections import namedtuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class CatalogUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Service catalog is temporarily unavailable."
+    default_code = "catalog_unavailable"
+
+
+CatalogPage = namedtuple("CatalogPage", "services has_next etag not_modified")
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failed calls and rejects
+    every call for `reset_timeout` seconds. After the cool-down a single
+    trial call is let through (half-open); its outcome closes or re-opens
+    the breaker. A trial that never reports back (e.g. a cancelled request)
+    is replaced by a new one after another `reset_timeout`.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trial_started_at = None
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = self._clock()
+            started = (
+                self.opened_at if self.state == self.OPEN else self.trial_started_at
+            )
+            if now - started >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.trial_started_at = now
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self.trial_started_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = self._clock()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+            }
+
+
+class CatalogClient:
+    """
+    HTTP client for the Express service catalog.
+
+    One keep-alive session per instance, (connect, read) timeouts on every
+    request, bounded retries with full-jitter backoff for transport errors
+    and 5xx responses, and a circuit breaker so a failing catalog is not
+    hammered by every worker.
+    """
+
+    def __init__(
+        self,
+        base_url,
+        connect_timeout=2.0,
+        read_timeout=5.0,
+        max_retries=2,
+        backoff_factor=0.2,
+        backoff_max=2.0,
+        pool_maxsize=10,
+        breaker=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.pool_maxsize = pool_maxsize
+        self.breaker = breaker or CircuitBreaker()
+
+        # Retries are handled here so the breaker sees one outcome per call
+        self._adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+
+    def get_service(self, service_id):
+        """Return the service payload, or None if the catalog doesn't know the ID."""
+        response = self.get(f"{self.base_url}/{service_id}")
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise CatalogUnavailable()
+        return response.json()
+
+    def list_services(self, page=1, page_size=100, updated_since=None, etag=None):
+        """
+        One page of the catalog listing. `updated_since` (ISO timestamp) and
+        `etag` (If-None-Match) let the upstream answer with only what changed,
+        or with 304 when nothing did; upstreams that ignore them simply
+        return the full page.
+        """
+        params = {"page": page, "limit": page_size}
+        if updated_since:
+            params["updated_since"] = updated_since
+        headers = {"If-None-Match": etag} if etag else {}
+        response = self.get(self.base_url, params=params, headers=headers)
+
+        if response.status_code == 304:
+            return CatalogPage([], False, etag, True)
+        if response.status_code != 200:
+            raise CatalogUnavailable()
+
+        body = response.json()
+        if isinstance(body, list):
+            services, has_next = body, len(body) >= page_size
+        else:
+            services = body.get("data") or body.get("results") or []
+            has_next = bool(body.get("next")) or (
+                "next" not in body and len(services) >= page_size
+            )
+        return CatalogPage(services, has_next, response.headers.get("ETag"), False)
+
+    def get(self, url, **kwargs):
+        if not self.breaker.allow():
+            raise CatalogUnavailable()
+
+        with self._lock:
+            self.calls += 1
+
+        try:
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    with self._lock:
+                        self.retries += 1
+                    time.sleep(self._backoff(attempt))
+                try:
+                    response = self.session.get(url, timeout=self.timeout, **kwargs)
+                except requests.RequestException:
+                    continue
+                if response.status_code < 500:
+                    break
+            else:
+                response = None
+        except BaseException:
+            # Whatever ends the call, the breaker must hear about it: a
+            # half-open trial that never reports keeps everyone else out
+            self.breaker.record_failure()
+            raise
+
+        return self._answered(response)
+
+    def _answered(self, response):
+        if response is not None and (
+            response.status_code < 400 or response.status_code == 404
+        ):
+            self.breaker.record_success()
+            return response
+        # No response, 5xx on every attempt, or a 4xx that says nothing
+        # about the service (401/403 misconfigured, 429 rate limited)
+        self.breaker.record_failure()
+        raise CatalogUnavailable()
+
+    def _backoff(self, attempt):
+        return random.uniform(
+            0, min(self.backoff_max, self.backoff_factor * 2 ** (attempt - 1))
+        )
+
+    def stats(self):
+        container = self._adapter.poolmanager.pools
+        pools = [container[key] for key in container.keys()]
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "pool": {
+                "maxsize": self.pool_maxsize,
+                "hosts": len(pools),
+                "connections_opened": sum(p.num_connections for p in pools),
+                "requests_sent": sum(p.num_requests for p in pools),
+                "idle": sum(
+                    1 for p in pools for conn in list(p.pool.queue) if conn is not None
+                ),
+            },
+            "breaker": self.breaker.stats(),
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def build_catalog_client():
+    options = settings.CATALOG_CLIENT
+    return CatalogClient(
+        settings.EXPRESS_SERVICE_URL,
+        connect_timeout=options["CONNECT_TIMEOUT"],
+        read_timeout=options["READ_TIMEOUT"],
+        max_retries=options["MAX_RETRIES"],
+        backoff_factor=options["BACKOFF_FACTOR"],
+        pool_maxsize=options["POOL_MAXSIZE"],
+        breaker=CircuitBreaker(
+            failure_threshold=options["BREAKER_FAILURE_THRESHOLD"],
+            reset_timeout=options["BREAKER_RESET_TIMEOUT"],
+        ),
+    )
+
+
+def get_catalog_client():
+    """
+    Per-process client. Rebuilt after a fork so gunicorn workers never
+    share pooled sockets with the master.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = build_catalog_client()
+                _client_pid = pid
+    return _client
+
+
+def reset_catalog_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+    # Async clients share its breaker; let them be rebuilt with the new one
+    for loop, client in list(_async_clients.items()):
+        _close_async_client(loop, client)
+    _async_clients.clear()
+
+
+def _close_async_client(loop, client):
+    """Close `client`'s connection pool on the event loop it belongs to."""
+    if loop.is_closed():
+        return  # nothing left to run aclose() on
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        _closing.add(task := loop.create_task(client.aclose()))
+        task.add_done_callback(_closing.discard)
+    elif loop.is_running():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+    else:
+        loop.run_until_complete(client.aclose())
+
+
+class AsyncCatalogClient:
+    """
+    asyncio counterpart of CatalogClient for the async views: an httpx
+    AsyncClient (keep-alive pool), the same timeouts, retries and backoff,
+    and the process's circuit breaker, so sync and async requests trip
+    and respect the same breaker.
+    """
+
+    def __init__(
+        self,
+        base_url,
+        connect_timeout=2.0,
+        read_timeout=5.0,
+        max_retries=2,
+        backoff_factor=0.2,
+        backoff_max=2.0,
+        max_connections=100,
+        keepalive=10,
+        breaker=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=keepalive,
+            ),
+        )
+        self.calls = 0
+        self.retries = 0
+
+    async def get_service(self, service_id):
+        """Return the service payload, or None if the catalog doesn't know the ID."""
+        response = await self.get(f"{self.base_url}/{service_id}")
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise CatalogUnavailable()
+        return response.json()
+
+    async def get(self, url, **kwargs):
+        if not self.breaker.allow():
+            raise CatalogUnavailable()
+
+        self.calls += 1
+        try:
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    self.retries += 1
+                    await asyncio.sleep(self._backoff(attempt))
+                try:
+                    response = await self.client.get(url, **kwargs)
+                except httpx.HTTPError:
+                    continue
+                if response.status_code < 500:
+                    break
+            else:
+                response = None
+        except BaseException:
+            # Includes CancelledError when an ASGI client disconnects
+            self.breaker.record_failure()
+            raise
+
+        return self._answered(response)
+
+    _answered = CatalogClient._answered
+    _backoff = CatalogClient._backoff
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> AsyncCatalogClient
+_closing = set()  # aclose() tasks, referenced until they finish
+
+
+def get_async_catalog_client():
+    """
+    Per-event-loop client (an httpx pool can't be shared across loops);
+    shares the breaker of this process's sync client.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        options = settings.CATALOG_CLIENT
+        client = _async_clients[loop] = AsyncCatalogClient(
+            settings.EXPRESS_SERVICE_URL,
+            connect_timeout=options["CONNECT_TIMEOUT"],
+            read_timeout=options["READ_TIMEOUT"],
+            max_retries=options["MAX_RETRIES"],
+            backoff_factor=options["BACKOFF_FACTOR"],
+            max_connections=options["ASYNC_MAX_CONNECTIONS"],
+            keepalive=options["POOL_MAXSIZE"],
+            breaker=get_catalog_client().breaker,
+        )
+    return client
@@ -1,38 +1,127 @@
-import threading
-import requests
+import functools
+import json
+
 from django.conf import settings
-from django.template.loader import render_to_string
+from django.template.loader import get_template
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
 
+from orders.models import EmailOutbox
 
-def send_order_confirmation_via_mailgun(email, order_data):
-    subject = "Payment Confirmation - Your Subscription is Paid"
+ORDER_CONFIRMATION_SUBJECT = "Payment Confirmation - Your Subscription is Paid"
 
-    # Render templates
-    text_message = render_to_string(
-        "emails/order_confirmation.txt", {"email": email, "order": order_data}
-    )
 
-    html_message = render_to_string(
-        "emails/order_confirmation.html", {"email": email, "order": order_data}
-    )
+@functools.lru_cache(maxsize=None)
+def compiled_template(name):
+    # Looked up and compiled once per process; render_to_string goes
+    # through the template loaders on every call
+    return get_template(name)
+
+
+def render(name, context):
+    return compiled_template(name).render(context)
+
 
-    # Send via Mailgun API
-    requests.post(
-        f"{settings.ANYMAIL['MAILGUN_API_URL']}/{settings.ANYMAIL['MAILGUN_SENDER_DOMAIN']}/messages",
-        auth=("api", settings.ANYMAIL["MAILGUN_API_KEY"]),
-        data={
-            "from": f"FinMark by Imperionite <{settings.DEFAULT_FROM_EMAIL}>",
-            "to": [email],
-            "subject": subject,
-            "text": text_message,
-            "html": html_message,
+def _order_variables(email, order_data):
+    """Everything that differs between two order confirmations."""
+    items = order_data.get("items", [])
+    return {
+        "email": email,
+        "email_html": escape(email),
+        "total": str(order_data.get("total", "")),
+        "items_text": render("emails/order_items.txt", {"items": items}),
+        "items_html": render("emails/order_items.html", {"items": items}),
+    }
+
+
+def _order_bodies(variables):
+    # The .txt templates turn autoescaping off
+    text = render(
+        "emails/order_confirmation.txt",
+        {
+            "email": variables["email"],
+            "total": variables["total"],
+            "items": variables["items_text"],
+        },
+    )
+    html = render(
+        "emails/order_confirmation.html",
+        {
+            "email": mark_safe(variables["email_html"]),
+            "total": variables["total"],
+            "items": mark_safe(variables["items_html"]),
         },
-        timeout=10,
+    )
+    return text, html
+
+
+def build_order_confirmation(email, order_data):
+    """Mailgun message fields for a payment confirmation."""
+    text, html = _order_bodies(_order_variables(email, order_data))
+    return {
+        "from": f"FinMark by Imperionite <{settings.DEFAULT_FROM_EMAIL}>",
+        "to": [email],
+        "subject": ORDER_CONFIRMATION_SUBJECT,
+        "text": text,
+        "html": html,
+    }
+
+
+# Bodies rendered once per batch; Mailgun fills these in per recipient
+_ORDER_PLACEHOLDERS = {
+    name: f"%recipient.{name}%"
+    for name in ("email", "email_html", "total", "items_text", "items_html")
+}
+
+
+def build_order_confirmation_batch(recipients):
+    """
+    One Mailgun batch message for [(email, order_data), ...]. Each address
+    may appear only once: Mailgun keys recipient-variables by address.
+    """
+    text, html = _order_bodies(_ORDER_PLACEHOLDERS)
+    return {
+        "from": f"FinMark by Imperionite <{settings.DEFAULT_FROM_EMAIL}>",
+        "to": [email for email, _ in recipients],
+        "subject": ORDER_CONFIRMATION_SUBJECT,
+        "text": text,
+        "html": html,
+        "recipient-variables": json.dumps(
+            {email: _order_variables(email, data) for email, data in recipients}
+        ),
+    }
+
+
+# EmailOutbox.kind -> builder(to_email, payload) returning Mailgun fields
+EMAIL_BUILDERS = {
+    "order_confirmation": build_order_confirmation,
+}
+
+# EmailOutbox.kind -> builder([(to_email, payload), ...]) for kinds that
+# can go out as one Mailgun batch message
+BATCH_EMAIL_BUILDERS = {
+    "order_confirmation": build_order_confirmation_batch,
+}
+
+
+def build_email(message):
+    return EMAIL_BUILDERS[message.kind](message.to_email, message.payload)
+
+
+def build_email_batch(messages):
+    """Mailgun fields for messages of one kind, batched where supported."""
+    if len(messages) == 1:
+        return build_email(messages[0])
+    return BATCH_EMAIL_BUILDERS[messages[0].kind](
+        [(message.to_email, message.payload) for message in messages]
     )
 
 
-def trigger_order_confirmation_email(email, order_data):
-    thread = threading.Thread(
-        target=send_order_confirmation_via_mailgun, args=(email, order_data)
+def trigger_order_confirmation_email(email, order_data, order=None):
+    """
+    Queue the confirmation in the outbox. Call it inside the transaction
+    that records the payment; orders.utils.outbox sends it after commit.
+    """
+    return EmailOutbox.objects.create(
+        kind="order_confirmation", to_email=email, payload=order_data, order=order
     )
-    thread.start()
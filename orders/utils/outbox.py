@@ -0,0 +1,321 @@
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from orders.models import EmailOutbox
+from orders.utils.email import BATCH_EMAIL_BUILDERS, build_email_batch
+
+logger = logging.getLogger(__name__)
+
+# Mailgun accepts at most this many recipients per batch message
+MAILGUN_MAX_RECIPIENTS = 1000
+
+
+class MailgunError(Exception):
+    """A failed send. `retryable` is False when retrying cannot help (4xx)."""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class MailgunClient:
+    """
+    Mailgun messages API over one keep-alive session, shared by the
+    dispatcher's worker threads (the pool holds one connection per worker).
+    """
+
+    def __init__(
+        self,
+        api_url,
+        domain,
+        api_key,
+        connect_timeout=2.0,
+        read_timeout=10.0,
+        pool_maxsize=4,
+    ):
+        self.messages_url = f"{api_url.rstrip('/')}/{domain}/messages"
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_maxsize = pool_maxsize
+
+        self._adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0
+        )
+        self.session = requests.Session()
+        self.session.auth = ("api", api_key)
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+
+    def send(self, data):
+        try:
+            response = self.session.post(
+                self.messages_url, data=data, timeout=self.timeout
+            )
+        except requests.RequestException as exc:
+            raise MailgunError(f"{type(exc).__name__}: {exc}") from exc
+
+        if response.status_code < 400:
+            return
+        error = f"HTTP {response.status_code}: {response.text[:500]}"
+        # 429 and 5xx are transient; other 4xx mean the message itself is bad
+        raise MailgunError(
+            error,
+            retryable=response.status_code == 429 or response.status_code >= 500,
+        )
+
+    def stats(self):
+        container = self._adapter.poolmanager.pools
+        pools = [container[key] for key in container.keys()]
+        return {
+            "maxsize": self.pool_maxsize,
+            "connections_opened": sum(p.num_connections for p in pools),
+            "requests_sent": sum(p.num_requests for p in pools),
+        }
+
+    def close(self):
+        self.session.close()
+
+
+class OutboxDispatcher:
+    """
+    Drains EmailOutbox with a fixed pool of sender threads.
+
+    Each batch claims at most `batch_size` due messages (row locks with
+    SKIP LOCKED where the database has them, so several dispatchers can
+    run side by side) and leases them for `lease` seconds; a dispatcher
+    that dies mid-batch leaves them to be picked up again after that.
+    Messages of a kind with a batch builder share one Mailgun call (with
+    recipient-variables), up to `recipients_per_call` distinct addresses
+    each; the rest go out one call per message. The next batch is only
+    claimed once the current one is done, so the work in flight never
+    exceeds one batch no matter how deep the backlog gets; the backlog
+    shows up in stats() instead.
+
+    Failed sends are retried with full-jitter exponential backoff until
+    `max_attempts`, then marked failed. Delivery is at least once.
+    """
+
+    def __init__(
+        self,
+        client,
+        workers=4,
+        batch_size=None,
+        recipients_per_call=1,
+        max_attempts=8,
+        backoff_factor=30.0,
+        backoff_max=3600.0,
+        lease=300,
+    ):
+        self.client = client
+        self.workers = workers
+        self.batch_size = batch_size or workers * 2
+        self.recipients_per_call = max(
+            1, min(recipients_per_call, MAILGUN_MAX_RECIPIENTS)
+        )
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.lease = timedelta(seconds=lease)
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="email-outbox"
+        )
+        self._lock = threading.Lock()
+        self.counts = {
+            "batches": 0,
+            "api_calls": 0,
+            "sent": 0,
+            "retried": 0,
+            "failed": 0,
+        }
+
+    def claim(self):
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                EmailOutbox.objects.select_for_update(skip_locked=True)
+                .filter(status="pending", next_attempt_at__lte=now)
+                .order_by("next_attempt_at")
+                .values_list("id", flat=True)[: self.batch_size]
+            )
+            EmailOutbox.objects.filter(id__in=ids).update(
+                next_attempt_at=now + self.lease
+            )
+        return list(EmailOutbox.objects.filter(id__in=ids))
+
+    def dispatch_batch(self):
+        """Send one batch of due messages. Returns how many were claimed."""
+        messages = self.claim()
+        if not messages:
+            return 0
+
+        futures = {
+            self._pool.submit(self._send, job): job for job in self._jobs(messages)
+        }
+        sent = []
+        for future in as_completed(futures):
+            error = future.exception()
+            if error is not None:
+                self._record_failure(futures[future], error)
+                continue
+            delivered, failures = future.result()
+            sent.extend(delivered)
+            for job, job_error in failures:
+                self._record_failure(job, job_error)
+        # One UPDATE for the whole batch rather than one per message
+        self._record_sent(sent)
+
+        self._count("batches", 1)
+        return len(messages)
+
+    def _jobs(self, messages):
+        """Group claimed messages into lists that each go out in one call."""
+        jobs = []
+        open_jobs = {}  # kind -> [(messages, addresses)] still taking recipients
+        for message in messages:
+            if (
+                self.recipients_per_call == 1
+                or message.kind not in BATCH_EMAIL_BUILDERS
+            ):
+                jobs.append([message])
+                continue
+            address = message.to_email.lower()
+            for job, addresses in open_jobs.setdefault(message.kind, []):
+                # recipient-variables are keyed by address: one message each
+                if len(job) < self.recipients_per_call and address not in addresses:
+                    job.append(message)
+                    addresses.add(address)
+                    break
+            else:
+                job = [message]
+                open_jobs[message.kind].append((job, {address}))
+                jobs.append(job)
+        return jobs
+
+    def drain(self):
+        """Dispatch batches until nothing is due. Returns the number claimed."""
+        total = 0
+        while claimed := self.dispatch_batch():
+            total += claimed
+        return total
+
+    def _send(self, job):
+        """
+        Send `job` in one call. Returns (sent messages, [(messages, error)]).
+
+        A rejected (non-retryable) batch is split in halves and each half
+        resent: the 4xx usually comes from one bad recipient, which must
+        not fail everyone else it was batched with.
+        """
+        self._count("api_calls", 1)
+        try:
+            self.client.send(build_email_batch(job))
+        except MailgunError as error:
+            if error.retryable or len(job) == 1:
+                return [], [(job, error)]
+            middle = len(job) // 2
+            first_sent, first_failed = self._send(job[:middle])
+            second_sent, second_failed = self._send(job[middle:])
+            return first_sent + second_sent, first_failed + second_failed
+        return job, []
+
+    def _record_sent(self, messages):
+        EmailOutbox.objects.filter(pk__in=[message.pk for message in messages]).update(
+            status="sent",
+            sent_at=timezone.now(),
+            attempts=F("attempts") + 1,
+            last_error="",
+        )
+        self._count("sent", len(messages))
+
+    def _record_failure(self, messages, error):
+        retryable = getattr(error, "retryable", True)
+        retry = [
+            m for m in messages if retryable and m.attempts + 1 < self.max_attempts
+        ]
+        give_up = [m for m in messages if m not in retry]
+
+        if retry:
+            attempts = max(message.attempts for message in retry) + 1
+            EmailOutbox.objects.filter(pk__in=[m.pk for m in retry]).update(
+                attempts=F("attempts") + 1,
+                next_attempt_at=timezone.now()
+                + timedelta(seconds=self._backoff(attempts)),
+                last_error=str(error),
+            )
+            self._count("retried", len(retry))
+        if give_up:
+            EmailOutbox.objects.filter(pk__in=[m.pk for m in give_up]).update(
+                status="failed", attempts=F("attempts") + 1, last_error=str(error)
+            )
+            self._count("failed", len(give_up))
+            for message in give_up:
+                logger.error(
+                    "Giving up on email %s to %s after %s attempts: %s",
+                    message.pk,
+                    message.to_email,
+                    message.attempts + 1,
+                    error,
+                )
+
+    def _count(self, outcome, n):
+        with self._lock:
+            self.counts[outcome] += n
+
+    def _backoff(self, attempt):
+        return random.uniform(
+            0, min(self.backoff_max, self.backoff_factor * 2 ** (attempt - 1))
+        )
+
+    def stats(self):
+        now = timezone.now()
+        pending = EmailOutbox.objects.filter(status="pending")
+        oldest = pending.filter(next_attempt_at__lte=now).aggregate(
+            created=Min("created_at")
+        )["created"]
+        with self._lock:
+            counts = dict(self.counts)
+        return {
+            **counts,
+            "workers": self.workers,
+            "batch_size": self.batch_size,
+            # backpressure: what is waiting and for how long
+            "backlog": pending.filter(next_attempt_at__lte=now).count(),
+            "scheduled_retries": pending.filter(next_attempt_at__gt=now).count(),
+            "oldest_due_age": (now - oldest).total_seconds() if oldest else 0.0,
+            "pool": self.client.stats(),
+        }
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        self.client.close()
+
+
+def build_outbox_dispatcher(**overrides):
+    options = {**settings.EMAIL_OUTBOX, **overrides}
+    client = MailgunClient(
+        settings.ANYMAIL["MAILGUN_API_URL"],
+        settings.ANYMAIL["MAILGUN_SENDER_DOMAIN"],
+        settings.ANYMAIL["MAILGUN_API_KEY"],
+        connect_timeout=options["CONNECT_TIMEOUT"],
+        read_timeout=options["READ_TIMEOUT"],
+        pool_maxsize=options["WORKERS"],
+    )
+    return OutboxDispatcher(
+        client,
+        workers=options["WORKERS"],
+        batch_size=options["BATCH_SIZE"],
+        recipients_per_call=options["RECIPIENTS_PER_CALL"],
+        max_attempts=options["MAX_ATTEMPTS"],
+        backoff_factor=options["BACKOFF_FACTOR"],
+        backoff_max=options["BACKOFF_MAX"],
+        lease=options["LEASE"],
+    )
@@ -7,54 +7,212 @@ from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import action
 from django.db import transaction
-import requests
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor
+import time
 
-from .models import Cart, CartItem, Order, OrderItem, Payment
+from .carts import CART_CACHE_TTL, get_cart_backend
+from .models import Order, OrderItem, Payment
+from .pagination import OrderCursorPagination
 from .serializers import (
-    CartSerializer,
-    CartItemSerializer,
+    CartBulkAddSerializer,
     OrderSerializer,
     OrderStatusUpdateSerializer,
     PaymentSerializer,
 )
-from utils.cache_keys import cart_key, orders_list_key, order_detail_key, service_key
+from utils.cache_keys import (
+    cart_key,
+    cart_version_key,
+    checkout_key,
+    orders_generation_key,
+    orders_list_key,
+    order_detail_key,
+    service_key,
+    service_missing_key,
+    service_missing_hits_key,
+)
+from utils.async_redis import aget, aset
+from utils.cache_versions import bump_generations, get_generation
+from utils.idempotency import idempotent
+from utils.locks import cache_lock
+from utils.counters import incr_counter
+from utils.rendered_cache import (
+    cacheable,
+    get_or_render,
+    get_rendered,
+    render,
+    respond,
+    set_rendered,
+)
+from utils.singleflight import is_entry
+from utils.tiered_cache import MISS, TieredCache
 
+from orders.utils.catalog import (
+    CatalogUnavailable,
+    get_async_catalog_client,
+    get_catalog_client,
+)
 from orders.utils.email import trigger_order_confirmation_email
 
-EXPRESS_SERVICE_URL = settings.EXPRESS_SERVICE_URL
+service_cache = TieredCache(
+    "service",
+    max_entries=settings.SERVICE_LOCAL_CACHE["MAX_ENTRIES"],
+    max_bytes=settings.SERVICE_LOCAL_CACHE["MAX_BYTES"],
+    ttl=settings.SERVICE_LOCAL_CACHE["TTL"],
+)
+
+SERVICE_CACHE_TTL = 3600  # Cache for 1 hour
+SERVICE_STALE_TTL = 600  # then serve stale for up to 10 minutes while refreshing
+SERVICE_MISSING_TTL = 60
+SERVICE_MISSING_HITS_WINDOW = 3600
+
+
+BULK_FETCH_WORKERS = 8
+UNAVAILABLE = object()
+
+
+def record_service_missing_hit(client_id):
+    # Per-client tally, to spot retry loops and scrapers. A fixed window:
+    # each counter resets an hour after its first hit
+    incr_counter(service_missing_hits_key(client_id), SERVICE_MISSING_HITS_WINDOW)
+    incr_counter(service_missing_hits_key("all"), SERVICE_MISSING_HITS_WINDOW)
+
+
+def fetch_service(service_id, client_id=None):
+    # Known-unknown IDs are answered from Redis without touching the catalog
+    if cache.get(service_missing_key(service_id)):
+        record_service_missing_hit(client_id)
+        raise ValidationError(f"Service with ID {service_id} not found.")
+
+    # L1 (in-process) first, then Redis. Single-flight: one worker per
+    # service_id talks to the catalog on a miss, and an expired entry keeps
+    # being served while one refresh runs
+    data = service_cache.get_or_load(
+        service_key(service_id),
+        lambda: load_service(service_id),
+        timeout=SERVICE_CACHE_TTL,
+        stale_timeout=SERVICE_STALE_TTL,
+        # Workers waiting on a lookup that found nothing don't repeat it
+        missing_key=service_missing_key(service_id),
+    )
+    if data is not None:
+        return data
+
+    raise ValidationError(f"Service with ID {service_id} not found.")
+
 
+def load_service(service_id):
+    # Raises CatalogUnavailable (503) on timeouts, 5xx or an open breaker.
+    # Only a definitive "not found" from the catalog is negatively cached,
+    # so an outage is never remembered as a missing service.
+    data = get_catalog_client().get_service(service_id)
+    if data is None:
+        cache.set(service_missing_key(service_id), True, timeout=SERVICE_MISSING_TTL)
+    return data
 
-def fetch_service(service_id):
-    key = service_key(service_id)
-    cached = cache.get(key)
-    if cached:
-        return cached
 
-    response = requests.get(f"{EXPRESS_SERVICE_URL}/{service_id}")
-    if response.status_code == 200:
-        data = response.json()
-        cache.set(key, data, timeout=3600)  # Cache for 1 hour
+async def afetch_service(service_id, client_id=None):
+    """fetch_service for the async views: async Redis and catalog client."""
+    if await aget(service_missing_key(service_id)):
+        await sync_to_async(record_service_missing_hit, thread_sensitive=False)(
+            client_id
+        )
+        raise ValidationError(f"Service with ID {service_id} not found.")
+
+    data = await service_cache.aget_or_load(
+        service_key(service_id),
+        lambda: aload_service(service_id),
+        timeout=SERVICE_CACHE_TTL,
+        stale_timeout=SERVICE_STALE_TTL,
+        missing_key=service_missing_key(service_id),
+    )
+    if data is not None:
         return data
 
     raise ValidationError(f"Service with ID {service_id} not found.")
 
 
+async def aload_service(service_id):
+    data = await get_async_catalog_client().get_service(service_id)
+    if data is None:
+        await aset(service_missing_key(service_id), True, SERVICE_MISSING_TTL)
+    return data
+
+
+def fetch_services(service_ids, client_id=None):
+    """
+    Resolve many services at once. L1 hits are served in-process; fresh
+    Redis entries and negative markers come from a single get_many; the rest
+    are fetched concurrently through fetch_service (single-flight,
+    stale-while-revalidate).
+
+    Returns {service_id: data}, with None for unknown IDs. Services the
+    catalog couldn't answer for are left out.
+    """
+    resolved = {}
+    remote_ids = []
+    for sid in service_ids:
+        value = service_cache.get_local(service_key(sid))
+        if value is MISS:
+            remote_ids.append(sid)
+        else:
+            resolved[sid] = value
+
+    keys = [service_key(sid) for sid in remote_ids]
+    missing_keys = [service_missing_key(sid) for sid in remote_ids]
+    cached = cache.get_many(keys + missing_keys) if remote_ids else {}
+
+    pending = []
+    now = time.time()
+    for sid, key, missing_key in zip(remote_ids, keys, missing_keys):
+        entry = cached.get(key)
+        if is_entry(entry) and entry["fresh_until"] > now:
+            resolved[sid] = entry["value"]
+            service_cache.set_local(key, entry["value"])
+        elif cached.get(missing_key):
+            record_service_missing_hit(client_id)
+            resolved[sid] = None
+        else:
+            pending.append(sid)
+
+    def load(sid):
+        try:
+            return sid, fetch_service(sid, client_id=client_id)
+        except ValidationError:
+            return sid, None
+        except CatalogUnavailable:
+            return sid, UNAVAILABLE
+
+    if pending:
+        with ThreadPoolExecutor(
+            max_workers=min(len(pending), BULK_FETCH_WORKERS)
+        ) as pool:
+            for sid, data in pool.map(load, pending):
+                if data is not UNAVAILABLE:
+                    resolved[sid] = data
+
+    return resolved
+
+
 class CartView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        key = cart_key(request.user.id)
-        cached = cache.get(key)
-        if cached:
-            return Response(cached)
-
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        serialized = CartSerializer(cart).data
-        cache.set(key, serialized, timeout=300)
-        return Response(serialized)
+        backend = get_cart_backend()
+        if not cacheable(request):
+            return Response(backend.get(request.user))
+
+        user_id = request.user.id
+        entry = get_or_render(
+            cart_key(user_id),
+            cart_version_key(user_id),
+            lambda: backend.get(request.user),
+            CART_CACHE_TTL,
+        )
+        return respond(entry, request)
 
     def post(self, request):
-        cart, _ = Cart.objects.get_or_create(user=request.user)
+        backend = get_cart_backend()
         service_id = request.data.get("service_id")
 
         if not service_id:
@@ -62,85 +220,149 @@ class CartView(APIView):
                 {"detail": "Missing service_id"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        if cart.items.filter(service_id=service_id).exists():
+        if backend.contains(request.user, [service_id]):
             return Response(
                 {"detail": "Service already in cart."}, status=status.HTTP_409_CONFLICT
             )
 
-        service = fetch_service(service_id)
-        item = CartItem.objects.create(
-            cart=cart,
-            service_id=service_id,
-            service_name=service.get("name"),
-            price=service.get("price"),
-        )
-        cache.delete(cart_key(request.user.id))
-        return Response(CartItemSerializer(item).data, status=status.HTTP_201_CREATED)
+        service = fetch_service(service_id, client_id=request.user.id)
+        added = backend.add(request.user, {service_id: service})
+        if not added:
+            return Response(
+                {"detail": "Service already in cart."}, status=status.HTTP_409_CONFLICT
+            )
+        return Response(added[0], status=status.HTTP_201_CREATED)
 
     def delete(self, request):
-        cart = Cart.objects.filter(user=request.user).first()
-        if cart:
-            cart.items.all().delete()
-            cache.delete(cart_key(request.user.id))
+        if get_cart_backend().clear(request.user):
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response({"detail": "Cart not found."}, status=status.HTTP_404_NOT_FOUND)
 
 
+class CartBulkView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = CartBulkAddSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        service_ids = serializer.validated_data["service_ids"]
+
+        backend = get_cart_backend()
+        in_cart = backend.contains(request.user, service_ids)
+        candidates = [sid for sid in dict.fromkeys(service_ids) if sid not in in_cart]
+        services = fetch_services(candidates, client_id=request.user.id)
+
+        results = []
+        to_add = {}
+        seen = set()
+        for sid in service_ids:
+            if sid in in_cart or sid in seen:
+                outcome = "duplicate"
+            elif sid not in services:
+                outcome = "unavailable"
+            elif services[sid] is None:
+                outcome = "not_found"
+            else:
+                outcome = "added"
+                to_add[sid] = services[sid]
+            seen.add(sid)
+            results.append({"service_id": sid, "status": outcome})
+
+        if not to_add:
+            return Response(
+                {"results": results, "items": []}, status=status.HTTP_200_OK
+            )
+
+        added = backend.add(request.user, to_add)
+        return Response(
+            {"results": results, "items": added},
+            status=status.HTTP_201_CREATED,
+        )
+
+
 class CartItemDeleteView(APIView):
     permission_classes = [IsAuthenticated]
 
     def delete(self, request, service_id):
-        cart = Cart.objects.filter(user=request.user).first()
-        if not cart:
+        removed = get_cart_backend().remove(request.user, service_id)
+        if removed is None:
             return Response(
                 {"detail": "Cart not found."}, status=status.HTTP_404_NOT_FOUND
             )
 
-        item = cart.items.filter(service_id=service_id).first()
-        if not item:
+        if not removed:
             return Response(
                 {"detail": "Item not in cart."}, status=status.HTTP_404_NOT_FOUND
             )
 
-        item.delete()
-        cache.delete(cart_key(request.user.id))
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+def invalidate_orders(owner_id):
+    # O(1): the owner's pages and the staff pages all embed one of these
+    bump_generations(orders_generation_key(owner_id), orders_generation_key())
+
+
 class OrderViewSet(viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = None
+    pagination_class = OrderCursorPagination
 
     def get_queryset(self):
         user = self.request.user
+        # items are serialized for every order: fetch them in one extra query
+        queryset = Order.objects.prefetch_related("items").order_by("-ordered_at")
+        if self.action == "pay":
+            # the confirmation email goes to the owner's address
+            queryset = queryset.select_related("user")
         if user.is_staff:
-            return Order.objects.all().order_by("-ordered_at")
-        return Order.objects.filter(user=user).order_by("-ordered_at")
+            return queryset
+        return queryset.filter(user=user)
 
     def list(self, request, *args, **kwargs):
-        key = orders_list_key(request.user.id)
-        cached = cache.get(key)
-        if cached:
-            return Response(cached)
-
-        queryset = self.get_queryset()
-        serialized = self.get_serializer(queryset, many=True).data
-        cache.set(key, serialized, timeout=300)
-        return Response(serialized)
+        if not cacheable(request):
+            return super().list(request, *args, **kwargs)
+
+        # Cache per page rather than the whole history. Staff share one
+        # view of all orders; everyone else gets their own.
+        scope = None if request.user.is_staff else request.user.id
+        key = orders_list_key(
+            scope,
+            get_generation(orders_generation_key(scope)),
+            request.query_params.get(self.paginator.cursor_query_param),
+            self.paginator.get_page_size(request),
+        )
+        entry = get_rendered(key) or self.render_page(key)
+        return respond(entry, request)
+
+    def render_page(self, key):
+        page = self.paginate_queryset(self.get_queryset())
+        serialized = self.get_paginated_response(
+            self.get_serializer(page, many=True).data
+        ).data
+        entry = render(key, serialized)
+        set_rendered(key, entry, timeout=300)
+        return entry
 
     def retrieve(self, request, *args, **kwargs):
-        order_id = kwargs.get("pk")
-        key = order_detail_key(order_id)
-        cached = cache.get(key)
-        if cached:
-            return Response(cached)
+        if not cacheable(request):
+            return super().retrieve(request, *args, **kwargs)
+
+        key = order_detail_key(kwargs.get("pk"))
+        # A hit is authorized in memory from the signed owner stored with
+        # it; anyone else falls through to get_object(), which 404s like a
+        # cache miss
+        entry = get_rendered(key)
+        if entry and (
+            request.user.is_staff or entry[0].get("owner") == request.user.id
+        ):
+            return respond(entry, request)
 
         order = self.get_object()
-        serialized = self.get_serializer(order).data
-        cache.set(key, serialized, timeout=300)
-        return Response(serialized)
+        entry = render(key, self.get_serializer(order).data, owner=order.user_id)
+        set_rendered(key, entry, timeout=300)
+        return respond(entry, request)
 
     @action(detail=True, methods=["patch"], permission_classes=[IsAuthenticated])
     def update_status(self, request, pk=None):
@@ -166,7 +388,7 @@ class OrderViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-        elif order.user == request.user:
+        elif order.user_id == request.user.id:
             if requested_status == "completed" and order.status != "paid":
                 return Response(
                     {"detail": "Only paid orders can be marked as completed."},
@@ -192,45 +414,54 @@ class OrderViewSet(viewsets.ModelViewSet):
             )
 
         order.status = requested_status
-        order.save()
+        order.save(update_fields=["status"])
         cache.delete(order_detail_key(pk))
-        cache.delete(orders_list_key(request.user.id))
+        invalidate_orders(order.user_id)
         return Response(OrderSerializer(order).data, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated])
+    @idempotent
     def checkout(self, request):
-        cart = Cart.objects.filter(user=request.user).first()
-        if not cart or not cart.items.exists():
-            return Response(
-                {"detail": "Cart is empty."}, status=status.HTTP_400_BAD_REQUEST
-            )
-
-        with transaction.atomic():
-            order = Order.objects.create(user=request.user, status="confirmed")
-            order_items = [
-                OrderItem(
-                    order=order,
-                    service_id=item.service_id,
-                    service_name=item.service_name,
-                    price=item.price,
+        # Fast-fail a double submit before it queues on the cart row lock;
+        # the lock is also the only guard for carts that live in Redis
+        with cache_lock(checkout_key(request.user.id), timeout=30) as acquired:
+            if not acquired:
+                return Response(
+                    {"detail": "Checkout already in progress."},
+                    status=status.HTTP_409_CONFLICT,
                 )
-                for item in cart.items.all()
-            ]
-            OrderItem.objects.bulk_create(order_items)
-            order.total_price = sum(item.price for item in order_items)
-            order.save()
-            cart.items.all().delete()
-            cache.delete(cart_key(request.user.id))
-
-        serializer = OrderSerializer(order)
-        cache.delete(orders_list_key(request.user.id))
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+            backend = get_cart_backend()
+            with transaction.atomic():
+                with backend.checkout(request.user) as (cart_items, total):
+                    if not cart_items:
+                        return Response(
+                            {"detail": "Cart is empty."},
+                            status=status.HTTP_400_BAD_REQUEST,
+                        )
+
+                    order = Order.objects.create(
+                        user=request.user, status="confirmed", total_price=total
+                    )
+                    OrderItem.objects.bulk_create(
+                        OrderItem(
+                            order=order,
+                            service_id=item["service_id"],
+                            service_name=item["service_name"],
+                            price=item["price"],
+                        )
+                        for item in cart_items
+                    )
+
+        invalidate_orders(request.user.id)
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
+    @idempotent
     def pay(self, request, pk=None):
         order = self.get_object()
 
-        if order.user != request.user and not request.user.is_staff:
+        if order.user_id != request.user.id and not request.user.is_staff:
             return Response(
                 {"detail": "You do not own this order."},
                 status=status.HTTP_403_FORBIDDEN,
@@ -245,19 +476,6 @@ class OrderViewSet(viewsets.ModelViewSet):
         serializer = PaymentSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        Payment.objects.create(
-            order=order,
-            method=serializer.validated_data["method"],
-            amount=order.total_price,
-            reference_id=serializer.validated_data.get("reference_id"),
-        )
-
-        order.status = "paid"
-        order.save()
-
-        cache.delete(order_detail_key(pk))
-        cache.delete(orders_list_key(order.user.id))
-
         order_data = {
             "items": [
                 {
@@ -270,8 +488,22 @@ class OrderViewSet(viewsets.ModelViewSet):
             "total": order.total_price,
         }
 
-        # Trigger email confirmation via Thread + Mailgun API direct call
-        # Comment out for load testing
-        trigger_order_confirmation_email(order.user.email, order_data)
+        with transaction.atomic():
+            Payment.objects.create(
+                order=order,
+                method=serializer.validated_data["method"],
+                amount=order.total_price,
+                reference_id=serializer.validated_data.get("reference_id"),
+            )
+
+            order.status = "paid"
+            order.save(update_fields=["status"])
+
+            # Queued in the same transaction, so the email exists if and only
+            # if the payment does; manage.py dispatch_email_outbox sends it
+            trigger_order_confirmation_email(order.user.email, order_data, order=order)
+
+        cache.delete(order_detail_key(pk))
+        invalidate_orders(order.user_id)
 
         return Response(OrderSerializer(order).data, status=status.HTTP_200_OK)
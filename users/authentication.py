@@ -0,0 +1,95 @@
+"""
+JWT authentication without a users-table query per request.
+
+SimpleJWT's JWTAuthentication loads the User row on every authenticated
+request, so even a cached GET of /api/cart/ costs one query. Here the
+fields requests actually look at are kept in a TieredCache (in-process
+L1 in front of Redis) and the User is rebuilt with User.from_db. Every
+other field is deferred: reading one loads the row, and save() writes
+only the fields that were loaded, so the cached instance can't clobber a
+password or profile change.
+
+The entry also carries the email_verified flag (users.verification), so
+IsEmailVerified needs no query either.
+
+Entries are dropped whenever a user is saved or deleted, and when one of
+their email addresses changes or is confirmed (users.signals); that
+covers deactivation through UserDeactivateView. A missing user is never
+cached.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from users.verification import with_email_verified
+from utils.cache_keys import user_auth_key
+from utils.tiered_cache import TieredCache
+
+# What authentication, permissions and the views read off request.user
+CACHED_FIELDS = ("id", "username", "email", "is_active", "is_staff", "is_superuser")
+
+user_cache = TieredCache(
+    "user_auth",
+    max_entries=settings.USER_AUTH_CACHE["MAX_ENTRIES"],
+    ttl=settings.USER_AUTH_CACHE["LOCAL_TTL"],
+)
+
+
+def load_user_state(user_id):
+    return (
+        with_email_verified(
+            get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+        )
+        .values(*CACHED_FIELDS, "email_verified")
+        .first()
+    )
+
+
+def get_cached_user(user_id):
+    """The user with CACHED_FIELDS loaded and the rest deferred, or None."""
+    state = user_cache.get_or_load(
+        user_auth_key(user_id),
+        lambda: load_user_state(user_id),
+        timeout=settings.USER_AUTH_CACHE["TTL"],
+        # A deactivated user must not be served from a stale entry
+        stale_timeout=0,
+    )
+    if state is None:
+        return None
+    User = get_user_model()
+    # from_db takes the values in the model's field order
+    names = [f.attname for f in User._meta.concrete_fields if f.attname in state]
+    user = User.from_db(DEFAULT_DB_ALIAS, names, [state[name] for name in names])
+    if "email_verified" in state:
+        user.email_verified = state["email_verified"]
+    return user
+
+
+def invalidate_user(user_id):
+    user_cache.invalidate(user_auth_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Compares against the password hash, which isn't cached
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return user
@@ -0,0 +1,112 @@
+"""
+Argon2 with its parameters in settings and its work off the request path.
+
+Every login (LoginThrottleView, djoser's jwt/create) and every password
+change spends ~100 MB and tens of milliseconds of CPU in Argon2. Done in
+the gunicorn worker, a burst of logins takes the CPU from everything
+else the worker serves. PooledArgon2PasswordHasher hands encode() and
+verify() to a small per-process pool (settings.PASSWORD_HASHING) whose
+processes run at a lower priority: at most WORKERS hashes run at once
+per web worker, the rest queue, and the scheduler serves order requests
+first.
+
+The algorithm name stays "argon2", so existing hashes verify unchanged.
+The time/memory/parallelism costs are read from settings; Django's
+must_update() compares them with the stored hash and check_password()
+rehashes on the next successful login when they differ.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _lower_priority(niceness):
+    os.nice(niceness)
+
+
+def get_hashing_pool():
+    """
+    Per-process pool, or None when WORKERS is 0. Rebuilt after a fork so
+    gunicorn workers never share the master's pool.
+    """
+    global _pool, _pool_pid
+    options = settings.PASSWORD_HASHING
+    if not options["WORKERS"]:
+        return None
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ProcessPoolExecutor(
+                    max_workers=options["WORKERS"],
+                    # Not fork: the web worker has threads (and locks) of its own
+                    mp_context=multiprocessing.get_context("forkserver"),
+                    initializer=_lower_priority,
+                    initargs=(options["NICE"],),
+                )
+                _pool_pid = pid
+    return _pool
+
+
+def reset_hashing_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def run_hashing(fn, *args):
+    pool = get_hashing_pool()
+    if pool is None:
+        return fn(*args)
+    try:
+        return pool.submit(fn, *args).result()
+    except BrokenProcessPool:
+        # A pool process died (e.g. OOM-killed); answer this login here
+        # and start a fresh pool for the next one
+        logger.warning("Password hashing pool broke, hashing inline", exc_info=True)
+        reset_hashing_pool()
+        return fn(*args)
+
+
+class PooledArgon2PasswordHasher(Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_HASHING["ARGON2_TIME_COST"]
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_HASHING["ARGON2_MEMORY_COST"]
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_HASHING["ARGON2_PARALLELISM"]
+
+    def argon2(self):
+        # What runs in the pool: Django's own hasher with these costs,
+        # which pickles without needing settings in the pool process
+        hasher = Argon2PasswordHasher()
+        hasher.time_cost = self.time_cost
+        hasher.memory_cost = self.memory_cost
+        hasher.parallelism = self.parallelism
+        return hasher
+
+    def encode(self, password, salt):
+        return run_hashing(self.argon2().encode, password, salt)
+
+    def verify(self, password, encoded):
+        return run_hashing(self.argon2().verify, password, encoded)
@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from .verification import is_email_verified
+
 
 class IsOwnerOrAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -27,8 +29,5 @@ class IsEmailVerified(permissions.BasePermission):
         return bool(
             request.user
             and request.user.is_authenticated
-            and getattr(request.user, "emailaddress_set", None)
-            and request.user.emailaddress_set.filter(
-                primary=True, verified=True
-            ).exists()
+            and is_email_verified(request.user)
         )
@@ -1,16 +1,16 @@
 from rest_framework import serializers
 from dj_rest_auth.serializers import UserDetailsSerializer
-from allauth.account.models import EmailAddress
+
+from .verification import is_email_verified
 
 
 class CustomUserDetailsSerializer(UserDetailsSerializer):
     email_verified = serializers.SerializerMethodField()
 
     def get_email_verified(self, obj):
-        # Check if the user's email is verified using allauth's EmailAddress model
-        return EmailAddress.objects.filter(
-            user=obj, email=obj.email, verified=True
-        ).exists()
+        # No query for users from with_email_verified() querysets or the
+        # auth cache; one EXISTS otherwise
+        return is_email_verified(obj)
 
     class Meta(UserDetailsSerializer.Meta):
         fields = UserDetailsSerializer.Meta.fields + (
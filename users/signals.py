@@ -0,0 +1,28 @@
+from allauth.account.models import EmailAddress
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import CACHED_FIELDS, invalidate_user
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def drop_cached_user(sender, instance, update_fields=None, **kwargs):
+    # e.g. the last_login update on every token login changes nothing cached
+    if update_fields is not None and not set(update_fields) & set(CACHED_FIELDS):
+        return
+    # After commit, or a request racing the transaction re-caches the old row
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+@receiver(post_save, sender=EmailAddress)
+@receiver(post_delete, sender=EmailAddress)
+def drop_cached_email_verified(sender, instance, **kwargs):
+    # The cached auth state carries the user's email_verified flag. allauth
+    # saves the address when it confirms it; only the admin's bulk "mark
+    # verified" action (a queryset update) waits out USER_AUTH_CACHE["TTL"]
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_user(user_id))
@@ -0,0 +1,99 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.authentication import get_cached_user
+
+
+def bearer(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    return client
+
+
+@pytest.mark.django_db
+def test_cached_gets_are_zero_query(user, django_assert_num_queries):
+    client = bearer(user)
+    client.get("/api/cart/")
+    client.get("/api/orders/")
+
+    with django_assert_num_queries(0):
+        cart = client.get("/api/cart/")
+        orders = client.get("/api/orders/")
+
+    assert (cart.status_code, orders.status_code) == (200, 200)
+
+
+@pytest.mark.django_db
+def test_deactivation_takes_effect_immediately(
+    user, admin_user, django_capture_on_commit_callbacks
+):
+    client = bearer(user)
+    assert client.get("/api/cart/").status_code == 200
+
+    url = reverse("users-retrieve-deactivate", kwargs={"username": user.username})
+    with django_capture_on_commit_callbacks(execute=True):
+        assert bearer(admin_user).delete(url).status_code == 204
+
+    response = client.get("/api/cart/")
+    assert response.status_code == 401
+    assert response.data["code"] == "user_inactive"
+
+
+@pytest.mark.django_db
+def test_saves_and_deletes_refresh_the_entry(user, django_capture_on_commit_callbacks):
+    assert not get_cached_user(user.id).is_staff
+
+    user.is_staff = True
+    with django_capture_on_commit_callbacks(execute=True):
+        user.save()
+    assert get_cached_user(user.id).is_staff
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.delete()
+    assert get_cached_user(user.id) is None
+
+
+@pytest.mark.django_db
+def test_last_login_updates_keep_the_entry(
+    user, django_capture_on_commit_callbacks, django_assert_num_queries
+):
+    get_cached_user(user.id)
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        user.save(update_fields=["last_login"])
+
+    assert callbacks == []
+    with django_assert_num_queries(0):
+        get_cached_user(user.id)
+
+
+@pytest.mark.django_db
+def test_uncached_fields_are_deferred(user, django_assert_num_queries):
+    user.set_password("s3cret-pass")
+    user.first_name = "Ada"
+    user.save()
+
+    cached = get_cached_user(user.id)
+    with django_assert_num_queries(1):
+        assert cached.first_name == "Ada"
+
+    # Only the loaded fields are written back
+    cached = get_cached_user(user.id)
+    cached.email = "new@example.com"
+    cached.save()
+    user.refresh_from_db()
+    assert user.email == "new@example.com"
+    assert user.check_password("s3cret-pass")
+
+
+@pytest.mark.django_db
+def test_unknown_user_is_rejected(user):
+    client = bearer(user)
+    user.delete()
+
+    response = client.get("/api/cart/")
+
+    assert response.status_code == 401
+    assert response.data["code"] == "user_not_found"
@@ -0,0 +1,86 @@
+import pytest
+from allauth.account.models import EmailAddress
+from django.contrib.auth import get_user_model
+from model_bakery import baker
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.authentication import get_cached_user
+from users.permissions import IsEmailVerified
+from users.serializers import CustomUserDetailsSerializer
+from users.verification import with_email_verified
+
+User = get_user_model()
+
+
+def add_address(user, verified):
+    return EmailAddress.objects.create(
+        user=user, email=user.email, primary=True, verified=verified
+    )
+
+
+def guarded(user):
+    request = APIRequestFactory().get("/")
+    request.user = user
+    return IsEmailVerified().has_permission(request, None)
+
+
+@pytest.mark.django_db
+def test_user_list_serializes_in_one_query(django_assert_num_queries):
+    users = baker.make("users.User", _quantity=10)
+    for user in users[:4]:
+        add_address(user, verified=True)
+    add_address(users[4], verified=False)
+
+    with django_assert_num_queries(1):
+        data = CustomUserDetailsSerializer(
+            with_email_verified(User.objects.order_by("pk")), many=True
+        ).data
+
+    assert [row["email_verified"] for row in data] == [True] * 4 + [False] * 6
+
+
+@pytest.mark.django_db
+def test_only_the_current_address_counts(user):
+    baker.make(EmailAddress, user=user, email="old@example.com", verified=True)
+
+    assert not with_email_verified(User.objects.filter(pk=user.pk)).get().email_verified
+    assert not CustomUserDetailsSerializer(user).data["email_verified"]
+
+
+@pytest.mark.django_db
+def test_permission_reads_the_cached_flag(
+    user, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    address = add_address(user, verified=False)
+    get_cached_user(user.id)
+
+    with django_assert_num_queries(0):
+        assert not guarded(get_cached_user(user.id))
+
+    # allauth's confirmation saves the address, which drops the entry
+    with django_capture_on_commit_callbacks(execute=True):
+        address.set_verified(commit=True)
+
+    assert guarded(get_cached_user(user.id))
+
+
+@pytest.mark.django_db
+def test_permission_without_a_cached_flag(user):
+    add_address(user, verified=True)
+    assert guarded(User.objects.get(pk=user.pk))
+
+
+@pytest.mark.django_db
+def test_current_user_details(user, django_assert_num_queries):
+    add_address(user, verified=True)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    client.get("/api/users/auth/user/")
+
+    with django_assert_num_queries(1):
+        response = client.get("/api/users/auth/user/")
+
+    assert response.status_code == 200
+    assert response.data["email_verified"] is True
+    assert response.data["date_joined"] is not None
@@ -0,0 +1,73 @@
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework.test import APIClient
+
+from users import hashers
+
+CHEAP = {
+    "WORKERS": 0,
+    "NICE": 10,
+    "ARGON2_TIME_COST": 1,
+    "ARGON2_MEMORY_COST": 1024,
+    "ARGON2_PARALLELISM": 1,
+}
+
+
+@pytest.fixture
+def argon2(settings):
+    settings.PASSWORD_HASHING = dict(CHEAP)
+    yield settings.PASSWORD_HASHING
+    hashers.reset_hashing_pool()
+
+
+def costs(encoded):
+    decoded = hashers.PooledArgon2PasswordHasher().decode(encoded)
+    return decoded["time_cost"], decoded["memory_cost"], decoded["parallelism"]
+
+
+def test_costs_come_from_settings(argon2):
+    encoded = make_password("s3cret-pass")
+
+    assert encoded.startswith("argon2$")
+    assert costs(encoded) == (1, 1024, 1)
+    assert check_password("s3cret-pass", encoded)
+
+
+@pytest.mark.django_db
+def test_login_rehashes_when_the_costs_change(argon2, user):
+    user.set_password("s3cret-pass")
+    user.save()
+
+    argon2["ARGON2_TIME_COST"] = 2
+    response = APIClient().post(
+        "/api/users/auth/login/",
+        {"username": user.username, "password": "s3cret-pass"},
+    )
+
+    assert response.status_code == 200
+    user.refresh_from_db()
+    assert costs(user.password) == (2, 1024, 1)
+    assert user.check_password("s3cret-pass")
+
+
+def test_hashing_runs_in_the_pool(argon2):
+    argon2["WORKERS"] = 1
+    encoded = make_password("s3cret-pass")
+
+    pool = hashers.get_hashing_pool()
+    assert len(pool._processes) == 1
+    assert check_password("s3cret-pass", encoded)
+    assert not check_password("wrong", encoded)
+
+
+def test_broken_pool_hashes_inline(argon2, mocker):
+    argon2["WORKERS"] = 1
+    pool = mocker.Mock()
+    pool.submit.side_effect = BrokenProcessPool
+    mocker.patch("users.hashers.get_hashing_pool", return_value=pool)
+    reset = mocker.patch("users.hashers.reset_hashing_pool")
+
+    assert check_password("s3cret-pass", make_password("s3cret-pass"))
+    assert reset.called
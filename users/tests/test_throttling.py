@@ -0,0 +1,123 @@
+import itertools
+
+import pytest
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from model_bakery import baker
+from redis.exceptions import ConnectionError
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+
+from utils.throttling import AnonRateThrottle, UserRateThrottle, gcra_script
+
+NOW = 1_800_000_000.0
+addresses = (f"10.0.{n // 250}.{n % 250 + 1}" for n in itertools.count())
+
+
+@pytest.fixture
+def rates(mocker):
+    # The login route also runs the default "user" throttle (keyed by
+    # address for anonymous requests); keep it out of the way
+    mocker.patch.dict(
+        AnonRateThrottle.THROTTLE_RATES, {"anon": "3/min", "user": "1000/min"}
+    )
+    gcra_script.cache_clear()
+    yield
+    gcra_script.cache_clear()
+
+
+@pytest.fixture
+def clock(mocker):
+    timer = mocker.Mock(return_value=NOW)
+    mocker.patch.object(AnonRateThrottle, "timer", timer)
+    mocker.patch.object(UserRateThrottle, "timer", timer)
+    return timer
+
+
+@pytest.fixture
+def address():
+    # A client no other test has throttled, with no state left behind
+    address = next(addresses)
+    cache.delete_many(
+        [f"throttle_gcra_{scope}_{address}" for scope in ("anon", "user")]
+    )
+    return address
+
+
+def login(client):
+    return client.post(
+        "/api/users/auth/login/", {"username": "nobody", "password": "wrong"}
+    )
+
+
+def anonymous_request(address):
+    request = APIRequestFactory().get("/", REMOTE_ADDR=address)
+    request.user = None
+    return request
+
+
+@pytest.mark.django_db
+def test_login_is_throttled_per_client(rates, clock, address):
+    client = APIClient(REMOTE_ADDR=address)
+    assert [login(client).status_code for _ in range(3)] == [400] * 3
+
+    response = login(client)
+    assert response.status_code == 429
+    # One request back every 60s / 3
+    assert response["Retry-After"] == "20"
+
+    other = APIClient(REMOTE_ADDR=next(addresses))
+    assert login(other).status_code == 400
+
+
+@pytest.mark.django_db
+def test_allowance_refills_at_the_rate(rates, clock, address):
+    client = APIClient(REMOTE_ADDR=address)
+    for _ in range(3):
+        login(client)
+    assert login(client).status_code == 429
+
+    clock.return_value = NOW + 20
+    assert login(client).status_code == 400
+    assert login(client).status_code == 429
+
+
+@pytest.mark.django_db
+def test_state_is_one_number_per_client(rates, clock, address, mocker):
+    mocker.patch.dict(AnonRateThrottle.THROTTLE_RATES, {"anon": "10000/day"})
+    throttle = AnonRateThrottle()
+    request = anonymous_request(address)
+    for n in range(500):
+        clock.return_value = NOW + n
+        assert throttle.allow_request(request, APIView())
+
+    key = cache.make_key(throttle.key)
+    assert get_redis_connection("default").strlen(key) < 20
+    assert 0 < get_redis_connection("default").pttl(key) <= 86_400_000
+
+
+@pytest.mark.django_db
+def test_user_throttle_keys_by_user(rates, clock, mocker):
+    mocker.patch.dict(UserRateThrottle.THROTTLE_RATES, {"user": "2/s"})
+    throttle = UserRateThrottle()
+    first, second = baker.make("users.User", _quantity=2)
+
+    def allowed(user):
+        request = APIRequestFactory().get("/")
+        request.user = user
+        return throttle.allow_request(request, APIView())
+
+    assert [allowed(first) for _ in range(3)] == [True, True, False]
+    assert throttle.wait() == 0.5
+    assert allowed(second)
+
+
+@pytest.mark.django_db
+def test_redis_outage_lets_requests_through(rates, address, mocker):
+    mocker.patch(
+        "utils.throttling.gcra_script",
+        return_value=mocker.Mock(side_effect=ConnectionError),
+    )
+    client = APIClient(REMOTE_ADDR=address)
+
+    assert [login(client).status_code for _ in range(5)] == [400] * 5
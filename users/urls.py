@@ -2,6 +2,7 @@ from django.urls import path, include
 # from dj_rest_auth.registration.views import VerifyEmailView
 
 from .views import (
+    CurrentUserDetailsView,
     UserDeactivateView,
     LoginThrottleView,
     DelayedRedirectConfirmEmailView,
@@ -9,6 +10,9 @@ from .views import (
 
 urlpatterns = [
     # dj-rest-auth
+    path(
+        "auth/user/", CurrentUserDetailsView.as_view(), name="rest_user_details"
+    ),  # ahead of the default, which it replaces
     path("auth/", include("dj_rest_auth.urls")),  # default dj-rest-auth URLs
     path(
         "auth/login/", LoginThrottleView.as_view(), name="rest_login"
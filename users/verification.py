@@ -0,0 +1,36 @@
+"""
+Whether a user's email address is verified: their current email has a
+verified allauth EmailAddress.
+
+Computed once and carried on the instance as `email_verified`, either as
+an Exists() annotation (with_email_verified) or from the cached auth
+state CachedJWTAuthentication builds users from. The serializer and
+IsEmailVerified read it through is_email_verified(), which only queries
+for instances that carry neither.
+"""
+
+from allauth.account.models import EmailAddress
+from django.db.models import Exists, OuterRef
+
+
+def email_verified():
+    return Exists(
+        EmailAddress.objects.filter(
+            user=OuterRef("pk"), email=OuterRef("email"), verified=True
+        )
+    )
+
+
+def with_email_verified(queryset):
+    """User queryset with `email_verified` computed in the same query."""
+    return queryset.annotate(email_verified=email_verified())
+
+
+def is_email_verified(user):
+    verified = getattr(user, "email_verified", None)
+    if verified is None:
+        verified = EmailAddress.objects.filter(
+            user=user, email=user.email, verified=True
+        ).exists()
+        user.email_verified = verified
+    return verified
@@ -5,18 +5,19 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.authentication import TokenAuthentication
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework.throttling import AnonRateThrottle
+from utils.throttling import AnonRateThrottle
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from allauth.socialaccount.providers.oauth2.client import OAuth2Client
 from dj_rest_auth.registration.views import SocialLoginView
-from dj_rest_auth.views import LoginView
+from dj_rest_auth.views import LoginView, UserDetailsView
 from allauth.account.views import ConfirmEmailView
 from django.shortcuts import render
 
 
+from .authentication import CachedJWTAuthentication
 from .serializers import CustomUserDetailsSerializer
 from .permissions import IsOwnerOrAdmin
+from .verification import with_email_verified
 
 
 User = get_user_model()
@@ -45,7 +46,7 @@ class GoogleLogin(SocialLoginView):
 # Just a soft-delete or deactivation through delete
 class UserDeactivateView(generics.DestroyAPIView):
     permission_classes = [IsOwnerOrAdmin, IsAuthenticated]
-    authentication_classes = [JWTAuthentication, TokenAuthentication]
+    authentication_classes = [CachedJWTAuthentication, TokenAuthentication]
     serializer_class = CustomUserDetailsSerializer
     lookup_field = "username"
     queryset = User.objects.all()
@@ -56,6 +57,15 @@ class UserDeactivateView(generics.DestroyAPIView):
         instance.save()
 
 
+class CurrentUserDetailsView(UserDetailsView):
+    def get_object(self):
+        # request.user may be the partial instance CachedJWTAuthentication
+        # builds; load the full row and email_verified in one query
+        return with_email_verified(
+            User.objects.filter(pk=self.request.user.pk)
+        ).get()
+
+
 class DelayedRedirectConfirmEmailView(ConfirmEmailView):
     def get(self, *args, **kwargs):
         self.object = self.get_object()
@@ -0,0 +1,102 @@
+"""
+asyncio access to the django-redis "default" cache, for the async views.
+
+One redis.asyncio client per event loop, pointed at the same server and
+database as the cache, using its key prefix and encoding values with its
+serializer and compressor (utils.redis_cache.CompactClient), so sync and
+async code read and write the same entries.
+
+Like the cache (IGNORE_EXCEPTIONS), Redis errors are logged and treated
+as misses; aadd() returns None so callers can tell "down" from "taken".
+
+The client can be tuned with OPTIONS["ASYNC_CONNECTION_POOL_KWARGS"]
+(e.g. max_connections, or fakeredis' async connection class in tests).
+"""
+
+import asyncio
+import logging
+import weakref
+
+from django.conf import settings
+from django.core.cache import cache
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+_clients = weakref.WeakKeyDictionary()  # event loop -> Redis
+
+
+def get_async_redis():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        config = settings.CACHES["default"]
+        options = config.get("OPTIONS", {})
+        kwargs = dict(options.get("ASYNC_CONNECTION_POOL_KWARGS", {}))
+        if options.get("PASSWORD"):
+            kwargs["password"] = options["PASSWORD"]
+        client = _clients[loop] = Redis.from_url(config["LOCATION"], **kwargs)
+    return client
+
+
+async def aget_raw(key):
+    try:
+        return await get_async_redis().get(cache.make_key(key))
+    except RedisError:
+        logger.warning("Redis GET %s failed", key, exc_info=True)
+        return None
+
+
+async def aget(key, default=None):
+    raw = await aget_raw(key)
+    return default if raw is None else cache.client.decode(raw)
+
+
+async def aget_many(keys):
+    keys = list(keys)
+    if not keys:
+        return {}
+    try:
+        values = await get_async_redis().mget([cache.make_key(key) for key in keys])
+    except RedisError:
+        logger.warning("Redis MGET failed", exc_info=True)
+        return {}
+    return {
+        key: cache.client.decode(raw)
+        for key, raw in zip(keys, values)
+        if raw is not None
+    }
+
+
+async def aset_raw(key, raw, timeout):
+    try:
+        await get_async_redis().set(cache.make_key(key), raw, ex=timeout)
+    except RedisError:
+        logger.warning("Redis SET %s failed", key, exc_info=True)
+
+
+async def aset(key, value, timeout):
+    await aset_raw(key, cache.client.encode_for(key, value), timeout)
+
+
+async def aadd(key, value, timeout):
+    """SET NX. True if stored, False if the key exists, None if Redis is down."""
+    try:
+        stored = await get_async_redis().set(
+            cache.make_key(key),
+            cache.client.encode_for(key, value),
+            ex=timeout,
+            nx=True,
+        )
+    except RedisError:
+        logger.warning("Redis SET NX %s failed", key, exc_info=True)
+        return None
+    return bool(stored)
+
+
+async def adelete(key):
+    try:
+        await get_async_redis().delete(cache.make_key(key))
+    except RedisError:
+        logger.warning("Redis DEL %s failed", key, exc_info=True)
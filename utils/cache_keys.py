@@ -1,9 +1,49 @@
+import hashlib
+
+
 def cart_key(user_id):
     return f"cart_user_{user_id}"
 
 
-def orders_list_key(user_id):
-    return f"orders_list_user_{user_id}"
+def cart_version_key(user_id):
+    # Bumped by every cart write; a rebuild that saw an older value is discarded
+    return f"cart_version_user_{user_id}"
+
+
+def cart_items_key(user_id):
+    # Redis hash holding the whole cart (RedisCartBackend)
+    return f"cart_items_user_{user_id}"
+
+
+def checkout_key(user_id):
+    # Held (via utils.locks) while a checkout for this user is in flight
+    return f"checkout_user_{user_id}"
+
+
+def orders_generation_key(user_id=None):
+    # Bumped on every order write: per owner, and globally for staff views
+    if user_id is None:
+        return "orders_gen_all"
+    return f"orders_gen_user_{user_id}"
+
+
+def orders_list_key(user_id, generation, cursor=None, page_size=None):
+    # One entry per page. user_id=None is the staff view of all orders.
+    # Bumping the generation orphans every page at once; they expire on their own.
+    scope = "all" if user_id is None else f"user_{user_id}"
+    return f"orders_list_{scope}_g{generation}_{cursor or 'first'}_{page_size}"
+
+
+def idempotency_key(user_id, key):
+    # Stored response for a client's Idempotency-Key. The client's value is
+    # hashed: it is arbitrary text and only has to be unique per user.
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f"idempotency_user_{user_id}_{digest}"
+
+
+def user_auth_key(user_id):
+    # Auth state of a user (users.authentication.CachedJWTAuthentication)
+    return f"user_auth_{user_id}"
 
 
 def order_detail_key(order_id):
@@ -12,3 +52,42 @@ def order_detail_key(order_id):
 
 def service_key(service_id):
     return f"service_{service_id}"
+
+
+def lock_key(key):
+    return f"lock_{key}"
+
+
+def service_missing_key(service_id):
+    return f"service_missing_{service_id}"
+
+
+def service_missing_hits_key(client_id):
+    # Requests without a client id (anonymous) share one counter
+    if client_id is None:
+        client_id = "anon"
+    return f"service_missing_hits_{client_id}"
+
+
+def catalog_sync_key():
+    return "catalog_sync_state"
+
+
+def catalog_ids_key():
+    # Every service id the last full catalog sync wrote
+    return "catalog_sync_ids"
+
+
+# Families whose values are always a few bytes (flags, lock tokens,
+# counters, sync state): the cache client never tries to compress them
+UNCOMPRESSED_KEY_PREFIXES = (
+    "lock_",
+    "service_missing_",
+    "orders_gen_",
+    "cart_version_",
+    "catalog_sync_state",
+)
+
+
+def is_compressible(key):
+    return not key.startswith(UNCOMPRESSED_KEY_PREFIXES)
@@ -0,0 +1,36 @@
+import time
+
+from django.core.cache import cache
+
+from utils.async_redis import aadd, aget
+
+
+def _seed():
+    # A counter that was evicted restarts from a value it never had before,
+    # so keys built from an older generation can't be served again.
+    return time.time_ns() // 1000
+
+
+def get_generation(key):
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _seed(), timeout=None)
+        generation = cache.get(key)
+    return generation or 0
+
+
+async def aget_generation(key):
+    generation = await aget(key)
+    if generation is None:
+        await aadd(key, _seed(), None)
+        generation = await aget(key)
+    return generation or 0
+
+
+def bump_generations(*keys):
+    """Atomically advance each generation counter (Redis INCR)."""
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _seed(), timeout=None)
@@ -0,0 +1,20 @@
+from django.core.cache import cache
+
+
+def incr_counter(key, timeout):
+    """
+    Increment a Redis counter that resets `timeout` seconds after its first
+    hit (a fixed window). Returns the new value, or None if Redis is down.
+    """
+    if cache.add(key, 1, timeout=timeout):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Window expired between add() and incr()
+        cache.set(key, 1, timeout=timeout)
+        return 1
+
+
+def get_counter(key):
+    return cache.get(key, 0)
@@ -0,0 +1,126 @@
+"""
+Idempotency-Key support for unsafe DRF actions.
+
+A client that may retry a POST (timeouts, flaky mobile networks, double
+clicks) sends a unique `Idempotency-Key` header with it. The first
+request with a given key runs the action; its successful response is
+stored in Redis for IDEMPOTENCY_TTL seconds and replayed, with an
+`Idempotent-Replayed: true` header, to every retry carrying the same
+key. A retry that arrives while the first request is still running waits
+up to IDEMPOTENCY_WAIT_TIMEOUT seconds for its response, then gets 409.
+
+Keys are scoped to the user. Reusing a key for a different request
+(another endpoint or another body) is a client bug and gets 422.
+
+Only 2xx responses are stored: errors either had no side effects
+("Cart is empty.", validation) or are transient (409), so retrying them
+runs the action again. Requests without the header are not affected,
+and when Redis is unreachable the action runs as if it had none.
+
+    @action(detail=False, methods=["post"])
+    @idempotent
+    def checkout(self, request): ...
+"""
+
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.http.request import RawPostDataException
+from rest_framework import status
+from rest_framework.response import Response
+
+from utils.cache_keys import idempotency_key
+from utils.locks import cache_lock
+from utils.rendered_cache import get_rendered, render, respond, set_rendered
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+# How often a waiting duplicate looks for the first request's response
+POLL_INTERVAL = 0.05
+
+
+def _fingerprint(request):
+    try:
+        body = request.body
+    except RawPostDataException:
+        # The stream was already consumed; fall back to the parsed data
+        body = repr(sorted(request.data.items())).encode()
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.get_full_path().encode(), body):
+        digest.update(part + b"\n")
+    return digest.hexdigest()
+
+
+def _replay(entry, fingerprint):
+    header = entry[0]
+    if header.get("fingerprint") != fingerprint:
+        return Response(
+            {"detail": f"This {HEADER} was already used for a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = respond(entry, status=header["status"])
+    response[REPLAYED_HEADER] = "true"
+    return response
+
+
+def _wait_for(key, fingerprint):
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = get_rendered(key)
+        if entry is not None:
+            return _replay(entry, fingerprint)
+    response = Response(
+        {"detail": f"A request with this {HEADER} is already in progress."},
+        status=status.HTTP_409_CONFLICT,
+    )
+    response["Retry-After"] = "1"
+    return response
+
+
+def idempotent(view_method):
+    """Make a ViewSet action or APIView handler honour Idempotency-Key."""
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        client_key = request.headers.get(HEADER)
+        if client_key is None:
+            return view_method(self, request, *args, **kwargs)
+        if not client_key or len(client_key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        key = idempotency_key(request.user.pk, client_key)
+        fingerprint = _fingerprint(request)
+        entry = get_rendered(key)
+        if entry is not None:
+            return _replay(entry, fingerprint)
+
+        # Held for as long as the action may run; a crashed holder frees it
+        # when it expires and the next retry runs the action again
+        with cache_lock(key, timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT) as acquired:
+            if not acquired:
+                return _wait_for(key, fingerprint)
+
+            # The previous holder may have stored its response just before
+            # we took the lock
+            entry = get_rendered(key)
+            if entry is not None:
+                return _replay(entry, fingerprint)
+
+            response = view_method(self, request, *args, **kwargs)
+            if status.is_success(response.status_code) and isinstance(
+                response, Response
+            ):
+                header, body = render(key, response.data)
+                header.update(status=response.status_code, fingerprint=fingerprint)
+                set_rendered(key, (header, body), settings.IDEMPOTENCY_TTL)
+            return response
+
+    return wrapper
@@ -0,0 +1,41 @@
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+
+from django.core.cache import cache
+
+from utils.async_redis import aadd, adelete, aget
+from utils.cache_keys import lock_key
+
+
+@contextmanager
+def cache_lock(key, timeout=10):
+    """
+    Short-lived, non-blocking lock on `key` backed by Redis SET NX.
+
+    Yields True when the lock is held. The lock expires on its own after
+    `timeout` seconds so a crashed holder can't wedge other workers.
+    When Redis is unreachable, django-redis (IGNORE_EXCEPTIONS) returns
+    None; callers then proceed unlocked rather than fail the request.
+    """
+    name = lock_key(key)
+    token = uuid.uuid4().hex
+    acquired = cache.add(name, token, timeout=timeout)
+    try:
+        yield acquired is not False
+    finally:
+        # Only release a lock we still own; it may have expired and been re-taken
+        if acquired and cache.get(name) == token:
+            cache.delete(name)
+
+
+@asynccontextmanager
+async def async_cache_lock(key, timeout=10):
+    """cache_lock for async code: the same lock keys, via utils.async_redis."""
+    name = lock_key(key)
+    token = uuid.uuid4().hex
+    acquired = await aadd(name, token, timeout)
+    try:
+        yield acquired is not False
+    finally:
+        if acquired and await aget(name) == token:
+            await adelete(name)
@@ -0,0 +1,112 @@
+"""
+django-redis extensions for compact cache values.
+
+CompactClient + ThresholdCompressor compress serialized values above a
+size threshold with zlib or lz4. Key families listed in
+utils.cache_keys.UNCOMPRESSED_KEY_PREFIXES skip compression entirely.
+The serializer is django-redis's own and is chosen in settings
+(CACHE_SERIALIZER).
+"""
+
+import zlib
+from contextvars import ContextVar
+
+import lz4.frame
+from django_redis.client import DefaultClient
+from django_redis.compressors.base import BaseCompressor
+from django_redis.exceptions import CompressorError
+
+from utils.cache_keys import is_compressible
+
+# Compressed values are tagged with the algorithm that wrote them, so
+# changing COMPRESS_ALGORITHM never strands existing entries
+MAGIC = b"\x00"
+ALGORITHMS = {
+    "zlib": (b"z", lambda value, level: zlib.compress(value, level), zlib.decompress),
+    "lz4": (
+        b"l",
+        lambda value, level: lz4.frame.compress(value, compression_level=level),
+        lz4.frame.decompress,
+    ),
+}
+DECOMPRESSORS = {tag: decompress for tag, _, decompress in ALGORITHMS.values()}
+
+_compress_value = ContextVar("compress_value", default=True)
+
+
+class ThresholdCompressor(BaseCompressor):
+    """
+    OPTIONS:
+        COMPRESS_ALGORITHM   "zlib" (default) or "lz4"
+        COMPRESS_MIN_LENGTH  values shorter than this many bytes are stored
+                             as is (default 1024)
+        COMPRESS_LEVEL       algorithm-specific level (zlib 6, lz4 0)
+    """
+
+    def __init__(self, options):
+        super().__init__(options)
+        algorithm = options.get("COMPRESS_ALGORITHM", "zlib")
+        self.tag, self._compress, _ = ALGORITHMS[algorithm]
+        self.min_length = options.get("COMPRESS_MIN_LENGTH", 1024)
+        self.level = options.get("COMPRESS_LEVEL", 6 if algorithm == "zlib" else 0)
+
+    def compress(self, value):
+        if len(value) < self.min_length:
+            return value
+        compressed = MAGIC + self.tag + self._compress(value, self.level)
+        # Already-dense payloads can grow; keep whichever is smaller
+        return compressed if len(compressed) < len(value) else value
+
+    def decompress(self, value):
+        decompress = DECOMPRESSORS.get(value[1:2]) if value[:1] == MAGIC else None
+        if decompress is None:
+            raise CompressorError("value is not compressed")
+        try:
+            return decompress(value[2:])
+        except Exception as exc:
+            raise CompressorError(exc)
+
+
+class CompactClient(DefaultClient):
+    """
+    DefaultClient that skips compression for the key families in
+    utils.cache_keys.UNCOMPRESSED_KEY_PREFIXES. add() and set_many() both
+    go through set(), so the key is known when the value is encoded.
+
+    compress()/decompress() and encode_for() expose the configured
+    compressor to code that talks to Redis directly (utils.rendered_cache,
+    utils.async_redis).
+    """
+
+    def set(self, key, value, *args, **kwargs):
+        token = _compress_value.set(is_compressible(key))
+        try:
+            return super().set(key, value, *args, **kwargs)
+        finally:
+            _compress_value.reset(token)
+
+    def encode(self, value):
+        if isinstance(value, bool) or not isinstance(value, int):
+            value = self._serializer.dumps(value)
+            if _compress_value.get():
+                value = self._compressor.compress(value)
+        return value
+
+    def encode_for(self, key, value):
+        """encode() as set() would for `key` (utils.async_redis writes directly)."""
+        token = _compress_value.set(is_compressible(key))
+        try:
+            return self.encode(value)
+        finally:
+            _compress_value.reset(token)
+
+    def compress(self, value, key=None):
+        if key is not None and not is_compressible(key):
+            return value
+        return self._compressor.compress(value)
+
+    def decompress(self, value):
+        try:
+            return self._compressor.decompress(value)
+        except CompressorError:
+            return value
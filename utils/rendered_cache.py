@@ -0,0 +1,184 @@
+"""
+Cache of fully rendered JSON responses.
+
+An entry is one Redis string: a one-line JSON header followed by the
+response body exactly as it goes on the wire,
+
+    {"content_type": "application/json", "etag": "\"...\"", "owner": 7, "sig": "..."}\n{...body...}
+
+A hit is a raw GET, a decompress for large entries and a split on the
+first newline; nothing is unpickled, serialized or rendered. Entries
+written with an owner carry an HMAC over key, owner and body so the
+owner can be trusted without a DB lookup.
+
+The ETag is a hash of the body, computed once when the entry is rendered.
+A request whose If-None-Match matches gets a 304 straight from the
+header, before the body is even looked at.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.functional import cached_property
+from django.utils.http import parse_etags
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from rest_framework.settings import api_settings
+
+from utils.async_redis import aget_raw, aset_raw
+from utils.write_through import get_or_build, update_in_place
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse(HttpResponse):
+    """
+    A pre-rendered body served as is. `.data` is parsed on demand, for
+    tests and anything else that expects a DRF Response.
+    """
+
+    @cached_property
+    def data(self):
+        return json.loads(self.content)
+
+
+class RenderedCodec:
+    """
+    (header, body) <-> header line + body, for utils.write_through.
+    Compressed with the cache's compressor (utils.redis_cache) when large.
+    """
+
+    def encode(self, entry):
+        header, body = entry
+        raw = json.dumps(header, separators=(",", ":")).encode() + b"\n" + body
+        return cache.client.compress(raw)
+
+    def decode(self, raw):
+        header, _, body = cache.client.decompress(raw).partition(b"\n")
+        return json.loads(header), body
+
+
+codec = RenderedCodec()
+
+
+def _renderer():
+    for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES:
+        if renderer_class.format == "json":
+            return renderer_class()
+    raise LookupError("No JSON renderer in DEFAULT_RENDERER_CLASSES")
+
+
+def cacheable(request):
+    # Only plain JSON requests share cached bytes; the browsable API and
+    # "application/json; indent=4" are rendered per request as before.
+    renderer = getattr(request, "accepted_renderer", None)
+    return (
+        renderer is not None
+        and renderer.format == "json"
+        and request.accepted_media_type == renderer.media_type
+    )
+
+
+def _sign(key, owner, body):
+    message = json.dumps([key, owner]).encode() + b"\n" + body
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def render(key, data, owner=None):
+    """Render `data` into a (header, body) entry for `key`."""
+    renderer = _renderer()
+    body = renderer.render(data)
+    content_type = renderer.media_type
+    if renderer.charset:
+        content_type = f"{content_type}; charset={renderer.charset}"
+    header = {
+        "content_type": content_type,
+        "etag": '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest(),
+    }
+    if owner is not None:
+        header["owner"] = owner
+        header["sig"] = _sign(key, owner, body)
+    return header, body
+
+
+def not_modified(request, etag):
+    # If-None-Match uses the weak comparison (RFC 9110 13.1.2)
+    etags = parse_etags(request.headers.get("If-None-Match", ""))
+    return "*" in etags or etag in (tag.removeprefix("W/") for tag in etags)
+
+
+def respond(entry, request=None, status=200):
+    """CachedResponse for the entry, or a 304 if `request` already has it."""
+    header, body = entry
+    etag = header.get("etag")
+    if etag and request is not None and not_modified(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = CachedResponse(
+            body, content_type=header["content_type"], status=status
+        )
+    if etag:
+        response["ETag"] = etag
+    return response
+
+
+def get_rendered(key):
+    """(header, body) for `key`, or None if missing or failing its signature."""
+    try:
+        raw = get_redis_connection("default").get(cache.make_key(key))
+    except RedisError:
+        return None
+    return _verified(key, raw)
+
+
+async def aget_rendered(key):
+    """get_rendered for async code (utils.async_redis)."""
+    return _verified(key, await aget_raw(key))
+
+
+def _verified(key, raw):
+    if raw is None:
+        return None
+    header, body = codec.decode(raw)
+    if "owner" in header and not hmac.compare_digest(
+        header.get("sig", ""), _sign(key, header["owner"], body)
+    ):
+        return None
+    return header, body
+
+
+def set_rendered(key, entry, timeout):
+    try:
+        get_redis_connection("default").set(
+            cache.make_key(key), codec.encode(entry), ex=timeout
+        )
+    except RedisError:
+        logger.warning("Could not cache %s", key, exc_info=True)
+
+
+async def aset_rendered(key, entry, timeout):
+    await aset_raw(key, codec.encode(entry), timeout)
+
+
+def get_or_render(key, version_key, build, timeout):
+    """
+    Rendered entry for `key`, rendering build() on a miss. Versioned like
+    utils.write_through.get_or_build, so patch_rendered() can keep it warm.
+    """
+    return get_or_build(
+        key, version_key, lambda: render(key, build()), timeout, codec=codec
+    )
+
+
+def patch_rendered(key, version_key, mutate, timeout):
+    """Write-through update: mutate(data) -> data, re-rendered in place."""
+
+    def patch(entry):
+        return render(key, mutate(json.loads(entry[1])))
+
+    return update_in_place(key, version_key, patch, timeout, codec=codec)
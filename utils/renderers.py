@@ -0,0 +1,49 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Drop-in JSONRenderer on top of orjson, byte-for-byte compatible with the
+    stock renderer under the default UNICODE_JSON / COMPACT_JSON /
+    STRICT_JSON settings.
+
+    Dates and times are handed to DRF's JSONEncoder so they keep DRF's
+    format ("...Z" for UTC rather than orjson's "+00:00"), as do Decimal,
+    lazy strings and the other types orjson doesn't know. Indented output
+    (?format / "application/json; indent=4", the browsable API) and
+    anything orjson refuses, such as integers wider than 64 bits, go
+    through the stock renderer.
+    """
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    orjson_compatible = (
+        api_settings.UNICODE_JSON
+        and api_settings.COMPACT_JSON
+        and api_settings.STRICT_JSON
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        if not self.orjson_compatible or self.get_indent(
+            accepted_media_type, renderer_context
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=self.options
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same as JSONRenderer: keep the output a strict JavaScript subset
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import time
+
+from django.core.cache import cache
+
+from utils.async_redis import aget, aget_many, aset
+from utils.locks import async_cache_lock, cache_lock
+
+logger = logging.getLogger(__name__)
+
+
+def make_entry(value, timeout):
+    """Envelope stored in Redis: the value plus the moment it goes stale."""
+    return {"value": value, "fresh_until": time.time() + timeout}
+
+
+def is_entry(cached):
+    return isinstance(cached, dict) and cached.keys() == {"value", "fresh_until"}
+
+
+FRESH = "fresh"
+STALE = "stale"
+LOADED = "loaded"
+
+
+def get_or_load(key, loader, timeout, **kwargs):
+    """
+    Read-through cache with single-flight loading.
+
+    - Fresh entry: returned as is.
+    - Stale entry (older than `timeout`, younger than `timeout + stale_timeout`):
+      the caller that wins the per-key lock refreshes it, everyone else gets
+      the stale value immediately. If the refresh raises (e.g. the upstream
+      is down), the winner gets the stale value too.
+    - Miss: the lock winner calls `loader()`; the rest poll the cache for up
+      to `wait_timeout` seconds and then load on their own.
+
+    `loader` returning None is not cached. A loader that remembers "does
+    not exist" under its own key can pass it as `missing_key`; waiters
+    that see it set return None instead of loading in turn.
+    """
+    return get_or_load_with_state(key, loader, timeout, **kwargs)[0]
+
+
+def get_or_load_with_state(
+    key,
+    loader,
+    timeout,
+    stale_timeout=600,
+    lock_timeout=10,
+    wait_timeout=2.0,
+    poll_interval=0.05,
+    missing_key=None,
+):
+    """Same as get_or_load, but returns (value, FRESH | STALE | LOADED)."""
+    cached = cache.get(key)
+    if is_entry(cached):
+        if cached["fresh_until"] > time.time():
+            return cached["value"], FRESH
+        with cache_lock(key, timeout=lock_timeout) as acquired:
+            if acquired:
+                try:
+                    return _load(key, loader, timeout, stale_timeout), LOADED
+                except Exception:
+                    _refresh_failed(key)
+        return cached["value"], STALE
+
+    deadline = time.monotonic() + wait_timeout
+    while True:
+        with cache_lock(key, timeout=lock_timeout) as acquired:
+            if acquired:
+                # Another worker may have filled the key while we waited
+                found, value = _settled(key, missing_key)
+                if found:
+                    return value, FRESH
+                return _load(key, loader, timeout, stale_timeout), LOADED
+
+        if time.monotonic() >= deadline:
+            break
+        time.sleep(poll_interval)
+        found, value = _settled(key, missing_key)
+        if found:
+            return value, FRESH
+
+    return _load(key, loader, timeout, stale_timeout), LOADED
+
+
+def _settled(key, missing_key):
+    """(True, value) once another worker has loaded `key` or marked it missing."""
+    keys = [key, missing_key] if missing_key else [key]
+    found = cache.get_many(keys)
+    if is_entry(found.get(key)):
+        return True, found[key]["value"]
+    if found.get(missing_key):
+        return True, None
+    return False, None
+
+
+async def _asettled(key, missing_key):
+    keys = [key, missing_key] if missing_key else [key]
+    found = await aget_many(keys)
+    if is_entry(found.get(key)):
+        return True, found[key]["value"]
+    if found.get(missing_key):
+        return True, None
+    return False, None
+
+
+def _refresh_failed(key):
+    # A stale value beats an error; the next request past the lock retries
+    logger.warning("Refreshing %s failed, serving stale", key, exc_info=True)
+
+
+def _load(key, loader, timeout, stale_timeout):
+    value = loader()
+    if value is not None:
+        cache.set(key, make_entry(value, timeout), timeout=timeout + stale_timeout)
+    return value
+
+
+async def aget_or_load_with_state(
+    key,
+    loader,
+    timeout,
+    stale_timeout=600,
+    lock_timeout=10,
+    wait_timeout=2.0,
+    poll_interval=0.05,
+    missing_key=None,
+):
+    """
+    get_or_load_with_state for async code, with an async `loader`. Same
+    entries and lock keys, so sync and async workers share one flight.
+    """
+    cached = await aget(key)
+    if is_entry(cached):
+        if cached["fresh_until"] > time.time():
+            return cached["value"], FRESH
+        async with async_cache_lock(key, timeout=lock_timeout) as acquired:
+            if acquired:
+                try:
+                    return await _aload(key, loader, timeout, stale_timeout), LOADED
+                except Exception:
+                    _refresh_failed(key)
+        return cached["value"], STALE
+
+    deadline = time.monotonic() + wait_timeout
+    while True:
+        async with async_cache_lock(key, timeout=lock_timeout) as acquired:
+            if acquired:
+                found, value = await _asettled(key, missing_key)
+                if found:
+                    return value, FRESH
+                return await _aload(key, loader, timeout, stale_timeout), LOADED
+
+        if time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(poll_interval)
+        found, value = await _asettled(key, missing_key)
+        if found:
+            return value, FRESH
+
+    return await _aload(key, loader, timeout, stale_timeout), LOADED
+
+
+async def _aload(key, loader, timeout, stale_timeout):
+    value = await loader()
+    if value is not None:
+        await aset(key, make_entry(value, timeout), timeout + stale_timeout)
+    return value
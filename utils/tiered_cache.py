@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+from utils.singleflight import (
+    LOADED,
+    STALE,
+    aget_or_load_with_state,
+    get_or_load_with_state,
+)
+
+logger = logging.getLogger(__name__)
+
+MISS = object()
+
+_registry = []
+
+
+class LocalCache:
+    """
+    Thread-safe in-process LRU with a per-entry TTL, bounded both by entry
+    count and by an approximate memory budget (pickled size of the values).
+    """
+
+    def __init__(
+        self, max_entries=1024, max_bytes=4 * 1024 * 1024, ttl=30, clock=time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= self._clock():
+                if item is not None:
+                    self._remove(key)
+                self.misses += 1
+                return MISS
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[2]
+
+    def set(self, key, value):
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (self._clock() + self.ttl, size, value)
+            self.bytes += size
+            while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def _remove(self, key):
+        self.bytes -= self._data.pop(key)[1]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._data),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+
+class TieredCache:
+    """
+    In-process LocalCache (L1) in front of the django-redis cache (L2).
+
+    L2 reads go through single-flight loading. invalidate() deletes from
+    Redis and publishes the keys on a pub/sub channel; every process
+    listening on it drops its L1 copy, so gunicorn workers don't serve
+    stale data for longer than the publish round trip.
+    """
+
+    def __init__(self, name, max_entries=1024, max_bytes=4 * 1024 * 1024, ttl=30):
+        self.name = name
+        self.channel = f"cache_invalidation_{name}"
+        self.local = LocalCache(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.invalidations_received = 0
+        self._listener_pid = None
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def get_local(self, key):
+        self._ensure_listener()
+        return self.local.get(key)
+
+    def get_or_load(self, key, loader, **kwargs):
+        value = self.get_local(key)
+        if value is not MISS:
+            return value
+
+        value, state = get_or_load_with_state(key, loader, **kwargs)
+        return self._loaded(key, value, state)
+
+    async def aget_or_load(self, key, loader, **kwargs):
+        """get_or_load for async code; `loader` is a coroutine function."""
+        value = self.get_local(key)
+        if value is not MISS:
+            return value
+
+        value, state = await aget_or_load_with_state(key, loader, **kwargs)
+        return self._loaded(key, value, state)
+
+    def _loaded(self, key, value, state):
+        with self._lock:
+            if state == LOADED:
+                self.l2_misses += 1
+            else:
+                self.l2_hits += 1
+        # A stale value is only served while one worker refreshes it;
+        # don't let L1 keep it around any longer
+        if value is not None and state != STALE:
+            self.local.set(key, value)
+        return value
+
+    def set_local(self, key, value):
+        self.local.set(key, value)
+
+    def invalidate(self, *keys):
+        if not keys:
+            return
+        cache.delete_many(keys)
+        self.broadcast(*keys)
+
+    def broadcast(self, *keys):
+        """Tell every process (this one included) to drop its L1 copy of `keys`."""
+        for key in keys:
+            self.local.delete(key)
+        try:
+            get_redis_connection("default").publish(self.channel, json.dumps(keys))
+        except Exception:
+            logger.warning(
+                "Could not publish invalidation on %s", self.channel, exc_info=True
+            )
+
+    def stats(self):
+        return {
+            "l1": self.local.stats(),
+            "l2": {"hits": self.l2_hits, "misses": self.l2_misses},
+            "invalidations_received": self.invalidations_received,
+        }
+
+    def _ensure_listener(self):
+        pid = os.getpid()
+        if self._listener_pid == pid:
+            return
+        with self._lock:
+            if self._listener_pid == pid:
+                return
+            # Subscribe before serving from L1 so no invalidation is missed
+            ready = threading.Event()
+            threading.Thread(
+                target=self._listen, args=(ready,), name=self.channel, daemon=True
+            ).start()
+            ready.wait(timeout=1)
+            self._listener_pid = pid
+
+    def _listen(self, ready):
+        while True:
+            try:
+                pubsub = get_redis_connection("default").pubsub(
+                    ignore_subscribe_messages=True
+                )
+                pubsub.subscribe(self.channel)
+                ready.set()
+                for message in pubsub.listen():
+                    keys = json.loads(message["data"])
+                    for key in keys:
+                        self.local.delete(key)
+                    self.invalidations_received += 1
+            except Exception:
+                # Invalidations may have been missed while disconnected
+                self.local.clear()
+                ready.set()
+                time.sleep(1)
+
+
+def clear_local_caches():
+    for tiered in _registry:
+        tiered.local.clear()
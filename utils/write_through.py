@@ -0,0 +1,93 @@
+import logging
+
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError, WatchError
+
+logger = logging.getLogger(__name__)
+
+VERSION_TTL = 24 * 3600
+
+
+def get_or_build(key, version_key, build, timeout, codec=None):
+    """
+    Return the cached value for `key`, or build() it and cache the result.
+
+    The result is only stored if no write bumped `version_key` while build()
+    was reading the DB (Redis WATCH). Otherwise a stale rebuild could land
+    on top of a newer write-through update.
+
+    `codec` turns values into the bytes stored in Redis and back
+    (encode/decode); django-redis's own serializer by default.
+    """
+    codec = codec or cache.client
+    redis_key = cache.make_key(key)
+    try:
+        raw = get_redis_connection("default").get(redis_key)
+    except RedisError:
+        return build()
+    if raw is not None:
+        return codec.decode(raw)
+
+    try:
+        pipe = get_redis_connection("default").pipeline()
+        pipe.watch(cache.make_key(version_key))
+    except RedisError:
+        return build()
+
+    try:
+        value = build()
+        pipe.multi()
+        pipe.set(redis_key, codec.encode(value), ex=timeout)
+        pipe.execute()
+    except WatchError:
+        pass  # a write raced us; serve what we read, cache nothing
+    except RedisError:
+        logger.warning("Could not cache %s", key, exc_info=True)
+    finally:
+        pipe.reset()
+    return value
+
+
+def update_in_place(key, version_key, mutate, timeout, retries=5, codec=None):
+    """
+    Replace the cached value for `key` with mutate(value).
+
+    Optimistic: the read-modify-write is retried if another writer touched
+    `key` in between (Redis WATCH/MULTI). Every call bumps `version_key`
+    so rebuilds that started earlier are discarded. When nothing is cached
+    only the version moves; the next read rebuilds from the DB.
+
+    Returns False if the update gave up, in which case the entry has been
+    dropped instead.
+    """
+    codec = codec or cache.client
+    redis_key = cache.make_key(key)
+    redis_version_key = cache.make_key(version_key)
+    try:
+        with get_redis_connection("default").pipeline() as pipe:
+            for _ in range(retries):
+                try:
+                    pipe.watch(redis_key)
+                    raw = pipe.get(redis_key)
+                    pipe.multi()
+                    if raw is not None:
+                        value = mutate(codec.decode(raw))
+                        pipe.set(redis_key, codec.encode(value), ex=timeout)
+                    pipe.incr(redis_version_key)
+                    pipe.expire(redis_version_key, VERSION_TTL)
+                    pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+
+            # Too much contention: fall back to invalidation
+            pipe.reset()
+            pipe.delete(redis_key)
+            pipe.incr(redis_version_key)
+            pipe.expire(redis_version_key, VERSION_TTL)
+            pipe.execute()
+    except RedisError:
+        logger.warning("Could not update cached %s", key, exc_info=True)
+        cache.delete(key)
+    return False